@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+"""Benchmark the spatial queries on Places.
+
+Usage: ./benchmarks/bench_geo.py [count] [--ops N]
+
+Stores <count> Places (default 1M) at random coordinates, then times
+radius and bounding box queries through the GridIndex against a scan
+computing the distance of every Place. Every line reports the p50/p95/p99
+latency in milliseconds and the mean number of results.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+os.chdir(tempfile.mkdtemp())
+
+from generate import parse_count
+from models import storage
+from models.engine.indexes import haversine
+from models.engine.query import near, within
+from models.place import Place
+
+
+def percentile(latencies, pct):
+    """Return the pct percentile of a sorted list of latencies."""
+    return latencies[min(len(latencies) - 1, int(len(latencies) * pct))]
+
+
+def report(name, latencies, results):
+    """Print the statistics of a query.
+
+    Args:
+        name (str): The name of the query.
+        latencies (list): The duration of each run in seconds.
+        results (int): The total number of results of the runs.
+    """
+    latencies = sorted(latencies)
+    print("{:<22} {:>6} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.1f}".format(
+        name, len(latencies), percentile(latencies, 0.5) * 1000,
+        percentile(latencies, 0.95) * 1000,
+        percentile(latencies, 0.99) * 1000, results / len(latencies)))
+
+
+def timed(func, points):
+    """Return the latencies and total results of func on each point."""
+    latencies = []
+    results = 0
+    for lat, lon in points:
+        start = time.perf_counter()
+        results += len(func(lat, lon))
+        latencies.append(time.perf_counter() - start)
+    return latencies, results
+
+
+def scan(lat, lon, km):
+    """Return the Places within km of a point by computing every distance."""
+    return [obj for obj in storage.all(Place).values()
+            if haversine(lat, lon, obj.latitude, obj.longitude) <= km]
+
+
+def bench(count, ops):
+    """Store count Places and run every query ops times."""
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for i in range(count):
+        storage.new(Place(id=str(i), latitude=rng.uniform(-60.0, 70.0),
+                          longitude=rng.uniform(-180.0, 180.0)))
+    print("{:,} Places stored and indexed in {:.1f}s".format(
+        count, time.perf_counter() - start))
+    print("{:<22} {:>6} {:>10} {:>10} {:>10} {:>10}".format(
+        "query", "runs", "p50 ms", "p95 ms", "p99 ms", "results"))
+    points = [(rng.uniform(-60.0, 70.0), rng.uniform(-180.0, 180.0))
+              for i in range(ops)]
+    for km in (10, 100, 500):
+        report("radius {} km".format(km), *timed(
+            lambda lat, lon: near(storage, "Place", lat, lon, km), points))
+    report("bbox 1x1 deg", *timed(
+        lambda lat, lon: within(storage, "Place", lat, lon, lat + 1,
+                                lon + 1), points))
+    report("scan radius 100 km", *timed(
+        lambda lat, lon: scan(lat, lon, 100), points[:max(1, ops // 100)]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("count", nargs="?", default="1M")
+    parser.add_argument("--ops", type=int, default=1000,
+                        help="runs of each query; the scan gets 1%%")
+    args = parser.parse_args()
+    bench(parse_count(args.count), args.ops)
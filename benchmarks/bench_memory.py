@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+"""Benchmark the memory used by model instances with and without slots.
+
+Usage: ./benchmarks/bench_memory.py [count] [--reload]
+
+Builds <count> objects (default 1M) of the synthetic dataset of
+benchmarks/generate.py, first with the default model classes and then
+with compact ones (HBNB_COMPACT_MODELS=1), each in a fresh process.
+Every line reports the build time, the growth of the peak RSS and the
+bytes per object; --reload also measures a FileStorage reload of a store
+of the same objects in each mode.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from generate import generate, parse_count, write
+
+
+def peak_rss():
+    """Return the peak resident set size of the process in bytes."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def measure(count, step, path):
+    """Print the cost of count instances built in one step.
+
+    Runs in a child process, after the model classes were imported in
+    the mode of its environment.
+
+    Args:
+        count (int): The number of objects.
+        step (str): "build" to build the instances from generated
+            records, "reload" to reload the store at path.
+        path (str): The store written for the reload step.
+    """
+    from models import storage
+    from models.base_model import classes
+    from models.engine.file_storage import FileStorage
+    mode = "compact" if classes["User"]._slots else "default"
+    base = peak_rss()
+    start = time.perf_counter()
+    if step == "build":
+        objs = []
+        for rec in generate(count):
+            cls = classes[rec.pop("__class__")]
+            objs.append(cls(**rec))
+    else:
+        FileStorage._FileStorage__file_path = path
+        storage.reload()
+    elapsed = time.perf_counter() - start
+    grown = peak_rss() - base
+    print("{:<8} {:<8} {:>8.1f}s {:>10.1f} MB {:>10.0f} B/obj".format(
+        mode, step, elapsed, grown / 2 ** 20, grown / count), flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("count", nargs="?", default="1M")
+    parser.add_argument("--reload", action="store_true",
+                        help="also reload a store of count objects")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--store", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    count = parse_count(args.count)
+    if args.child is not None:
+        measure(count, args.child, args.store)
+        sys.exit(0)
+    steps = ["build"]
+    path = os.path.join(tempfile.mkdtemp(), "file.json")
+    if args.reload:
+        write(path, count)
+        steps.append("reload")
+    print("{:<8} {:<8} {:>9} {:>13} {:>14}".format(
+        "mode", "step", "time", "RSS growth", "per object"), flush=True)
+    for step in steps:
+        for compact in ("0", "1"):
+            env = dict(os.environ, HBNB_COMPACT_MODELS=compact)
+            subprocess.run([sys.executable, os.path.abspath(__file__),
+                            args.count, "--child", step, "--store", path],
+                           env=env, check=True, cwd=tempfile.mkdtemp())
@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+"""Benchmark reading a store from file.json against a snapshot.
+
+Usage: ./benchmarks/bench_snapshot.py [count] [--ops N]
+
+Writes a store of <count> objects (default 1M) of the synthetic dataset of
+benchmarks/generate.py and a snapshot of it, then in a fresh process for
+each engine times the reload, N show lookups of random Places (p50/p99)
+and a scan of every Place, and reports the private memory the process
+grew by (the pages of a mapped snapshot are shared with the page cache
+and every other process mapping it, so they are not counted).
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from generate import parse_count, write
+
+
+def private_memory():
+    """Return the memory written by the process in bytes.
+
+    Clean pages of a file mapped by this process only are also reported
+    as private by the kernel, so only the dirty ones are counted.
+    """
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Private_Dirty:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def percentile(latencies, pct):
+    """Return the pct percentile of a sorted list of latencies."""
+    return latencies[min(len(latencies) - 1, int(len(latencies) * pct))]
+
+
+def measure(engine, ops):
+    """Print the costs of reading the store with an engine.
+
+    Runs in a child process whose working directory holds file.json,
+    file.snapshot and the ids of the Places in place_ids.
+
+    Args:
+        engine (str): "file" or "snapshot".
+        ops (int): The number of show lookups.
+    """
+    base = private_memory()
+    start = time.perf_counter()
+    from models import storage
+    reload = time.perf_counter() - start
+    with open("place_ids") as f:
+        ids = f.read().split()
+    random.seed(0)
+    latencies = []
+    for oid in random.sample(ids, min(ops, len(ids))):
+        start = time.perf_counter()
+        storage.all()["Place.{}".format(oid)]
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    start = time.perf_counter()
+    places = sum(1 for obj in storage.all("Place").values())
+    scan = time.perf_counter() - start
+    print("{:<9} {:>8.2f}s {:>10.3f} {:>10.3f} {:>8.2f}s {:>10.1f} MB"
+          .format(engine, reload, percentile(latencies, 0.5) * 1000,
+                  percentile(latencies, 0.99) * 1000, scan,
+                  (private_memory() - base) / 2 ** 20), flush=True)
+    assert places == len(ids)
+
+
+def prepare(count, workdir):
+    """Write the store, its snapshot and the ids of its Places."""
+    write(os.path.join(workdir, "file.json"), count)
+    subprocess.run([sys.executable, "-c", (
+        "from models import storage\n"
+        "from models.engine.snapshot_storage import write_snapshot\n"
+        "write_snapshot(storage, 'file.snapshot')\n"
+        "with open('place_ids', 'w') as f:\n"
+        "    f.write(' '.join(obj.id for obj in "
+        "storage.all('Place').values()))\n")],
+        env=dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__)))),
+        check=True, cwd=workdir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("count", nargs="?", default="1M")
+    parser.add_argument("--ops", type=int, default=1000,
+                        help="show lookups per engine")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child is not None:
+        measure(args.child, args.ops)
+        sys.exit(0)
+    workdir = tempfile.mkdtemp()
+    prepare(parse_count(args.count), workdir)
+    print("{:<9} {:>9} {:>10} {:>10} {:>9} {:>13}".format(
+        "engine", "reload", "show p50", "show p99", "scan", "private"))
+    for engine in ("file", "snapshot"):
+        env = dict(os.environ, HBNB_TYPE_STORAGE=engine)
+        subprocess.run([sys.executable, os.path.abspath(__file__),
+                        args.count, "--ops", str(args.ops), "--child",
+                        engine], env=env, check=True, cwd=workdir)
@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+"""Benchmark FileStorage and the console on a synthetic dataset.
+
+Usage: ./benchmarks/bench_storage.py [count ...] [--ops N] [--jsonl]
+
+For each dataset size (default 10k 100k 1M) a store is generated with
+benchmarks/generate.py in a temporary directory, then reload, save, all,
+count, show and update are timed. Every line reports the throughput,
+the p50/p95/p99 latency in milliseconds and the peak RSS of the process
+so far.
+"""
+import argparse
+import io
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+os.chdir(tempfile.mkdtemp())
+
+from generate import parse_count, write
+from console import HBNBCommand
+from models import storage
+from models.engine.file_storage import FileStorage
+
+
+def percentile(latencies, pct):
+    """Return the pct percentile of a sorted list of latencies."""
+    return latencies[min(len(latencies) - 1, int(len(latencies) * pct))]
+
+
+def peak_rss():
+    """Return the peak resident set size of the process in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def report(name, latencies, units=1):
+    """Print the statistics of an operation.
+
+    Args:
+        name (str): The name of the operation.
+        latencies (list): The duration of each run in seconds.
+        units (int): The number of items processed by each run.
+    """
+    latencies = sorted(latencies)
+    print("{:<10} {:>7} {:>14,.0f}/s {:>10.3f} {:>10.3f} {:>10.3f} {:>9.1f}"
+          .format(name, len(latencies), units * len(latencies) /
+                  sum(latencies), percentile(latencies, 0.5) * 1000,
+                  percentile(latencies, 0.95) * 1000,
+                  percentile(latencies, 0.99) * 1000, peak_rss()))
+
+
+def timed(func, runs):
+    """Return the duration of runs calls of func."""
+    latencies = []
+    for i in range(runs):
+        start = time.perf_counter()
+        func(i)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench(count, ops, fmt):
+    """Run every benchmark on a dataset of count objects."""
+    print("\n{:,} objects ({})".format(count, fmt))
+    print("{:<10} {:>7} {:>16} {:>10} {:>10} {:>10} {:>9}".format(
+        "operation", "runs", "throughput", "p50 ms", "p95 ms", "p99 ms",
+        "rss MB"))
+    write("file.json", count, fmt)
+    console = HBNBCommand()
+    sink = io.StringIO()
+
+    def reload(i):
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+
+    report("reload", timed(reload, 3), count)
+    keys = list(storage.all())
+    rng = random.Random(0)
+    report("save", timed(lambda i: storage.save(), 3), count)
+
+    def run(line):
+        with redirect_stdout(sink):
+            console.onecmd(line)
+        sink.seek(0)
+        sink.truncate()
+
+    report("all", timed(lambda i: run("all Amenity"), ops))
+    report("count", timed(lambda i: run("count Review"), ops))
+    report("show", timed(lambda i: run(
+        "show {} {}".format(*rng.choice(keys).split("."))), ops))
+    report("update", timed(lambda i: run(
+        "update {} {} bench_value {}".format(
+            *rng.choice(keys).split("."), i)), max(1, ops // 100)))
+    os.remove("file.json")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("counts", nargs="*", default=["10k", "100k", "1M"])
+    parser.add_argument("--ops", type=int, default=1000,
+                        help="runs of all, count and show; update gets 1%%")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="generate the dataset as JSON Lines")
+    args = parser.parse_args()
+    for count in args.counts:
+        bench(parse_count(count), args.ops, "jsonl" if args.jsonl else "json")
@@ -0,0 +1,126 @@
+#!/usr/bin/python3
+"""Generate synthetic HBnB datasets for the benchmarks.
+
+Usage: ./benchmarks/generate.py <count> [path] [json|jsonl]
+
+Writes <count> objects to path (default file.json) in the FileStorage
+layout: States own Cities, Places belong to a City and a User and list
+Amenity ids, and Reviews are written by Users about Places.
+"""
+import argparse
+import json
+import random
+import uuid
+from datetime import datetime, timedelta
+
+# Share of the dataset taken by each class; Reviews get the remainder.
+SHARES = (("State", 0.001), ("City", 0.01), ("Amenity", 0.0005),
+          ("User", 0.1), ("Place", 0.2))
+WORDS = ("cozy", "quiet", "bright", "spacious", "charming", "modern",
+         "view", "beach", "downtown", "garden", "pool", "wifi", "clean",
+         "friendly", "host", "great", "location", "parking", "walk", "cafe")
+
+
+def parse_count(text):
+    """Return the number of objects of a count like 10000, 100k or 1M."""
+    text = text.lower()
+    if text.endswith("k"):
+        return int(float(text[:-1]) * 1000)
+    if text.endswith("m"):
+        return int(float(text[:-1]) * 1000000)
+    return int(text)
+
+
+def generate(count, seed=0):
+    """Yield count records shaped like BaseModel.to_dict().
+
+    Args:
+        count (int): The number of records to generate.
+        seed (int): The seed of the random generator.
+    """
+    rng = random.Random(seed)
+    start = datetime(2017, 1, 1)
+    ids = {}
+
+    def record(cls_name, **attrs):
+        oid = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        ids.setdefault(cls_name, []).append(oid)
+        created = start + timedelta(seconds=rng.randrange(10 ** 8),
+                                    microseconds=rng.randrange(10 ** 6))
+        rec = {"id": oid, "created_at": created.isoformat(),
+               "updated_at": created.isoformat()}
+        rec.update(attrs)
+        rec["__class__"] = cls_name
+        return rec
+
+    def text(words):
+        return " ".join(rng.choice(WORDS) for i in range(words))
+
+    produced = 0
+    for cls_name, share in SHARES:
+        for i in range(max(1, int(count * share))):
+            if produced == count:
+                return
+            produced += 1
+            if cls_name == "State":
+                yield record("State", name="State {}".format(i))
+            elif cls_name == "City":
+                yield record("City", name="City {}".format(i),
+                             state_id=rng.choice(ids["State"]))
+            elif cls_name == "Amenity":
+                yield record("Amenity", name=rng.choice(WORDS))
+            elif cls_name == "User":
+                yield record("User", email="user{}@hbnb.io".format(i),
+                             password="pwd", first_name="First{}".format(i),
+                             last_name="Last{}".format(i))
+            else:
+                amenities = ids["Amenity"]
+                yield record(
+                    "Place", city_id=rng.choice(ids["City"]),
+                    user_id=rng.choice(ids["User"]),
+                    name="Place {}".format(i), description=text(12),
+                    number_rooms=rng.randint(1, 6),
+                    number_bathrooms=rng.randint(1, 3),
+                    max_guest=rng.randint(1, 12),
+                    price_by_night=rng.randint(20, 500),
+                    latitude=rng.uniform(-60.0, 70.0),
+                    longitude=rng.uniform(-180.0, 180.0),
+                    amenity_ids=rng.sample(amenities,
+                                           min(len(amenities), 5)))
+    while produced < count:
+        produced += 1
+        yield record("Review", place_id=rng.choice(ids["Place"]),
+                     user_id=rng.choice(ids["User"]), text=text(30))
+
+
+def write(path, count, fmt="json", seed=0):
+    """Write a dataset of count records to path.
+
+    Args:
+        path (str): The file to write.
+        count (int): The number of records.
+        fmt (str): "json" for one object keyed by <class>.<id>, "jsonl"
+            for one record per line.
+        seed (int): The seed of the random generator.
+    """
+    with open(path, "w") as f:
+        if fmt == "jsonl":
+            for rec in generate(count, seed):
+                f.write(json.dumps(rec) + "\n")
+            return
+        sep = "{"
+        for rec in generate(count, seed):
+            key = "{}.{}".format(rec["__class__"], rec["id"])
+            f.write("{}{}: {}".format(sep, json.dumps(key), json.dumps(rec)))
+            sep = ", "
+        f.write("}" if sep == ", " else "{}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("count", help="number of objects, like 100k or 1M")
+    parser.add_argument("path", nargs="?", default="file.json")
+    parser.add_argument("format", nargs="?", default="json",
+                        choices=("json", "jsonl"))
+    args = parser.parse_args()
+    write(args.path, parse_count(args.count), args.format)
@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+"""Benchmark the timestamp parsing done by FileStorage.reload().
+
+Usage: ./benchmarks/reload_timestamps.py [count]
+
+Compares datetime.strptime(), the parser reload() used before, with
+parse_datetime() and with lazy timestamps, first on single values and
+then on the reload of a store of <count> Users (default 100k).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+os.chdir(tempfile.mkdtemp())
+
+import models.base_model
+from generate import parse_count
+from models import storage
+from models.base_model import BaseModel, parse_datetime
+from models.engine.file_storage import FileStorage
+from models.user import User
+
+
+def strptime(value):
+    """Parse value the way BaseModel did before parse_datetime()."""
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f")
+
+
+def bench_parse(count):
+    """Print the single value throughput of each parser."""
+    value = datetime.today().isoformat()
+    for name, parse in (("strptime", strptime),
+                        ("parse_datetime", parse_datetime)):
+        start = time.perf_counter()
+        for i in range(count):
+            parse(value)
+        elapsed = time.perf_counter() - start
+        print("{:<24} {:>12,.0f} values/s".format(name, count / elapsed))
+
+
+def bench_reload(count):
+    """Print the reload throughput of each timestamp mode."""
+    for i in range(count):
+        User().email = "user{}@hbnb.io".format(i)
+    storage.save()
+    modes = (("reload strptime", strptime, False),
+             ("reload parse_datetime", parse_datetime, False),
+             ("reload lazy", parse_datetime, True))
+    for name, parse, lazy in modes:
+        models.base_model.parse_datetime = parse
+        BaseModel._BaseModel__lazy_timestamps = lazy
+        FileStorage._FileStorage__objects = {}
+        start = time.perf_counter()
+        storage.reload()
+        elapsed = time.perf_counter() - start
+        print("{:<24} {:>12,.0f} objects/s".format(name, count / elapsed))
+    models.base_model.parse_datetime = parse_datetime
+    BaseModel._BaseModel__lazy_timestamps = False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("count", nargs="?", default="100k")
+    count = parse_count(parser.parse_args().count)
+    bench_parse(count)
+    bench_reload(count)
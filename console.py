@@ -2,9 +2,17 @@
 """Defines the console.py implementation."""
 import cmd
 import re
+import time
+from ast import literal_eval
+from itertools import islice
 from shlex import split
 from models import storage
-from models.base_model import BaseModel
+from models.base_model import BaseModel, classes
+from models.engine.query import AGGREGATES, aggregate, aggregate_groups
+from models.engine.query import having, near
+from models.engine.query import parse_where, search, within
+from models.engine.snapshot_storage import write_snapshot
+from models.engine.transfer import bulk_import, export
 from models.user import User
 from models.state import State
 from models.city import City
@@ -39,15 +47,6 @@ class HBNBCommand(cmd.Cmd):
     """
 
     prompt = "(hbnb) "
-    __classes = {
-        "BaseModel",
-        "User",
-        "State",
-        "City",
-        "Place",
-        "Amenity",
-        "Review"
-    }
 
     def emptyline(self):
         """Do nothing upon receiving an empty line."""
@@ -60,7 +59,14 @@ class HBNBCommand(cmd.Cmd):
             "show": self.do_show,
             "destroy": self.do_destroy,
             "count": self.do_count,
-            "update": self.do_update
+            "update": self.do_update,
+            "where": self.do_where,
+            "explain": self.do_explain,
+            "near": self.do_near,
+            "within": self.do_within,
+            "search": self.do_search,
+            "having": self.do_having,
+            "aggregate": self.do_aggregate
         }
         match = re.search(r"\.", arg)
         if match is not None:
@@ -90,11 +96,14 @@ class HBNBCommand(cmd.Cmd):
         argl = parse(arg)
         if len(argl) == 0:
             print("** class name missing **")
-        elif argl[0] not in HBNBCommand.__classes:
+        elif argl[0] not in classes:
             print("** class doesn't exist **")
         else:
-            print(eval(argl[0])().id)
-            storage.save()
+            try:
+                print(classes[argl[0]]().id)
+                storage.save()
+            except PermissionError:
+                print("** storage is read-only **")
 
     def do_show(self, arg):
         """Usage: show <class> <id> or <class>.show(<id>)
@@ -104,7 +113,7 @@ class HBNBCommand(cmd.Cmd):
         objdict = storage.all()
         if len(argl) == 0:
             print("** class name missing **")
-        elif argl[0] not in HBNBCommand.__classes:
+        elif argl[0] not in classes:
             print("** class doesn't exist **")
         elif len(argl) == 1:
             print("** instance id missing **")
@@ -120,41 +129,255 @@ class HBNBCommand(cmd.Cmd):
         objdict = storage.all()
         if len(argl) == 0:
             print("** class name missing **")
-        elif argl[0] not in HBNBCommand.__classes:
+        elif argl[0] not in classes:
             print("** class doesn't exist **")
         elif len(argl) == 1:
             print("** instance id missing **")
         elif "{}.{}".format(argl[0], argl[1]) not in objdict.keys():
             print("** no instance found **")
         else:
-            del objdict["{}.{}".format(argl[0], argl[1])]
-            storage.save()
+            try:
+                storage.delete(objdict["{}.{}".format(argl[0], argl[1])])
+                storage.save()
+            except PermissionError:
+                print("** storage is read-only **")
 
     def do_all(self, arg):
         """Usage: all or all <class> or <class>.all()
         Display string representations of all instances of a given class.
-        If no class is specified, displays all instantiated objects."""
+        If no class is specified, displays all instantiated objects.
+        Options limit=<n>, offset=<n> and cursor=<key> page through them;
+        when more instances follow a page, the cursor of the next page is
+        printed on the following line."""
         argl = parse(arg)
-        if len(argl) > 0 and argl[0] not in HBNBCommand.__classes:
+        opts = {}
+        for pair in [a for a in argl if "=" in a]:
+            k, sep, v = pair.partition("=")
+            if k not in ("limit", "offset", "cursor") or (
+                    k != "cursor" and not v.isdigit()):
+                print("** invalid option {} **".format(pair))
+                return False
+            opts[k] = v if k == "cursor" else int(v)
+        argl = [a for a in argl if "=" not in a]
+        if len(argl) > 0 and argl[0] not in classes:
+            print("** class doesn't exist **")
+            return False
+        objdict = storage.all(argl[0] if len(argl) > 0 else None)
+        keys = iter(objdict)
+        if "cursor" in opts:
+            if opts["cursor"] not in objdict:
+                print("** cursor not found **")
+                return False
+            for key in keys:
+                if key == opts["cursor"]:
+                    break
+        limit = opts.get("limit")
+        offset = opts.get("offset", 0)
+        page = islice(keys, offset,
+                      None if limit is None else offset + limit)
+        sep = "["
+        key = None
+        for i, key in enumerate(page):
+            print("{}{!r}".format(sep, str(objdict[key])), end="",
+                  flush=i % 1000 == 0)
+            sep = ", "
+        print("[]" if sep == "[" else "]")
+        if limit is not None and key is not None and \
+                next(keys, None) is not None:
+            print("cursor={}".format(key))
+
+    def do_where(self, arg):
+        """Usage: where <class> <conditions> or <class>.where(<conditions>)
+        Display the instances of a class matching every condition, such as
+        city_id="<id>", price_by_night<100 or name in ["a", "b"].
+        order_by=<attribute> (-<attribute> for descending) and limit=<n>
+        sort and cut the results."""
+        query = self.__query(arg)
+        if query is None:
+            return False
+        try:
+            objs = query.run(storage)
+        except ValueError as err:
+            print("** {} **".format(err))
+            return False
+        print([str(obj) for obj in objs])
+
+    def do_explain(self, arg):
+        """Usage: explain <class> <conditions> or <class>.explain(<conditions>)
+        Display how where would find the matching instances."""
+        query = self.__query(arg)
+        if query is not None:
+            print(query.explain(storage))
+
+    def __query(self, arg):
+        """Return the query of a where or explain argument, or None."""
+        cls, _, text = arg.strip().partition(" ")
+        if cls == "":
+            print("** class name missing **")
+        elif cls not in classes:
             print("** class doesn't exist **")
         else:
-            objl = []
-            for obj in storage.all().values():
-                if len(argl) > 0 and argl[0] == obj.__class__.__name__:
-                    objl.append(obj.__str__())
-                elif len(argl) == 0:
-                    objl.append(obj.__str__())
-            print(objl)
+            try:
+                return parse_where(cls, text)
+            except ValueError as err:
+                print("** {} **".format(err))
+        return None
+
+    def do_near(self, arg):
+        """Usage: near <class> <latitude> <longitude> <km> or
+       <class>.near(<latitude>, <longitude>, <km>)
+        Display the instances within km kilometers of a point, nearest
+        first."""
+        argl = self.__coordinates(arg, 3)
+        if argl is not None:
+            self.__print_spatial(near, argl)
+
+    def do_within(self, arg):
+        """Usage: within <class> <min_lat> <min_lon> <max_lat> <max_lon> or
+       <class>.within(<min_lat>, <min_lon>, <max_lat>, <max_lon>)
+        Display the instances inside a bounding box; a min_lon greater
+        than max_lon crosses the antimeridian."""
+        argl = self.__coordinates(arg, 4)
+        if argl is not None:
+            self.__print_spatial(within, argl)
+
+    def __coordinates(self, arg, count):
+        """Return [class, number, ...] from a near or within argument."""
+        argl = parse(arg)
+        if len(argl) == 0:
+            print("** class name missing **")
+        elif argl[0] not in classes:
+            print("** class doesn't exist **")
+        elif len(argl) < count + 1:
+            print("** coordinates missing **")
+        else:
+            try:
+                return [argl[0]] + [float(a) for a in argl[1:count + 1]]
+            except ValueError:
+                print("** invalid coordinates **")
+        return None
+
+    def __print_spatial(self, query, argl):
+        """Print the result of a spatial query on storage."""
+        try:
+            objs = query(storage, *argl)
+        except ValueError as err:
+            print("** {} **".format(err))
+            return
+        print([str(obj) for obj in objs])
+
+    def do_search(self, arg):
+        """Usage: search [<class>] <words> [limit=<n>] or
+       <class>.search(<words>)
+        Display the instances whose indexed texts (Review text, Place
+        description) hold any of the words, best matches first."""
+        argl = parse(arg)
+        cls = None
+        if len(argl) > 0 and argl[0] in classes:
+            cls = argl.pop(0)
+        limit = None
+        words = []
+        for word in argl:
+            if word.startswith("limit="):
+                if not word[6:].isdigit():
+                    print("** invalid option {} **".format(word))
+                    return False
+                limit = int(word[6:])
+            else:
+                words.append(word)
+        if len(words) == 0:
+            print("** words missing **")
+            return False
+        try:
+            objs = search(storage, " ".join(words), cls, limit)
+        except ValueError as err:
+            print("** {} **".format(err))
+            return False
+        print([str(obj) for obj in objs])
+
+    def do_having(self, arg):
+        """Usage: having <class> <attribute> <item> [<item> ...]
+       [match=any] or <class>.having(<attribute>, <item>, ...)
+        Display the instances whose list attribute (Place amenity_ids)
+        holds every item, or any of them with match=any."""
+        argl = parse(arg)
+        if len(argl) == 0:
+            print("** class name missing **")
+            return False
+        if argl[0] not in classes:
+            print("** class doesn't exist **")
+            return False
+        if len(argl) == 1:
+            print("** attribute name missing **")
+            return False
+        match_any = False
+        items = []
+        for item in argl[2:]:
+            if item.startswith("match="):
+                if item[6:] not in ("all", "any"):
+                    print("** invalid option {} **".format(item))
+                    return False
+                match_any = item[6:] == "any"
+            else:
+                items.append(item)
+        try:
+            objs = having(storage, argl[0], argl[1], items, match_any)
+        except ValueError as err:
+            print("** {} **".format(err))
+            return False
+        print([str(obj) for obj in objs])
+
+    def do_aggregate(self, arg):
+        """Usage: aggregate <class> <function>[=<attribute>] [by=<attribute>]
+       [<conditions>] or <class>.aggregate(<function>=<attribute>, ...)
+        Display the count, sum, avg, min or max of an attribute over the
+        instances matching the where conditions; with by, one line per
+        value of the grouping attribute."""
+        cls, _, text = arg.strip().partition(" ")
+        if cls == "":
+            print("** class name missing **")
+            return False
+        if cls not in classes:
+            print("** class doesn't exist **")
+            return False
+        match = re.match(r"\s*(\w+)(?:=(\w+))?[\s,]*", text)
+        if match is None or match.group(1) not in AGGREGATES:
+            print("** aggregate missing **")
+            return False
+        func, attr = match.groups()
+        try:
+            query = parse_where(cls, text[match.end():])
+        except ValueError as err:
+            print("** {} **".format(err))
+            return False
+        if query.order_by is not None or query.limit is not None:
+            print("** invalid option {} **".format(
+                "order_by" if query.order_by is not None else "limit"))
+            return False
+        by = None
+        conditions = []
+        for cond in query.conditions:
+            if cond.attr == "by" and cond.op == "=":
+                by = cond.value
+            else:
+                conditions.append(cond)
+        try:
+            if by is None:
+                print(aggregate(storage, cls, func, attr, None, conditions))
+                return
+            groups = aggregate_groups(storage, cls, func, attr, by,
+                                      conditions)
+            for i, (key, value) in enumerate(groups):
+                print("{}: {}".format(key, value), flush=i % 1000 == 0)
+        except ValueError as err:
+            print("** {} **".format(err))
+            return False
 
     def do_count(self, arg):
         """Usage: count <class> or <class>.count()
         Retrieve the number of instances of a given class."""
         argl = parse(arg)
-        count = 0
-        for obj in storage.all().values():
-            if argl[0] == obj.__class__.__name__:
-                count += 1
-        print(count)
+        print(len(storage.all(argl[0])))
 
     def do_update(self, arg):
         """Usage: update <class> <id> <attribute_name> <attribute_value> or
@@ -168,7 +391,7 @@ class HBNBCommand(cmd.Cmd):
         if len(argl) == 0:
             print("** class name missing **")
             return False
-        if argl[0] not in HBNBCommand.__classes:
+        if argl[0] not in classes:
             print("** class doesn't exist **")
             return False
         if len(argl) == 1:
@@ -182,28 +405,147 @@ class HBNBCommand(cmd.Cmd):
             return False
         if len(argl) == 3:
             try:
-                type(eval(argl[2])) != dict
-            except NameError:
+                literal_eval(argl[2])
+            except (ValueError, SyntaxError):
                 print("** value missing **")
                 return False
 
+        obj = objdict["{}.{}".format(argl[0], argl[1])]
         if len(argl) == 4:
-            obj = objdict["{}.{}".format(argl[0], argl[1])]
             if argl[2] in obj.__class__.__dict__.keys():
-                valtype = type(obj.__class__.__dict__[argl[2]])
-                obj.__dict__[argl[2]] = valtype(argl[3])
+                valtype = type(getattr(obj.__class__, argl[2]))
+                if valtype is list:
+                    try:
+                        value = literal_eval(argl[3])
+                    except (ValueError, SyntaxError):
+                        value = None
+                    if type(value) is not list:
+                        print("** value must be a list **")
+                        return False
+                    setattr(obj, argl[2], value)
+                else:
+                    setattr(obj, argl[2], valtype(argl[3]))
             else:
-                obj.__dict__[argl[2]] = argl[3]
-        elif type(eval(argl[2])) == dict:
-            obj = objdict["{}.{}".format(argl[0], argl[1])]
-            for k, v in eval(argl[2]).items():
+                setattr(obj, argl[2], argl[3])
+        elif type(literal_eval(argl[2])) == dict:
+            for k, v in literal_eval(argl[2]).items():
                 if (k in obj.__class__.__dict__.keys() and
-                        type(obj.__class__.__dict__[k]) in {str, int, float}):
-                    valtype = type(obj.__class__.__dict__[k])
-                    obj.__dict__[k] = valtype(v)
+                        type(getattr(obj.__class__, k)) in {str, int, float}):
+                    valtype = type(getattr(obj.__class__, k))
+                    setattr(obj, k, valtype(v))
                 else:
-                    obj.__dict__[k] = v
-        storage.save()
+                    setattr(obj, k, v)
+        try:
+            obj.save()
+        except PermissionError:
+            print("** storage is read-only **")
+
+    def do_begin(self, arg):
+        """Usage: begin
+        Defer saving the following commands until commit."""
+        try:
+            storage.begin()
+        except PermissionError:
+            print("** storage is read-only **")
+
+    def do_commit(self, arg):
+        """Usage: commit
+        Save every change made since begin in one pass."""
+        try:
+            storage.commit()
+        except PermissionError:
+            print("** storage is read-only **")
+
+    def do_bulk_import(self, arg):
+        """Usage: bulk_import <file> [<class>]
+        Add every record of a JSON Lines or CSV file (.csv) in one batch.
+        Records without a __class__ field are created as <class>."""
+        argl = parse(arg)
+        if len(argl) == 0:
+            print("** file missing **")
+            return False
+        if len(argl) > 1 and argl[1] not in classes:
+            print("** class doesn't exist **")
+            return False
+        start = time.perf_counter()
+        try:
+            count = bulk_import(argl[0], argl[1] if len(argl) > 1 else None)
+        except FileNotFoundError:
+            print("** file doesn't exist **")
+            return False
+        except PermissionError as err:
+            msg = err.strerror if err.filename else "storage is read-only"
+            print("** {} **".format(msg))
+            return False
+        except ValueError as err:
+            print("** {} **".format(err))
+            return False
+        elapsed = time.perf_counter() - start
+        print("{} objects imported in {:.3f}s ({:,.0f} rows/s)".format(
+            count, elapsed, count / elapsed if elapsed else 0))
+
+    def do_export(self, arg):
+        """Usage: export <file> [<class>] [<attribute>=<value> ...]
+        Write the matching instances to a JSON Lines or CSV file (.csv),
+        compressed with gzip if the file name ends with .gz."""
+        argl = parse(arg)
+        if len(argl) == 0:
+            print("** file missing **")
+            return False
+        cls = None
+        if len(argl) > 1 and "=" not in argl[1]:
+            cls = argl[1]
+            if cls not in classes:
+                print("** class doesn't exist **")
+                return False
+        attrs = {}
+        for pair in argl[2 if cls else 1:]:
+            k, sep, v = pair.partition("=")
+            if not sep or not k:
+                print("** filter must be <attribute>=<value> **")
+                return False
+            try:
+                attrs[k] = literal_eval(v)
+            except (ValueError, SyntaxError):
+                attrs[k] = v
+        start = time.perf_counter()
+        try:
+            count = export(argl[0], cls, **attrs)
+        except OSError as err:
+            print("** {} **".format(err.strerror))
+            return False
+        print("{} objects exported in {:.3f}s".format(
+            count, time.perf_counter() - start))
+
+    def do_migrate(self, arg):
+        """Usage: migrate <format>
+        Rewrite the storage file in the given format (json or jsonl)."""
+        argl = parse(arg)
+        if len(argl) == 0:
+            print("** format missing **")
+            return False
+        if not hasattr(storage, "migrate"):
+            print("** migrate needs the file storage **")
+            return False
+        try:
+            storage.migrate(argl[0])
+        except ValueError:
+            print("** format doesn't exist **")
+
+    def do_snapshot(self, arg):
+        """Usage: snapshot [<file>]
+        Write a read-only memory-mapped snapshot of every instance to the
+        file (default file.snapshot), for HBNB_TYPE_STORAGE=snapshot."""
+        argl = parse(arg)
+        start = time.perf_counter()
+        try:
+            count = write_snapshot(
+                storage, argl[0] if len(argl) > 0 else "file.snapshot")
+        except OSError as err:
+            print("** {} **".format(err.strerror))
+            return False
+        print("{} objects written in {:.3f}s".format(
+            count, time.perf_counter() - start))
 
 
 if __name__ == "__main__":
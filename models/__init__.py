@@ -1,7 +1,18 @@
 #!/usr/bin/python3
 """__init__ magic method for models directory"""
-from models.engine.file_storage import FileStorage
+from os import getenv
 
 
-storage = FileStorage()
+if getenv("HBNB_TYPE_STORAGE") == "db":
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage()
+elif getenv("HBNB_TYPE_STORAGE") == "columnar":
+    from models.engine.column_storage import ColumnStorage
+    storage = ColumnStorage()
+elif getenv("HBNB_TYPE_STORAGE") == "snapshot":
+    from models.engine.snapshot_storage import SnapshotStorage
+    storage = SnapshotStorage()
+else:
+    from models.engine.file_storage import FileStorage
+    storage = FileStorage()
 storage.reload()
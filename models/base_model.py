@@ -2,12 +2,314 @@
 # Defines the BaseModel class.
 
 import models
+import os
+from sys import intern
 from uuid import uuid4
 from datetime import datetime
 
+# Endings of the names of the attributes holding foreign keys or lists of them.
+ID_SUFFIXES = ("_id", "_ids")
 
-class BaseModel:
-    """Represents the BaseModel of the HBnB project."""
+# Names of BaseModel and of every subclass defined so far, mapped to the class.
+classes = {}
+
+
+def parse_datetime(value):
+    """Return the datetime of an ISO 8601 string written by isoformat().
+
+    datetime.fromisoformat() is tried first as it is several times faster
+    than strptime(), which remains the fallback for older values.
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f")
+
+
+def check_datetime(value):
+    """Return value if it looks like a string written by isoformat().
+
+    Used for the timestamps whose parsing is deferred: only the type and
+    the position of the date and time separator are checked.
+
+    Raises:
+        TypeError: If value is not a string.
+        ValueError: If value is too short or has no T separator.
+    """
+    if type(value) is not str:
+        raise TypeError("expected an ISO 8601 string, not {}".format(
+            type(value).__name__))
+    if len(value) < 19 or value[10] != "T":
+        raise ValueError("Invalid isoformat string: {!r}".format(value))
+    return value
+
+
+def intern_ids(name, value):
+    """Return value, interned if attribute name holds ids.
+
+    The id and the foreign keys (attributes ending in _id) are interned so
+    every object referring to an id shares one string; the string items
+    of a list of ids (attributes ending in _ids) are interned in place.
+    """
+    if type(value) is str:
+        if name == "id" or name.endswith(ID_SUFFIXES[0]):
+            return intern(value)
+    elif type(value) is list and name.endswith(ID_SUFFIXES[1]):
+        value[:] = [intern(item) if type(item) is str else item
+                    for item in value]
+    return value
+
+
+class Timestamp:
+    """Represent a datetime attribute that may hold its ISO string.
+
+    A string value is parsed the first time the attribute is read.
+
+    Attributes:
+        name (str): The name of the attribute.
+        member (member_descriptor): The slot holding the value on compact
+            model classes, or None to keep it in the instance __dict__.
+    """
+
+    member = None
+
+    def __set_name__(self, owner, name):
+        """Set the name of the attribute the descriptor manages."""
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        """Return the datetime of the attribute, parsing it if needed."""
+        if obj is None:
+            return self
+        if self.member is not None:
+            value = self.member.__get__(obj, objtype)
+            if type(value) is str:
+                value = parse_datetime(value)
+                self.member.__set__(obj, value)
+            return value
+        try:
+            value = obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+        if type(value) is str:
+            value = parse_datetime(value)
+            obj.__dict__[self.name] = value
+        return value
+
+    def __set__(self, obj, value):
+        """Set the attribute to a datetime or an ISO string."""
+        if self.member is not None:
+            self.member.__set__(obj, value)
+        else:
+            obj.__dict__[self.name] = value
+
+
+class TrackedList(list):
+    """Represent a list attribute whose changes in place reach storage.
+
+    The lists named in the _member_indexes tuple of a model class are kept
+    as TrackedLists, so that appending to one, or changing it in any other
+    way, sets it again on its instance: the instance is marked dirty and
+    the index of the attribute is updated. Reading the attribute while it
+    is unset returns a copy of the class default, set on the instance on
+    its first change.
+
+    Attributes:
+        owner (BaseModel): The instance holding the list, or None.
+        name (str): The name of the attribute.
+    """
+
+    __slots__ = ("owner", "name")
+
+    def __init__(self, items=(), owner=None, name=None):
+        """Initialize a new TrackedList."""
+        super().__init__(items)
+        self.owner = owner
+        self.name = name
+
+    def _changed(self):
+        """Set the list again on its instance."""
+        if self.owner is not None:
+            setattr(self.owner, self.name, self)
+
+
+def _tracked(method):
+    """Return a list method that reports the change to the instance."""
+    def changing(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._changed()
+        return result
+    changing.__name__ = method.__name__
+    changing.__doc__ = method.__doc__
+    return changing
+
+
+for _name in ("append", "extend", "insert", "remove", "pop", "clear",
+              "sort", "reverse", "__setitem__", "__delitem__", "__iadd__",
+              "__imul__"):
+    setattr(TrackedList, _name, _tracked(getattr(list, _name)))
+
+
+class MemberList:
+    """Represent the class default of a list attribute storage indexes.
+
+    Read on the class, it is the default list; read on an instance where
+    the attribute is unset, a TrackedList copy of it.
+
+    Attributes:
+        name (str): The name of the attribute.
+        default (list): The class default of the attribute.
+    """
+
+    def __init__(self, name, default):
+        """Initialize a new MemberList."""
+        self.name = name
+        self.default = default
+
+    def __get__(self, obj, objtype=None):
+        """Return the default, or a TrackedList of it for an instance."""
+        if obj is None:
+            return self.default
+        return TrackedList(self.default, obj, self.name)
+
+
+class Field:
+    """Represent a declared attribute of a compact model class.
+
+    The value is kept in a slot of the instance; while the slot is empty,
+    and when read on the class, the attribute is its class default.
+
+    Attributes:
+        member (member_descriptor): The slot holding the value.
+        default (any): The class default of the attribute.
+        tracked (bool): Whether an empty slot reads as a TrackedList of
+            the default (see MemberList).
+    """
+
+    tracked = False
+
+    def __init__(self, member, default):
+        """Initialize a new Field."""
+        self.member = member
+        self.default = default
+
+    def __get__(self, obj, objtype=None):
+        """Return the value of the slot, or the default if it is empty."""
+        if obj is None:
+            return self.default
+        try:
+            return self.member.__get__(obj, objtype)
+        except AttributeError:
+            if self.tracked:
+                return TrackedList(self.default, obj,
+                                   self.member.__name__)
+            return self.default
+
+    def __set__(self, obj, value):
+        """Set the value of the slot."""
+        self.member.__set__(obj, value)
+
+    def __delete__(self, obj):
+        """Empty the slot."""
+        self.member.__delete__(obj)
+
+
+class ModelType(type):
+    """Represent the type of the model classes.
+
+    In compact mode (HBNB_COMPACT_MODELS=1), the id, the timestamps and
+    the attributes declared with a str, int, float or list default are
+    kept in __slots__ instead of the instance __dict__, which is only
+    created for the attributes set beyond them. The defaults stay
+    readable on the class through Field descriptors.
+
+    Attributes:
+        __compact (bool): Whether model classes get slots.
+    """
+
+    __compact = os.getenv("HBNB_COMPACT_MODELS") == "1"
+
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        """Create a model class, moving its attributes to slots if compact.
+
+        The root model class also gets the __dict__ and __weakref__ slots
+        and the id slot.
+        """
+        if not ModelType.__compact or "__slots__" in namespace:
+            return super().__new__(mcs, name, bases, namespace, **kwargs)
+        fields = {}
+        for attr, value in list(namespace.items()):
+            if not attr.startswith("_") and (
+                    type(value) in (str, int, float, list, Timestamp)):
+                fields[attr] = namespace.pop(attr)
+        slots = tuple(fields)
+        if not any(isinstance(base, ModelType) for base in bases):
+            slots = ("__dict__", "__weakref__", "id") + slots
+        namespace["__slots__"] = slots
+        cls = super().__new__(mcs, name, bases, namespace, **kwargs)
+        members = [(attr, cls.__dict__[attr]) for attr in slots
+                   if attr not in fields and not attr.startswith("__")]
+        for attr, value in fields.items():
+            member = cls.__dict__[attr]
+            if type(value) is Timestamp:
+                value.member = member
+                setattr(cls, attr, value)
+            else:
+                field = Field(member, value)
+                field.tracked = attr in cls._member_indexes
+                setattr(cls, attr, field)
+            members.append((attr, member))
+        cls._slots = getattr(cls, "_slots", ()) + tuple(members)
+        return cls
+
+
+class BaseModel(metaclass=ModelType):
+    """Represents the BaseModel of the HBnB project.
+
+    Attributes:
+        created_at (Timestamp): The datetime the instance was created.
+        updated_at (Timestamp): The datetime the instance was last saved.
+        _indexes (tuple): Names of the attributes storage indexes for find().
+        _range_indexes (tuple): Names of the numeric attributes storage keeps
+            sorted for range queries.
+        _geo_index (tuple): Names of the latitude and longitude attributes
+            storage keeps in a grid for spatial queries, or ().
+        _text_indexes (tuple): Names of the text attributes storage keeps in
+            an inverted index for searches.
+        _member_indexes (tuple): Names of the list attributes storage
+            indexes by element for membership queries.
+        _indexed (frozenset): Names of every attribute storage indexes,
+            set on each model class.
+        _slots (tuple): The (name, slot) pairs of the attributes of a
+            compact model class and its bases, or () (see ModelType).
+        __dirty (dict): Instances changed since the last save, mapped to
+            True if they were deleted from storage.
+        __lazy_timestamps (bool): Whether timestamps passed as kwargs are
+            kept as strings until read (HBNB_LAZY_TIMESTAMPS=1).
+    """
+
+    created_at = Timestamp()
+    updated_at = Timestamp()
+    _indexes = ()
+    _range_indexes = ()
+    _geo_index = ()
+    _text_indexes = ()
+    _member_indexes = ()
+    _indexed = frozenset()
+    _slots = ()
+    __dirty = {}
+    __lazy_timestamps = os.getenv("HBNB_LAZY_TIMESTAMPS") == "1"
+
+    def __init_subclass__(cls, **kwargs):
+        """Register a new model class in the classes registry."""
+        super().__init_subclass__(**kwargs)
+        cls._indexed = frozenset(cls._indexes + cls._range_indexes +
+                                 cls._geo_index + cls._text_indexes +
+                                 cls._member_indexes)
+        for attr in cls._member_indexes:
+            if type(cls.__dict__.get(attr)) is list:
+                setattr(cls, attr, MemberList(attr, cls.__dict__[attr]))
+        classes[cls.__name__] = cls
 
     def __init__(self, *args, **kwargs):
         """Initialize a new BaseModel.
@@ -16,19 +318,111 @@ class BaseModel:
             *args (any): Unused.
             **kwargs (dict): Key/value pairs of attributes.
         """
-        tform = "%Y-%m-%dT%H:%M:%S.%f"
-        self.id = str(uuid4())
-        self.created_at = datetime.today()
-        self.updated_at = datetime.today()
-        if len(kwargs) != 0:
+        if len(kwargs) != 0 and self._slots:
+            self.__init_slots(kwargs)
+        elif len(kwargs) != 0:
+            odict = self.__dict__
             for k, v in kwargs.items():
                 if k == "created_at" or k == "updated_at":
-                    self.__dict__[k] = datetime.strptime(v, tform)
-                else:
-                    self.__dict__[k] = v
+                    if not BaseModel.__lazy_timestamps:
+                        v = parse_datetime(v)
+                    else:
+                        v = check_datetime(v)
+                elif k == "id" or k.endswith(ID_SUFFIXES):
+                    v = intern_ids(k, v)
+                odict[k] = v
+            for k in self._member_indexes:
+                if type(odict.get(k)) is list:
+                    odict[k] = TrackedList(odict[k], self, k)
+            if "id" not in odict:
+                odict["id"] = intern(str(uuid4()))
+            if "created_at" not in odict:
+                odict["created_at"] = datetime.today()
+            if "updated_at" not in odict:
+                odict["updated_at"] = datetime.today()
         else:
+            self.id = intern(str(uuid4()))
+            self.created_at = datetime.today()
+            self.updated_at = datetime.today()
             models.storage.new(self)
 
+    def __init_slots(self, kwargs):
+        """Set the attributes of a compact instance from kwargs.
+
+        A __class__ key, as written by to_dict(), is skipped.
+        """
+        setter = object.__setattr__
+        for k, v in kwargs.items():
+            if k == "__class__":
+                continue
+            if k == "created_at" or k == "updated_at":
+                if not BaseModel.__lazy_timestamps:
+                    v = parse_datetime(v)
+                else:
+                    v = check_datetime(v)
+            elif k == "id" or k.endswith(ID_SUFFIXES):
+                v = intern_ids(k, v)
+            if type(v) is list and k in self._member_indexes:
+                v = TrackedList(v, self, k)
+            setter(self, k, v)
+        if "id" not in kwargs:
+            setter(self, "id", intern(str(uuid4())))
+        if "created_at" not in kwargs:
+            setter(self, "created_at", datetime.today())
+        if "updated_at" not in kwargs:
+            setter(self, "updated_at", datetime.today())
+
+    def __values(self):
+        """Return the dictionary of the attributes set on the instance."""
+        if not self._slots:
+            return self.__dict__
+        values = {}
+        for name, member in self._slots:
+            try:
+                values[name] = member.__get__(self)
+            except AttributeError:
+                pass
+        values.update(self.__dict__)
+        return values
+
+    def __setattr__(self, name, value):
+        """Set the attribute name to value and mark the instance dirty.
+
+        Ids are interned (see intern_ids), lists storage indexes by item
+        are kept as TrackedLists and changes to indexed attributes are
+        reported to storage.
+        """
+        value = intern_ids(name, value)
+        if name in self._member_indexes and isinstance(value, list) and \
+                getattr(value, "owner", None) is not self:
+            value = TrackedList(value, self, name)
+        if name in self._indexed:
+            old = getattr(self, name, None)
+            super().__setattr__(name, value)
+            models.storage.reindex(self, name, old)
+        else:
+            super().__setattr__(name, value)
+        BaseModel.__dirty.setdefault(self, False)
+
+    def mark_dirty(self, deleted=False):
+        """Mark the instance as changed since the last save.
+
+        Args:
+            deleted (bool): Whether the instance was removed from storage.
+        """
+        BaseModel.__dirty[self] = deleted
+
+    @staticmethod
+    def pop_dirty():
+        """Return the instances changed since the last call and reset them.
+
+        Returns:
+            dict: The dirty instances mapped to True if they were deleted.
+        """
+        dirty = BaseModel.__dirty
+        BaseModel.__dirty = {}
+        return dirty
+
     def save(self):
         """Update updated_at with the current datetime."""
         self.updated_at = datetime.today()
@@ -40,13 +434,19 @@ class BaseModel:
         Includes the key/value pair __class__ representing
         the class name of the object.
         """
-        rdict = self.__dict__.copy()
-        rdict["created_at"] = self.created_at.isoformat()
-        rdict["updated_at"] = self.updated_at.isoformat()
+        rdict = self.__values().copy()
+        for k in ("created_at", "updated_at"):
+            if type(rdict[k]) is not str:
+                rdict[k] = rdict[k].isoformat()
         rdict["__class__"] = self.__class__.__name__
         return rdict
 
     def __str__(self):
         """Return the print/str representation of the BaseModel instance."""
+        for k in ("created_at", "updated_at"):
+            getattr(self, k)  # parses a timestamp still held as a string
         clname = self.__class__.__name__
-        return "[{}] ({}) {}".format(clname, self.id, self.__dict__)
+        return "[{}] ({}) {}".format(clname, self.id, self.__values())
+
+
+classes["BaseModel"] = BaseModel
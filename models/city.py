@@ -11,5 +11,7 @@ class City(BaseModel):
         name (str): The name of the city.
     """
 
+    _indexes = ("state_id",)
+
     state_id = ""
     name = ""
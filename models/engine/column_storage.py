@@ -0,0 +1,692 @@
+#!/usr/bin/python3
+"""Defines the ColumnStorage class."""
+import json
+import operator
+import os
+import weakref
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import compress, repeat
+from sys import intern
+from models.base_model import BaseModel, classes, parse_datetime
+from models.engine.common import ColumnIndex, Table, iter_items
+from models.engine.transfer import attribute_types
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+from models.amenity import Amenity
+from models.review import Review
+
+# The origin of the microsecond counts of the timestamp columns.
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+# The functions comparing a column value to the value of a condition.
+_OPERATORS = {"=": operator.eq, "!=": operator.ne, "<": operator.lt,
+              "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+class Column:
+    """Represent the values of one attribute of the objects of a class.
+
+    Int and float columns are arrays and timestamp columns arrays of
+    microseconds since 1970; other columns are lists, whose strings are
+    interned for the ids and foreign keys (names ending with id or ids).
+    A value that does not fit the array, like a string in an int column,
+    is kept in odd, the array holding the default in its row. Rows where
+    the attribute is unset hold the default too, with a 0 in isset.
+
+    Attributes:
+        name (str): The name of the attribute.
+        kind (type): int, float, str, list, or datetime for a timestamp.
+        default (any): The class default of the attribute.
+        values (array or list): The value of each row.
+        odd (dict): Rows mapped to their value that does not fit values.
+        isset (bytearray): 1 for each row where the attribute is set.
+    """
+
+    def __init__(self, name, kind, default):
+        """Initialize a new Column.
+
+        Args:
+            name (str): The name of the attribute.
+            kind (type): The type of the values.
+            default (any): The class default of the attribute.
+        """
+        self.name = name
+        self.kind = kind
+        self.default = default
+        if kind is int or kind is datetime:
+            self.values = array("q")
+        elif kind is float:
+            self.values = array("d")
+        else:
+            self.values = []
+        self.odd = {}
+        self.isset = bytearray()
+        self.__blank = 0 if kind is datetime else default
+        self.__intern = name.endswith(("id", "ids"))
+
+    def __len__(self):
+        """Return the number of rows."""
+        return len(self.isset)
+
+    def append(self):
+        """Add a row where the attribute is unset."""
+        self.values.append(self.__blank)
+        self.isset.append(0)
+
+    def set(self, row, value):
+        """Set the value of a row."""
+        self.isset[row] = 1
+        self.odd.pop(row, None)
+        kind = self.kind
+        if kind is datetime:
+            if type(value) is str:
+                try:
+                    value = parse_datetime(value)
+                except ValueError:
+                    pass
+            if type(value) is datetime and value.tzinfo is None:
+                self.values[row] = (value - _EPOCH) // _MICROSECOND
+                return
+        elif kind is int or kind is float:
+            if type(value) is kind:
+                try:
+                    self.values[row] = value
+                    return
+                except OverflowError:
+                    pass
+        else:
+            if self.__intern:
+                if type(value) is str:
+                    value = intern(value)
+                elif isinstance(value, list):
+                    value = [intern(item) if type(item) is str else item
+                             for item in value]
+            self.values[row] = value
+            return
+        self.values[row] = self.__blank
+        self.odd[row] = value
+
+    def unset(self, row):
+        """Unset the attribute of a row."""
+        self.values[row] = self.__blank
+        self.isset[row] = 0
+        self.odd.pop(row, None)
+
+    def get(self, row):
+        """Return the value of a row, the default if it is unset."""
+        if row in self.odd:
+            return self.odd[row]
+        value = self.values[row]
+        if self.kind is datetime:
+            return _EPOCH + value * _MICROSECOND
+        return value
+
+    def move(self, src, dst):
+        """Copy the row src over the row dst."""
+        self.values[dst] = self.values[src]
+        self.isset[dst] = self.isset[src]
+        if src in self.odd:
+            self.odd[dst] = self.odd[src]
+        else:
+            self.odd.pop(dst, None)
+
+    def pop(self):
+        """Remove the last row."""
+        self.values.pop()
+        self.isset.pop()
+        self.odd.pop(len(self.isset), None)
+
+    def sequence(self):
+        """Return the values of the rows as read on the objects.
+
+        The values themselves are returned when no row is odd and the
+        column is not a timestamp, so reading them copies nothing.
+        """
+        values = self.values
+        if self.kind is datetime:
+            values = [_EPOCH + value * _MICROSECOND for value in values]
+        elif self.odd:
+            values = list(values)
+        for row, value in self.odd.items():
+            values[row] = value
+        return values
+
+    def mask(self, op, value):
+        """Return a list holding True for the rows matching op value.
+
+        Comparisons run over the whole column at once; a column whose
+        values cannot be compared to value is checked row by row, the
+        rows that fail the comparison not matching.
+
+        Args:
+            op (str): One of =, !=, <, <=, >, >= and in.
+            value (any): The value compared to, a list for in.
+        """
+        values = self.values
+        if self.kind is datetime and type(value) is datetime and \
+                value.tzinfo is None:
+            value = (value - _EPOCH) // _MICROSECOND
+        elif self.kind is datetime or self.odd:
+            values = self.sequence()
+        try:
+            if op == "in":
+                found = list(map(set(value).__contains__, values))
+            else:
+                found = list(map(_OPERATORS[op], values, repeat(value)))
+        except TypeError:
+            found = [_compare(op, item, value) for item in values]
+        if values is self.values:
+            for row, item in self.odd.items():
+                found[row] = _compare(op, item, value)
+        return found
+
+
+def _compare(op, item, value):
+    """Return the result of item op value, or False if it fails."""
+    try:
+        if op == "in":
+            return item in value
+        return bool(_OPERATORS[op](item, value))
+    except TypeError:
+        return False
+
+
+class ColumnTable:
+    """Represent the stored objects of a class as columns.
+
+    Attributes:
+        cls_name (str): The class of the objects.
+        ids (list): The interned id of each row.
+        rows (dict): Ids mapped to their row.
+        columns (dict): Attribute names mapped to their Column: the
+            timestamps and the attributes declared by the class.
+        extra (dict): Rows mapped to the dictionary of their other
+            attributes.
+    """
+
+    def __init__(self, cls_name):
+        """Initialize a new ColumnTable.
+
+        Args:
+            cls_name (str): The class of the objects.
+        """
+        cls = classes[cls_name]
+        self.cls_name = cls_name
+        self.ids = []
+        self.rows = {}
+        self.columns = {"created_at": Column("created_at", datetime, None),
+                        "updated_at": Column("updated_at", datetime, None)}
+        for attr, kind in attribute_types(cls).items():
+            self.columns[attr] = Column(attr, kind, getattr(cls, attr))
+        self.extra = {}
+
+    def __len__(self):
+        """Return the number of rows."""
+        return len(self.ids)
+
+    def put(self, record):
+        """Store a record shaped like to_dict(), replacing its row if any.
+
+        Returns:
+            int: The row of the record.
+        """
+        oid = intern(record["id"])
+        row = self.rows.get(oid)
+        if row is None:
+            row = len(self.ids)
+            self.ids.append(oid)
+            self.rows[oid] = row
+            for column in self.columns.values():
+                column.append()
+        else:
+            for column in self.columns.values():
+                column.unset(row)
+        extra = {}
+        for attr, value in record.items():
+            column = self.columns.get(attr)
+            if column is not None:
+                column.set(row, value)
+            elif attr != "id" and attr != "__class__":
+                extra[attr] = value
+        if extra:
+            self.extra[row] = extra
+        else:
+            self.extra.pop(row, None)
+        return row
+
+    def remove(self, oid):
+        """Remove the row of an id, moving the last row in its place."""
+        row = self.rows.pop(oid, None)
+        if row is None:
+            return
+        last = len(self.ids) - 1
+        if row != last:
+            moved = self.ids[last]
+            self.ids[row] = moved
+            self.rows[moved] = row
+            for column in self.columns.values():
+                column.move(last, row)
+            if last in self.extra:
+                self.extra[row] = self.extra[last]
+            else:
+                self.extra.pop(row, None)
+        self.ids.pop()
+        for column in self.columns.values():
+            column.pop()
+        self.extra.pop(last, None)
+
+    def record(self, row):
+        """Return the to_dict() dictionary of the object of a row."""
+        record = {"id": self.ids[row]}
+        for attr, column in self.columns.items():
+            if column.isset[row]:
+                value = column.get(row)
+                if type(value) is datetime:
+                    value = value.isoformat()
+                record[attr] = value
+        record.update(self.extra.get(row, ()))
+        record["__class__"] = self.cls_name
+        return record
+
+    def mask(self, attr, op, value):
+        """Return a list holding True for the rows where attr op value.
+
+        Attributes without a column are read from extra, None standing
+        for an unset one.
+        """
+        column = self.columns.get(attr)
+        if attr == "id":
+            column = Column("id", str, "")
+            column.values = self.ids
+            column.isset = bytearray(b"\x01") * len(self.ids)
+        if column is not None:
+            return column.mask(op, value)
+        found = [False] * len(self.ids)
+        if value is None and op in ("=", "!=", "in"):
+            found = [_compare(op, None, value)] * len(self.ids)
+        for row, extra in self.extra.items():
+            found[row] = _compare(op, extra.get(attr), value)
+        return found
+
+
+class ColumnStorage:
+    """Represent an in-memory storage engine keeping each class in columns.
+
+    The objects of every class are kept in a ColumnTable, read from and
+    saved to the same file as FileStorage, in either of its layouts
+    ("json", or "jsonl" with HBNB_STORAGE_FORMAT=jsonl); its journal is
+    not read. Instances are only built when they are read, and are then
+    tracked in an identity map; the changes reported by
+    BaseModel.pop_dirty() are written back to the columns before every
+    read. rows() and aggregate() filter and aggregate whole columns
+    without building the objects.
+
+    Attributes:
+        __file_path (str): The name of the file to save objects to.
+        __format (str): The layout save() writes, "json" or "jsonl".
+        __tables (dict): Class names mapped to their ColumnTable.
+        __objects (WeakValueDictionary): Built objects by key.
+        __batch (int): Number of begin() calls not committed yet.
+    """
+
+    def __init__(self):
+        """Initialize a new ColumnStorage."""
+        self.__file_path = "file.json"
+        self.__format = os.getenv("HBNB_STORAGE_FORMAT", "json")
+        self.__tables = {}
+        self.__objects = weakref.WeakValueDictionary()
+        self.__batch = 0
+
+    def all(self, cls=None):
+        """Return a dictionary of the objects, or of the objects of a class.
+
+        Args:
+            cls (type or str): The class, or class name, to return.
+        """
+        if cls is not None and not isinstance(cls, str):
+            cls = cls.__name__
+        return Table(self, cls)
+
+    def get(self, cls, id):
+        """Return the object of a class with the given id, or None.
+
+        Args:
+            cls (type or str): The class, or class name, of the object.
+            id (str): The id of the object.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if cls not in classes:
+            return None
+        self.__flush()
+        table = self.table(cls)
+        row = table.rows.get(id)
+        return self.__build(table, row) if row is not None else None
+
+    def count(self, cls=None):
+        """Return the number of objects, or of objects of a class.
+
+        Args:
+            cls (type or str): The class, or class name, to count.
+        """
+        if cls is not None and not isinstance(cls, str):
+            cls = cls.__name__
+        if cls is not None and cls not in classes:
+            return 0
+        self.__flush()
+        return sum(len(self.table(name))
+                   for name in ([cls] if cls else classes))
+
+    def scan(self, cls=None):
+        """Yield the objects of a class, or of every class, one at a time.
+
+        Args:
+            cls (type or str): The class, or class name, to read.
+        """
+        if cls is not None and not isinstance(cls, str):
+            cls = cls.__name__
+        if cls is not None and cls not in classes:
+            return
+        self.__flush()
+        for name in [cls] if cls else list(classes):
+            table = self.table(name)
+            for oid in list(table.ids):
+                row = table.rows.get(oid)
+                if row is not None:
+                    yield self.__build(table, row)
+
+    def find(self, cls, **attrs):
+        """Return the objects of a class whose attributes match attrs.
+
+        Args:
+            cls (type or str): The class, or class name, to search.
+            **attrs: Attribute names mapped to the value to match.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if cls not in classes:
+            return []
+        return self.objects(cls, self.rows(
+            cls, [(attr, "=", value) for attr, value in attrs.items()]))
+
+    def index(self, cls, attr):
+        """Return the index of an attribute of a class, or None.
+
+        The attributes named in the _indexes tuple of the class are looked
+        up with find().
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            attr (str): The name of the attribute.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if cls not in classes or attr not in classes[cls]._indexes:
+            return None
+        return ColumnIndex(self, cls, attr)
+
+    def table(self, cls):
+        """Return the ColumnTable of a class, creating it if needed.
+
+        The changes not written back yet are not in the table; rows() and
+        aggregate() write them first.
+
+        Args:
+            cls (type or str): The class, or class name, of the table.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        table = self.__tables.get(cls)
+        if table is None:
+            table = self.__tables[cls] = ColumnTable(cls)
+        return table
+
+    def rows(self, cls, conditions=()):
+        """Return the rows of the objects of a class matching conditions.
+
+        Each condition is checked over a whole column at once.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            conditions (iterable): (attribute, operator, value) triples,
+                or objects with attr, op and value attributes, such as
+                query.Condition; the operators are =, !=, <, <=, >, >=
+                and in.
+        Raises:
+            ValueError: If an operator is unknown.
+        """
+        self.__flush()
+        table = self.table(cls)
+        found = None
+        for cond in conditions:
+            if not isinstance(cond, tuple):
+                cond = (cond.attr, cond.op, cond.value)
+            if cond[1] not in _OPERATORS and cond[1] != "in":
+                raise ValueError("unknown operator {}".format(cond[1]))
+            mask = table.mask(*cond)
+            found = mask if found is None else list(
+                map(operator.and_, found, mask))
+        if found is None:
+            return range(len(table))
+        return list(compress(range(len(table)), found))
+
+    def objects(self, cls, rows):
+        """Return the objects of some rows of the table of a class."""
+        table = self.table(cls)
+        return [self.__build(table, row) for row in rows]
+
+    def aggregate(self, cls, func, attr=None, by=None, conditions=()):
+        """Return an aggregate of a column over the matching objects.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            func (str): "count", "sum", "avg", "min" or "max".
+            attr (str): The aggregated attribute, an int or float column;
+                unused for count. Values that are not numbers are left
+                out.
+            by (str): An attribute to group the objects by, or None.
+            conditions (iterable): The conditions of rows().
+        Returns:
+            The aggregate, None for the avg, min or max of no value; with
+            by, a dictionary of the values of by mapped to the aggregate
+            of their objects.
+        Raises:
+            ValueError: If func is unknown or attr is not a number column.
+        """
+        if func not in ("count", "sum", "avg", "min", "max"):
+            raise ValueError("unknown aggregate {}".format(func))
+        table = self.table(cls)
+        rows = self.rows(cls, conditions)
+        values = None
+        if func != "count":
+            column = table.columns.get(attr)
+            if column is None or column.kind not in (int, float):
+                raise ValueError("{} is not a number column".format(attr))
+            values = column.values
+            if column.odd:
+                values = column.sequence()
+                rows = [row for row in rows
+                        if type(values[row]) in (int, float, bool)]
+        if by is None:
+            return _aggregate(func, values, rows)
+        if by in table.columns:
+            keys = table.columns[by].sequence()
+        elif by == "id":
+            keys = table.ids
+        else:
+            keys = [table.extra.get(row, {}).get(by)
+                    for row in range(len(table))]
+        if func == "count":
+            return dict(Counter(map(keys.__getitem__, rows)))
+        groups = {}
+        for row in rows:
+            group = groups.get(keys[row])
+            if group is None:
+                groups[keys[row]] = [row]
+            else:
+                group.append(row)
+        return {key: _aggregate(func, values, group)
+                for key, group in groups.items()}
+
+    def new(self, obj):
+        """Add obj to the objects written back on the next read."""
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        self.__objects[key] = obj
+        obj.mark_dirty()
+
+    def delete(self, obj=None):
+        """Delete obj from the columns if it is inside."""
+        if obj is None:
+            return
+        self.__flush()
+        ocname = obj.__class__.__name__
+        self.table(ocname).remove(obj.id)
+        self.__objects.pop("{}.{}".format(ocname, obj.id), None)
+
+    def reindex(self, obj, attr, old):
+        """Do nothing: changes are written back to the columns on read."""
+        pass
+
+    def save(self):
+        """Write the changes back and serialize the columns to the file.
+
+        Nothing is written while a batch is open.
+        """
+        self.__flush()
+        if self.__batch > 0:
+            return
+        tmp_path = self.__file_path + ".tmp"
+        jsonl = self.__format == "jsonl"
+        with open(tmp_path, "w") as f:
+            sep = ""
+            if not jsonl:
+                f.write("{")
+            for name, table in self.__tables.items():
+                for row in range(len(table)):
+                    text = json.dumps(table.record(row))
+                    if jsonl:
+                        f.write(text + "\n")
+                    else:
+                        f.write("{}{}: {}".format(sep, json.dumps(
+                            "{}.{}".format(name, table.ids[row])), text))
+                        sep = ", "
+            if not jsonl:
+                f.write("}")
+        os.replace(tmp_path, self.__file_path)
+
+    def begin(self):
+        """Open a batch: save() is deferred until the matching commit()."""
+        self.__batch += 1
+
+    def commit(self):
+        """Close a batch, saving its changes once the outermost is closed."""
+        self.__batch = max(0, self.__batch - 1)
+        self.save()
+
+    def migrate(self, fmt):
+        """Rewrite the file in the format fmt and keep using it.
+
+        Args:
+            fmt (str): The new format, "json" or "jsonl".
+        Raises:
+            ValueError: If fmt is not a known format.
+        """
+        if fmt not in ("json", "jsonl"):
+            raise ValueError("unknown storage format: {}".format(fmt))
+        self.__format = fmt
+        self.save()
+
+    def rollback(self):
+        """Discard the changes not saved yet and close every batch.
+
+        The columns are read back from the file; objects built before may
+        hold discarded changes, so later reads return fresh objects.
+        """
+        self.__batch = 0
+        self.reload()
+
+    @contextmanager
+    def transaction(self):
+        """Return a context manager running its block in a batch.
+
+        The changes are saved in one pass when the block exits normally
+        and rolled back if it raises.
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def reload(self):
+        """Read the file into empty columns, if it exists."""
+        self.__tables = {}
+        self.__objects = weakref.WeakValueDictionary()
+        BaseModel.pop_dirty()
+        try:
+            with open(self.__file_path) as f:
+                items = iter_items(f, 65536)
+                first = next(items, None)
+                if first is not None and isinstance(first[1], dict):
+                    self.__put(first[1])
+                    for key, o, text, start in items:
+                        self.__put(o)
+                elif first is not None:
+                    f.seek(0)
+                    for line in f:
+                        if line.strip():
+                            self.__put(json.loads(line))
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        """Save the changes."""
+        self.save()
+
+    def __put(self, record):
+        """Store a record read from the file in the table of its class."""
+        cls_name = record.get("__class__")
+        if cls_name in classes:
+            self.table(cls_name).put(record)
+
+    def __flush(self):
+        """Write the objects changed since the last flush to the columns."""
+        for obj, deleted in BaseModel.pop_dirty().items():
+            ocname = obj.__class__.__name__
+            key = "{}.{}".format(ocname, obj.id)
+            if deleted or self.__objects.get(key) is not obj:
+                continue
+            self.table(ocname).put(obj.to_dict())
+
+    def __build(self, table, row):
+        """Return the object of a row, from the identity map if built."""
+        key = "{}.{}".format(table.cls_name, table.ids[row])
+        obj = self.__objects.get(key)
+        if obj is None:
+            record = table.record(row)
+            del record["__class__"]
+            obj = classes[table.cls_name](**record)
+            self.__objects[key] = obj
+        return obj
+
+
+def _aggregate(func, values, rows):
+    """Return the aggregate func of the values of some rows."""
+    if func == "count":
+        return len(rows)
+    if func == "sum":
+        return sum(map(values.__getitem__, rows))
+    if len(rows) == 0:
+        return None
+    if func == "avg":
+        return sum(map(values.__getitem__, rows)) / len(rows)
+    if func == "min":
+        return min(map(values.__getitem__, rows))
+    return max(map(values.__getitem__, rows))
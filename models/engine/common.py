@@ -0,0 +1,177 @@
+#!/usr/bin/python3
+"""Defines the helpers shared by the storage engines: the mapping view of
+the stored objects, the index of an attribute answered by find(), and the
+incremental reader of a JSON object file."""
+import json
+from collections.abc import ItemsView, MutableMapping, ValuesView
+
+
+def iter_items(f, chunk_size):
+    """Yield the key, value, value text and its offset of the JSON object
+    in file f.
+
+    The file is read chunk_size characters at a time and each value is
+    decoded on its own, so the whole document is never held in memory.
+    The offset counts the characters before the value text.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    base = 0
+    pos = 0
+    eof = False
+
+    def read():
+        nonlocal buf, base, pos, eof
+        chunk = f.read(chunk_size)
+        eof = chunk == ""
+        base += pos
+        buf = buf[pos:] + chunk
+        pos = 0
+        return not eof
+
+    def peek():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\n\r":
+                pos += 1
+            if pos < len(buf) or not read():
+                return buf[pos:pos + 1]
+
+    def decode():
+        nonlocal pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                if end < len(buf) or eof:
+                    text = buf[pos:end]
+                    pos = end
+                    return value, text
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            read()
+
+    def expect(chars):
+        nonlocal pos
+        char = peek()
+        if char == "" or char not in chars:
+            raise json.JSONDecodeError(
+                "Expecting one of {!r}".format(chars), buf, pos)
+        pos += 1
+        return char
+
+    if peek() == "":
+        return
+    expect("{")
+    if peek() == "}":
+        return
+    while True:
+        peek()
+        key = decode()[0]
+        expect(":")
+        peek()
+        start = base + pos
+        value, text = decode()
+        yield key, value, text, start
+        if expect(",}") == "}":
+            return
+
+
+class Table(MutableMapping):
+    """Represent stored objects as a dictionary keyed <class name>.id.
+
+    Lookups, membership tests and iteration are answered by queries, so
+    the objects are never all loaded at once.
+
+    Attributes:
+        storage (DBStorage, ColumnStorage or SnapshotStorage): The storage
+            engine queried.
+        cls_name (str): The class of the objects, or None for all classes.
+    """
+
+    def __init__(self, storage, cls_name=None):
+        """Initialize a new Table."""
+        self.storage = storage
+        self.cls_name = cls_name
+
+    def __getitem__(self, key):
+        """Return the object stored under key."""
+        cls_name, _, oid = key.partition(".")
+        obj = None
+        if self.cls_name in (None, cls_name):
+            obj = self.storage.get(cls_name, oid)
+        if obj is None:
+            raise KeyError(key)
+        return obj
+
+    def __setitem__(self, key, obj):
+        """Store obj."""
+        self.storage.new(obj)
+
+    def __delitem__(self, key):
+        """Delete the object stored under key."""
+        self.storage.delete(self[key])
+
+    def __contains__(self, key):
+        """Return True if an object is stored under key."""
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        """Iterate over the keys of the objects."""
+        for obj in self.storage.scan(self.cls_name):
+            yield "{}.{}".format(obj.__class__.__name__, obj.id)
+
+    def __len__(self):
+        """Return the number of objects."""
+        return self.storage.count(self.cls_name)
+
+    def values(self):
+        """Return a view of the objects."""
+        return TableValues(self)
+
+    def items(self):
+        """Return a view of the keys and objects."""
+        return TableItems(self)
+
+
+class TableValues(ValuesView):
+    """Represent the objects of a Table, read with one query."""
+
+    def __iter__(self):
+        """Iterate over the objects."""
+        return self._mapping.storage.scan(self._mapping.cls_name)
+
+
+class TableItems(ItemsView):
+    """Represent the keys and objects of a Table, read with one query."""
+
+    def __iter__(self):
+        """Iterate over the (key, object) pairs."""
+        for obj in self._mapping.storage.scan(self._mapping.cls_name):
+            yield "{}.{}".format(obj.__class__.__name__, obj.id), obj
+
+
+class ColumnIndex:
+    """Represent the find() results of an attribute as an AttributeIndex.
+
+    Attributes:
+        storage (DBStorage or ColumnStorage): The storage engine queried.
+        cls_name (str): The class of the objects.
+        attr (str): The name of the indexed attribute.
+    """
+
+    def __init__(self, storage, cls_name, attr):
+        """Initialize a new ColumnIndex."""
+        self.storage = storage
+        self.cls_name = cls_name
+        self.attr = attr
+
+    def get(self, value):
+        """Return the dictionary of objects whose attribute equals value."""
+        return {"{}.{}".format(self.cls_name, obj.id): obj
+                for obj in self.storage.find(self.cls_name,
+                                             **{self.attr: value})}
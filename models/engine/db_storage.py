@@ -0,0 +1,339 @@
+#!/usr/bin/python3
+"""Defines the DBStorage class."""
+import json
+import os
+import sqlite3
+import weakref
+from contextlib import contextmanager
+from models.base_model import BaseModel, classes
+from models.engine.common import ColumnIndex, Table
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+from models.amenity import Amenity
+from models.review import Review
+
+
+class DBStorage:
+    """Represent a SQLite storage engine.
+
+    Every model class is stored in a table of the same name with one column
+    per class attribute, the attributes named in its _indexes tuple being
+    indexed; other instance attributes go to a JSON "extra" column. The
+    columns have no type affinity, and the values they would not give back
+    with the same type go to the extra column too, so objects read back
+    hold the types they were saved with. Loaded
+    objects are tracked in an identity map. Changes reported by
+    BaseModel.pop_dirty() are written in the open transaction before every
+    query and committed by save(), or by the outermost commit() when a
+    batch was opened with begin() or transaction().
+
+    Attributes:
+        __db_path (str): The SQLite database file (HBNB_DB_PATH).
+        __conn (sqlite3.Connection): The database connection.
+        __objects (WeakValueDictionary): Loaded objects by key.
+        __columns (dict): Class names mapped to their columns and types.
+        __batch (int): Number of begin() calls not committed yet.
+    """
+
+    def __init__(self):
+        """Initialize a new DBStorage."""
+        self.__db_path = os.getenv("HBNB_DB_PATH", "hbnb.db")
+        self.__conn = None
+        self.__objects = weakref.WeakValueDictionary()
+        self.__columns = {}
+        self.__batch = 0
+
+    def all(self, cls=None):
+        """Return a dictionary of the objects, or of the objects of a class.
+
+        Args:
+            cls (type or str): The class, or class name, to return.
+        """
+        if cls is not None and not isinstance(cls, str):
+            cls = cls.__name__
+        return Table(self, cls)
+
+    def get(self, cls, id):
+        """Return the object of a class with the given id, or None.
+
+        Args:
+            cls (type or str): The class, or class name, of the object.
+            id (str): The id of the object.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if cls not in classes:
+            return None
+        obj = self.__objects.get("{}.{}".format(cls, id))
+        if obj is not None:
+            return obj
+        self.__flush()
+        row = self.__conn.execute(
+            "{} WHERE id = ?".format(self.__select(cls)), (id,)).fetchone()
+        return self.__build(cls, row) if row is not None else None
+
+    def count(self, cls=None):
+        """Return the number of objects, or of objects of a class.
+
+        Args:
+            cls (type or str): The class, or class name, to count.
+        """
+        if cls is not None and not isinstance(cls, str):
+            cls = cls.__name__
+        if cls is not None and cls not in classes:
+            return 0
+        self.__flush()
+        return sum(self.__conn.execute(
+            'SELECT COUNT(*) FROM "{}"'.format(self.__table(name))
+        ).fetchone()[0] for name in ([cls] if cls else classes))
+
+    def scan(self, cls=None):
+        """Yield the objects of a class, or of every class, one at a time.
+
+        Args:
+            cls (type or str): The class, or class name, to read.
+        """
+        if cls is not None and not isinstance(cls, str):
+            cls = cls.__name__
+        if cls is not None and cls not in classes:
+            return
+        self.__flush()
+        for name in [cls] if cls else list(classes):
+            for row in self.__conn.execute(self.__select(name)):
+                yield self.__build(name, row)
+
+    def find(self, cls, **attrs):
+        """Return the objects of a class whose attributes match attrs.
+
+        Attributes stored in columns are matched by the query, using the
+        indexes of the foreign keys; the others, and values equal to the
+        class default that unset columns stand for, are checked on the
+        result.
+
+        Args:
+            cls (type or str): The class, or class name, to search.
+            **attrs: Attribute names mapped to the value to match.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if cls not in classes:
+            return []
+        self.__flush()
+        columns = self.__columns_of(cls)
+        where = [(attr, value) for attr, value in attrs.items()
+                 if attr in columns and attr != "extra" and
+                 self.__fits(columns[attr], value) and
+                 value != getattr(classes[cls], attr, None)]
+        query = self.__select(cls)
+        if where:
+            query += " WHERE " + " AND ".join(
+                '"{}" = ?'.format(attr) for attr, value in where)
+        rows = self.__conn.execute(
+            query, [self.__encode(value) for attr, value in where])
+        return [obj for obj in (self.__build(cls, row) for row in rows)
+                if all(getattr(obj, attr, None) == value
+                       for attr, value in attrs.items())]
+
+    def index(self, cls, attr):
+        """Return the index of an attribute of a class, or None.
+
+        Only the attributes named in the _indexes tuple of the class are
+        indexed by the database.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            attr (str): The name of the attribute.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if cls not in classes or attr not in classes[cls]._indexes:
+            return None
+        return ColumnIndex(self, cls, attr)
+
+    def new(self, obj):
+        """Add obj to the objects to write with the next save."""
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        self.__objects[key] = obj
+        obj.mark_dirty()
+
+    def delete(self, obj=None):
+        """Delete obj from the database if it is inside."""
+        if obj is None:
+            return
+        self.__flush()
+        ocname = obj.__class__.__name__
+        self.__conn.execute('DELETE FROM "{}" WHERE id = ?'.format(
+            self.__table(ocname)), (obj.id,))
+        self.__objects.pop("{}.{}".format(ocname, obj.id), None)
+
+    def reindex(self, obj, attr, old):
+        """Do nothing: the database maintains its own indexes."""
+        pass
+
+    def save(self):
+        """Write the changed objects and commit the transaction.
+
+        Inside a batch the transaction is left open.
+        """
+        self.__flush()
+        if self.__batch == 0:
+            self.__conn.commit()
+
+    def begin(self):
+        """Open a batch: save() is deferred until the matching commit()."""
+        self.__batch += 1
+
+    def commit(self):
+        """Close a batch, committing once the outermost is closed."""
+        self.__batch = max(0, self.__batch - 1)
+        self.save()
+
+    def rollback(self):
+        """Discard the changes not committed yet and close every batch.
+
+        Loaded objects may hold discarded changes, so the identity map is
+        cleared and later reads return fresh objects.
+        """
+        BaseModel.pop_dirty()
+        self.__conn.rollback()
+        self.__objects = weakref.WeakValueDictionary()
+        self.__batch = 0
+
+    @contextmanager
+    def transaction(self):
+        """Return a context manager running its block in a batch.
+
+        The changes are committed when the block exits normally and rolled
+        back if it raises.
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def reload(self):
+        """Open the database, creating the missing tables and columns."""
+        if self.__conn is not None:
+            self.__conn.close()
+        self.__conn = sqlite3.connect(self.__db_path)
+        self.__objects = weakref.WeakValueDictionary()
+        self.__columns = {}
+        self.__batch = 0
+        for name in classes:
+            self.__table(name)
+
+    def close(self):
+        """Commit the changes and close the database."""
+        if self.__conn is not None:
+            self.save()
+            self.__conn.close()
+            self.__conn = None
+
+    def __columns_of(self, cls_name):
+        """Return the columns of the table of a class and their types."""
+        columns = self.__columns.get(cls_name)
+        if columns is None:
+            columns = {"id": str, "created_at": str, "updated_at": str}
+            for klass in reversed(classes[cls_name].__mro__):
+                for attr in vars(klass):
+                    if (not attr.startswith("_") and
+                            type(getattr(klass, attr)) in (str, int, float,
+                                                           list)):
+                        columns[attr] = type(getattr(klass, attr))
+            columns["extra"] = dict
+            self.__columns[cls_name] = columns
+        return columns
+
+    def __table(self, cls_name):
+        """Return the table name of a class, creating the table if needed."""
+        if cls_name in self.__columns:
+            return cls_name
+        columns = self.__columns_of(cls_name)
+        self.__conn.execute('CREATE TABLE IF NOT EXISTS "{}" ({})'.format(
+            cls_name, ", ".join(
+                '"{}"{}'.format(col, " PRIMARY KEY" if col == "id" else "")
+                for col in columns)))
+        existing = {row[1] for row in self.__conn.execute(
+            'PRAGMA table_info("{}")'.format(cls_name))}
+        for col in columns:
+            if col not in existing:
+                self.__conn.execute('ALTER TABLE "{}" ADD COLUMN "{}"'
+                                    .format(cls_name, col))
+        for attr in classes[cls_name]._indexes:
+            self.__conn.execute(
+                'CREATE INDEX IF NOT EXISTS "{0}_{1}" ON "{0}" ("{1}")'
+                .format(cls_name, attr))
+        return cls_name
+
+    def __select(self, cls_name):
+        """Return the SELECT statement of the columns of a class."""
+        return 'SELECT {} FROM "{}"'.format(
+            ", ".join('"{}"'.format(col)
+                      for col in self.__columns_of(cls_name)),
+            self.__table(cls_name))
+
+    def __flush(self):
+        """Write the objects changed since the last flush."""
+        for obj, deleted in BaseModel.pop_dirty().items():
+            ocname = obj.__class__.__name__
+            key = "{}.{}".format(ocname, obj.id)
+            if deleted or self.__objects.get(key) is not obj:
+                continue
+            columns = self.__columns_of(ocname)
+            odict = obj.to_dict()
+            del odict["__class__"]
+            row = [self.__encode(odict.pop(col))
+                   if col in odict and self.__fits(kind, odict[col])
+                   else None for col, kind in columns.items()
+                   if col != "extra"]
+            row.append(json.dumps(odict) if odict else None)
+            self.__conn.execute(
+                'INSERT OR REPLACE INTO "{}" ({}) VALUES ({})'.format(
+                    self.__table(ocname),
+                    ", ".join('"{}"'.format(col) for col in columns),
+                    ", ".join("?" * len(row))), row)
+
+    def __build(self, cls_name, row):
+        """Return the object of a row, from the identity map if loaded."""
+        key = "{}.{}".format(cls_name, row[0])
+        obj = self.__objects.get(key)
+        if obj is not None:
+            return obj
+        kwargs = {}
+        for (col, kind), value in zip(self.__columns_of(cls_name).items(),
+                                      row):
+            if value is None:
+                continue
+            if col == "extra":
+                kwargs.update(json.loads(value))
+            elif kind is list:
+                kwargs[col] = json.loads(value)
+            else:
+                kwargs[col] = value
+        obj = classes[cls_name](**kwargs)
+        self.__objects[key] = obj
+        return obj
+
+    @staticmethod
+    def __fits(kind, value):
+        """Return True if value reads back unchanged from a column of kind.
+
+        Columns are declared without a type, so SQLite keeps the str, int
+        and float values as they are; list columns hold the JSON of a
+        list. Other values, like booleans or None, go to the extra column.
+        """
+        if kind is list:
+            return isinstance(value, list)
+        return type(value) in (str, int, float)
+
+    @staticmethod
+    def __encode(value):
+        """Return value as stored in a column."""
+        if isinstance(value, (list, dict)):
+            return json.dumps(value)
+        return value
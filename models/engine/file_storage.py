@@ -1,7 +1,14 @@
 #!/usr/bin/python3
 """Defines the FileStorage class."""
 import json
-from models.base_model import BaseModel
+import os
+from collections.abc import ItemsView, ValuesView
+from contextlib import contextmanager
+from itertools import chain
+from models.base_model import BaseModel, classes
+from models.engine.common import iter_items
+from models.engine.indexes import AttributeIndex, GridIndex, RangeIndex
+from models.engine.indexes import MembershipIndex, TextIndex
 from models.user import User
 from models.state import State
 from models.city import City
@@ -10,40 +17,586 @@ from models.amenity import Amenity
 from models.review import Review
 
 
+class _Record:
+    """Represent a stored object that was read but not instantiated yet.
+
+    Attributes:
+        cls_name (str): The class name of the object.
+        text (str): The JSON text of the object.
+        obj (BaseModel): The instance, once load() was called.
+        loader (function): Builds the instance from the record.
+    """
+
+    __slots__ = ("cls_name", "text", "obj", "loader")
+
+    def __init__(self, cls_name, text, loader):
+        """Initialize a new _Record."""
+        self.cls_name = cls_name
+        self.text = text
+        self.obj = None
+        self.loader = loader
+
+    def load(self):
+        """Return the instance of the record, building it if needed."""
+        if self.obj is None:
+            self.obj = self.loader(self)
+        return self.obj
+
+
+class _LazyObjects(dict):
+    """Represent a dictionary of objects that may hold _Record values.
+
+    Records are replaced by their instance the first time they are read
+    through item access, get(), pop(), popitem(), setdefault(), values()
+    or items(). Overriding __iter__ makes dict(), {**objects} and
+    update() read the items one key at a time, so copies hold instances
+    too.
+    """
+
+    def __iter__(self):
+        """Iterate over the keys."""
+        return super().__iter__()
+
+    def __getitem__(self, key):
+        """Return the instance stored under key."""
+        value = super().__getitem__(key)
+        if type(value) is _Record:
+            value = value.load()
+            super().__setitem__(key, value)
+        return value
+
+    def get(self, key, default=None):
+        """Return the instance stored under key, or default."""
+        return self[key] if key in self else default
+
+    def pop(self, key, *default):
+        """Remove key and return its instance."""
+        value = super().pop(key, *default)
+        return value.load() if type(value) is _Record else value
+
+    def popitem(self):
+        """Remove the last key and return it with its instance."""
+        key, value = super().popitem()
+        return key, value.load() if type(value) is _Record else value
+
+    def setdefault(self, key, default=None):
+        """Return the instance stored under key, storing default if none."""
+        if key in self:
+            return self[key]
+        return super().setdefault(key, default)
+
+    def copy(self):
+        """Return a dictionary of the instances."""
+        return dict(self)
+
+    def __or__(self, other):
+        """Return a dictionary of the instances updated with other."""
+        objs = dict(self)
+        objs.update(other)
+        return objs
+
+    def values(self):
+        """Return a view of the instances."""
+        return ValuesView(self)
+
+    def items(self):
+        """Return a view of the keys and instances."""
+        return ItemsView(self)
+
+
+def _class_name(value):
+    """Return the class name of an instance or _Record."""
+    if type(value) is _Record:
+        return value.cls_name
+    return value.__class__.__name__
+
+
 class FileStorage:
     """Represent an abstracted storage engine.
 
+    Only instances reported dirty by BaseModel.pop_dirty() are serialized
+    on save; the record of every other instance is copied from the
+    previous file, whose offsets are kept in __records. The attributes
+    named in the _indexes tuple of a model class are kept in an
+    AttributeIndex used by find(), those named in its
+    _range_indexes tuple in a RangeIndex, the coordinates named by its
+    _geo_index in a GridIndex, the texts named by its _text_indexes
+    tuple in a TextIndex and the lists named by its _member_indexes tuple
+    in a MembershipIndex.
+
+    __file_path holds either one JSON object keyed by <class name>.id
+    ("json") or one to_dict() record per line ("jsonl",
+    HBNB_STORAGE_FORMAT=jsonl); reload() accepts both. In journaled mode
+    (HBNB_STORAGE_JOURNAL=1) save() appends just the changed records to
+    __journal_path, and the journal is folded back into __file_path once
+    it holds __compact_after entries. In lazy mode (HBNB_STORAGE_LAZY=1)
+    reload() keeps the text of each record and only builds its instance
+    when it is first read from all(). Between begin() and commit(), or
+    inside a transaction() block, save() only lets the changes accumulate;
+    rollback() drops them.
+
     Attributes:
         __file_path (str): The name of the file to save objects to.
+        __format (str): The layout save() writes, "json" or "jsonl".
+        __chunk_size (int): Characters read at a time by reload().
         __objects (dict): A dictionary of instantiated objects.
+        __journal_path (str): The name of the append-only journal file.
+        __journaled (bool): Whether save() appends to the journal.
+        __compact_after (int): Journal entries that trigger a compaction.
+        __journal_size (int): Number of entries in the journal.
+        __records (dict): Keys mapped to the offset of their record in
+            __file_path shifted left by 32 bits plus its length, for the
+            objects unchanged since the file was last read or written.
+        __source (tuple): The (path, inode, size, mtime) of the file the
+            offsets of __records refer to, or None.
+        __by_class (dict): Class names mapped to the dictionary of their
+            objects, keyed like __objects.
+        __by_attr (dict): Class names mapped to the dictionary of their
+            attribute names and index, the GridIndex of a class being
+            listed under both of its attributes.
+        __indexed (dict): The __objects dictionary the indexes were
+            built from.
+        __lazy (bool): Whether reload() defers building instances.
+        __unloaded (dict): Class names mapped to their number of records
+            not built yet.
+        __batch (int): Number of begin() calls not committed yet.
     """
     __file_path = "file.json"
+    __format = os.getenv("HBNB_STORAGE_FORMAT", "json")
+    __chunk_size = 65536
     __objects = {}
+    __journal_path = "file.json.journal"
+    __journaled = os.getenv("HBNB_STORAGE_JOURNAL") == "1"
+    __compact_after = 1000
+    __journal_size = 0
+    __records = {}
+    __source = None
+    __by_class = {}
+    __by_attr = {}
+    __indexed = None
+    __lazy = os.getenv("HBNB_STORAGE_LAZY") == "1"
+    __unloaded = {}
+    __batch = 0
+
+    def all(self, cls=None):
+        """Return the dictionary __objects, or only the objects of a class.
+
+        Args:
+            cls (type or str): The class, or class name, to return.
+        """
+        if cls is None:
+            return FileStorage.__objects
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        return self.__index().get(cls, {})
+
+    def get(self, cls, id):
+        """Return the object of a class with the given id, or None.
+
+        Args:
+            cls (type or str): The class, or class name, of the object.
+            id (str): The id of the object.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        return FileStorage.__objects.get("{}.{}".format(cls, id))
 
-    def all(self):
-        """Return the dictionary __objects."""
-        return FileStorage.__objects
+    def count(self, cls=None):
+        """Return the number of objects, or of objects of a class.
+
+        Args:
+            cls (type or str): The class, or class name, to count.
+        """
+        return len(self.all(cls))
+
+    def find(self, cls, **attrs):
+        """Return the objects of a class whose attributes match attrs.
+
+        The candidates come from the smallest entry among the indexed
+        attributes of attrs, or from all objects of the class if none of
+        them is indexed.
+
+        Args:
+            cls (type or str): The class, or class name, to search.
+            **attrs: Attribute names mapped to the value to match.
+        """
+        objs = self.all(cls)
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        self.__materialize(cls)
+        indexes = FileStorage.__by_attr.get(cls, {})
+        for attr, value in attrs.items():
+            if attr in indexes:
+                entry = indexes[attr].get(value)
+                if entry is not None and len(entry) < len(objs):
+                    objs = entry
+        return [obj for obj in objs.values()
+                if all(getattr(obj, attr, None) == value
+                       for attr, value in attrs.items())]
+
+    def index(self, cls, attr):
+        """Return the index of an attribute of a class, or None.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            attr (str): The name of the attribute.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        self.__materialize(cls)
+        return FileStorage.__by_attr.get(cls, {}).get(attr)
 
     def new(self, obj):
         """Set in __objects obj with key <obj_class_name>.id"""
+        self.__add("{}.{}".format(obj.__class__.__name__, obj.id), obj)
+        obj.mark_dirty()
+
+    def delete(self, obj=None):
+        """Delete obj from __objects if it is inside."""
+        if obj is None:
+            return
+        ocname = obj.__class__.__name__
+        key = "{}.{}".format(ocname, obj.id)
+        if self.all().pop(key, None) is not None:
+            self.__index()
+            self.__unlink(key, obj)
+            obj.mark_dirty(deleted=True)
+
+    def reindex(self, obj, attr, old):
+        """Update the index of attr after it changed on a stored object.
+
+        Args:
+            obj (BaseModel): The object whose attribute changed.
+            attr (str): The name of the changed attribute.
+            old (any): The value of the attribute before the change.
+        """
         ocname = obj.__class__.__name__
-        FileStorage.__objects["{}.{}".format(ocname, obj.id)] = obj
+        key = "{}.{}".format(ocname, obj.id)
+        if FileStorage.__objects.get(key) is not obj:
+            return
+        self.__index()
+        index = FileStorage.__by_attr.get(ocname, {}).get(attr)
+        if index is not None:
+            index.discard(key, old)
+            index.add(key, obj)
 
     def save(self):
-        """Serialize __objects to the JSON file __file_path."""
-        odict = FileStorage.__objects
-        objdict = {obj: odict[obj].to_dict() for obj in odict.keys()}
-        with open(FileStorage.__file_path, "w") as f:
-            json.dump(objdict, f)
+        """Serialize __objects to the JSON file __file_path.
+
+        In journaled mode the changes are appended to __journal_path.
+        Nothing is written while a batch is open.
+        """
+        if FileStorage.__batch > 0:
+            return
+        if not FileStorage.__journaled:
+            self.compact()
+            return
+        changes = self.__changes()
+        with open(FileStorage.__journal_path, "a") as f:
+            for key, text in changes:
+                f.write('{{"key": {}, "value": {}}}\n'.format(
+                    json.dumps(key), text))
+        FileStorage.__journal_size += len(changes)
+        if FileStorage.__journal_size >= FileStorage.__compact_after:
+            self.compact()
+
+    def begin(self):
+        """Open a batch: save() is deferred until the matching commit()."""
+        FileStorage.__batch += 1
+
+    def commit(self):
+        """Close a batch, saving its changes once the outermost is closed."""
+        FileStorage.__batch = max(0, FileStorage.__batch - 1)
+        self.save()
+
+    def rollback(self):
+        """Discard the changes not saved yet and close every batch.
+
+        __objects is read back from __file_path and the journal; objects
+        loaded before may hold discarded changes, so later reads return
+        fresh objects.
+        """
+        BaseModel.pop_dirty()
+        FileStorage.__objects = {}
+        FileStorage.__records = {}
+        FileStorage.__batch = 0
+        self.reload()
+
+    @contextmanager
+    def transaction(self):
+        """Return a context manager running its block in a batch.
+
+        The changes are saved in one pass when the block exits normally
+        and rolled back if it raises.
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def migrate(self, fmt):
+        """Rewrite __file_path in the format fmt and keep using it.
+
+        Args:
+            fmt (str): The new format, "json" or "jsonl".
+        Raises:
+            ValueError: If fmt is not a known format.
+        """
+        if fmt not in ("json", "jsonl"):
+            raise ValueError("unknown storage format: {}".format(fmt))
+        FileStorage.__format = fmt
+        self.compact()
+
+    def compact(self):
+        """Rewrite __file_path from __objects and discard the journal.
+
+        The records of the objects unchanged since __file_path was read
+        or written are copied from it; only the others are serialized.
+        """
+        spans = FileStorage.__records
+        for obj in BaseModel.pop_dirty():
+            spans.pop("{}.{}".format(obj.__class__.__name__, obj.id), None)
+        records = {}
+        src = None
+        if spans and FileStorage.__source is not None and \
+                FileStorage.__source == self.__signature():
+            src = open(FileStorage.__file_path, "rb")
+        tmp_path = FileStorage.__file_path + ".tmp"
+        jsonl = FileStorage.__format == "jsonl"
+        try:
+            with open(tmp_path, "wb") as f:
+                sep = b""
+                pos = 0 if jsonl else f.write(b"{")
+                for key, obj in dict.items(FileStorage.__objects):
+                    if type(obj) is _Record and obj.obj is not None:
+                        obj = obj.obj
+                    span = spans.get(key)
+                    if src is not None and span is not None:
+                        src.seek(span >> 32)
+                        data = src.read(span & 0xFFFFFFFF)
+                    elif type(obj) is _Record:
+                        data = obj.text.encode("utf-8")
+                    else:
+                        data = json.dumps(obj.to_dict()).encode("utf-8")
+                    if jsonl:
+                        records[key] = pos << 32 | len(data)
+                        pos += f.write(data + b"\n")
+                    else:
+                        head = sep + json.dumps(key).encode("utf-8") + b": "
+                        records[key] = (pos + len(head)) << 32 | len(data)
+                        pos += f.write(head + data)
+                        sep = b", "
+                if not jsonl:
+                    f.write(b"}")
+        finally:
+            if src is not None:
+                src.close()
+        os.replace(tmp_path, FileStorage.__file_path)
+        FileStorage.__records = records
+        FileStorage.__source = self.__signature()
+        try:
+            os.remove(FileStorage.__journal_path)
+        except FileNotFoundError:
+            pass
+        FileStorage.__journal_size = 0
 
     def reload(self):
-        """Deserialize the JSON file __file_path to __objects, if it exists."""
+        """Deserialize the JSON file __file_path to __objects, if it exists.
+
+        The file is parsed one object at a time, and its format is told
+        from its first item. In lazy mode the objects are stored as
+        _Record until they are read. Entries of the journal are replayed
+        on top of the snapshot.
+        """
+        if FileStorage.__lazy and type(FileStorage.__objects) is dict:
+            FileStorage.__objects = _LazyObjects(FileStorage.__objects)
+        FileStorage.__records = {}
+        FileStorage.__source = None
+        # Offsets are kept while every character read is ASCII, so that
+        # they count bytes.
+        ascii = True
         try:
-            with open(FileStorage.__file_path) as f:
-                objdict = json.load(f)
-                for o in objdict.values():
-                    cls_name = o["__class__"]
-                    del o["__class__"]
-                    self.new(eval(cls_name)(**o))
+            with open(FileStorage.__file_path, newline="") as f:
+                items = iter_items(f, FileStorage.__chunk_size)
+                first = next(items, None)
+                if first is not None and isinstance(first[1], dict):
+                    for key, o, text, start in chain([first], items):
+                        ascii = ascii and key.isascii() and text.isascii()
+                        self.__load(key, o, text, start if ascii else None)
+                elif first is not None:
+                    f.seek(0)
+                    start = 0
+                    for line in f:
+                        ascii = ascii and line.isascii()
+                        if line.strip():
+                            o = json.loads(line)
+                            key = "{}.{}".format(o["__class__"], o["id"])
+                            self.__load(key, o, line.rstrip("\r\n"),
+                                        start if ascii else None)
+                        start += len(line)
+            FileStorage.__source = self.__signature()
         except FileNotFoundError:
-            return
+            pass
+        FileStorage.__journal_size = 0
+        try:
+            with open(FileStorage.__journal_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    FileStorage.__journal_size += 1
+                    if entry["value"] is None:
+                        self.__remove(entry["key"])
+                    else:
+                        self.__add(entry["key"], self.__build(entry["value"]))
+        except FileNotFoundError:
+            pass
+
+    def __index(self):
+        """Return __by_class, rebuilding the indexes if __objects changed."""
+        if FileStorage.__indexed is not FileStorage.__objects:
+            FileStorage.__indexed = FileStorage.__objects
+            FileStorage.__by_class = {}
+            FileStorage.__by_attr = {}
+            FileStorage.__unloaded = {}
+            for key, obj in dict.items(FileStorage.__objects):
+                self.__link(key, obj)
+        return FileStorage.__by_class
+
+    def __materialize(self, cls_name):
+        """Build the unloaded records of a class so all are indexed."""
+        objs = self.__index().get(cls_name, {})
+        if FileStorage.__unloaded.get(cls_name, 0) > 0:
+            for obj in objs.values():
+                pass
+
+    def __link(self, key, obj):
+        """Add obj, an instance or _Record, to the indexes."""
+        ocname = _class_name(obj)
+        objs = FileStorage.__by_class.get(ocname)
+        if objs is None:
+            objs = type(FileStorage.__objects)()
+            FileStorage.__by_class[ocname] = objs
+        dict.__setitem__(objs, key, obj)
+        if type(obj) is _Record:
+            if obj.obj is None:
+                FileStorage.__unloaded[ocname] = (
+                    FileStorage.__unloaded.get(ocname, 0) + 1)
+                return
+            obj = obj.obj
+        self.__link_attrs(key, obj)
+
+    def __link_attrs(self, key, obj):
+        """Add the instance obj to the attribute indexes of its class."""
+        ocname = obj.__class__.__name__
+        indexes = FileStorage.__by_attr.get(ocname)
+        if indexes is None:
+            indexes = {attr: AttributeIndex(attr) for attr in obj._indexes}
+            for attr in obj._range_indexes:
+                indexes[attr] = RangeIndex(attr)
+            if obj._geo_index:
+                grid = GridIndex(*obj._geo_index)
+                for attr in obj._geo_index:
+                    indexes[attr] = grid
+            for attr in obj._text_indexes:
+                indexes[attr] = TextIndex(attr)
+            for attr in obj._member_indexes:
+                indexes[attr] = MembershipIndex(attr)
+            FileStorage.__by_attr[ocname] = indexes
+        for attr, index in indexes.items():
+            if index.attr == attr:
+                index.add(key, obj)
+
+    def __unlink(self, key, obj):
+        """Remove obj, an instance or _Record, from the indexes."""
+        ocname = _class_name(obj)
+        dict.pop(FileStorage.__by_class.get(ocname, {}), key, None)
+        if type(obj) is _Record:
+            if obj.obj is None:
+                FileStorage.__unloaded[ocname] -= 1
+                return
+            obj = obj.obj
+        for attr, index in FileStorage.__by_attr.get(ocname, {}).items():
+            if index.attr == attr:
+                index.discard(key, getattr(obj, attr, None))
+
+    def __add(self, key, obj):
+        """Set obj, an instance or _Record, in __objects and the indexes."""
+        self.__index()
+        old = dict.get(FileStorage.__objects, key)
+        if old is not None:
+            self.__unlink(key, old)
+            FileStorage.__records.pop(key, None)
+        dict.__setitem__(FileStorage.__objects, key, obj)
+        self.__link(key, obj)
+
+    def __remove(self, key):
+        """Remove the object stored under key, if any."""
+        self.__index()
+        obj = dict.pop(FileStorage.__objects, key, None)
+        if obj is not None:
+            self.__unlink(key, obj)
+
+    def __load(self, key, o, text, offset=None):
+        """Add the object read from the record o under key.
+
+        Args:
+            key (str): The key of the object.
+            o (dict): The decoded record.
+            text (str): The JSON text of the record.
+            offset (int): The offset of the record in __file_path, or
+                None if unknown.
+        """
+        if FileStorage.__lazy:
+            obj = _Record(o["__class__"], text, self.__loaded)
+        else:
+            obj = self.__build(o)
+        self.__add(key, obj)
+        if offset is not None:
+            FileStorage.__records[key] = offset << 32 | len(text)
+
+    def __loaded(self, record):
+        """Build the instance of a _Record and index it."""
+        obj = self.__build(json.loads(record.text))
+        key = "{}.{}".format(record.cls_name, obj.id)
+        FileStorage.__unloaded[record.cls_name] -= 1
+        self.__link_attrs(key, obj)
+        return obj
+
+    def __changes(self):
+        """Serialize the instances that are dirty since the last save.
+
+        Returns:
+            list: (key, JSON text) pairs, the text being "null" for
+            deleted instances.
+        """
+        changes = []
+        for obj, deleted in BaseModel.pop_dirty().items():
+            key = "{}.{}".format(obj.__class__.__name__, obj.id)
+            if FileStorage.__objects.get(key) is obj:
+                FileStorage.__records.pop(key, None)
+                changes.append((key, json.dumps(obj.to_dict())))
+            elif deleted and key not in FileStorage.__objects:
+                FileStorage.__records.pop(key, None)
+                changes.append((key, "null"))
+        return changes
+
+    @staticmethod
+    def __signature():
+        """Return the (path, inode, size, mtime) of __file_path, or None."""
+        try:
+            st = os.stat(FileStorage.__file_path)
+        except FileNotFoundError:
+            return None
+        return (FileStorage.__file_path, st.st_ino, st.st_size,
+                st.st_mtime_ns)
+
+    def __build(self, o):
+        """Return the model instance described by the dictionary o."""
+        cls_name = o["__class__"]
+        del o["__class__"]
+        return classes[cls_name](**o)
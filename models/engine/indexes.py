@@ -0,0 +1,613 @@
+#!/usr/bin/python3
+"""Defines the secondary indexes kept by the storage engines."""
+import re
+from bisect import bisect_left, insort
+from heapq import nsmallest
+from math import asin, cos, degrees, floor, log, radians, sin, sqrt
+
+# The mean radius of the Earth used by haversine().
+EARTH_RADIUS_KM = 6371.0088
+# A word of the texts indexed by TextIndex.
+_WORD = re.compile(r"\w+")
+
+
+class _Last:
+    """Represent a key sorting after every other key."""
+
+    def __lt__(self, other):
+        """Return False: no key sorts after _Last."""
+        return False
+
+    def __gt__(self, other):
+        """Return True: every other key sorts before _Last."""
+        return other is not self
+
+
+_LAST = _Last()
+
+
+class AttributeIndex:
+    """Represent a hash index of stored objects by one attribute.
+
+    Attributes:
+        attr (str): The name of the indexed attribute.
+        entries (dict): Attribute values mapped to the dictionary of the
+            objects holding that value, keyed like FileStorage.__objects.
+    """
+
+    def __init__(self, attr):
+        """Initialize a new AttributeIndex.
+
+        Args:
+            attr (str): The name of the attribute to index.
+        """
+        self.attr = attr
+        self.entries = {}
+
+    def add(self, key, obj):
+        """Index obj under the current value of its attribute."""
+        value = getattr(obj, self.attr, None)
+        try:
+            self.entries.setdefault(value, {})[key] = obj
+        except TypeError:
+            pass
+
+    def discard(self, key, value):
+        """Remove key from the entry of value, if it is there."""
+        try:
+            objs = self.entries.get(value)
+        except TypeError:
+            return
+        if objs is not None:
+            objs.pop(key, None)
+            if len(objs) == 0:
+                del self.entries[value]
+
+    def get(self, value):
+        """Return the dictionary of objects whose attribute equals value.
+
+        Returns None if value cannot be indexed.
+        """
+        try:
+            return self.entries.get(value, {})
+        except TypeError:
+            return None
+
+
+class RangeIndex:
+    """Represent a sorted index of stored objects by a numeric attribute.
+
+    The (value, key) pairs are kept sorted in a list searched with bisect,
+    so range and top-k reads take O(log n + k). Added pairs wait in a
+    buffer until the next read, which sorts them in all at once when they
+    are many, as after a reload, and inserts them one by one otherwise.
+    Objects whose attribute is not a number are only counted in skipped.
+
+    Attributes:
+        attr (str): The name of the indexed attribute.
+        pairs (list): The sorted (value, key) pairs.
+        pending (list): The (value, key) pairs added since the last read.
+        objs (dict): The indexed objects, keyed like FileStorage.__objects.
+        skipped (set): Keys of the objects whose value is not a number.
+    """
+
+    def __init__(self, attr):
+        """Initialize a new RangeIndex.
+
+        Args:
+            attr (str): The name of the attribute to index.
+        """
+        self.attr = attr
+        self.pairs = []
+        self.pending = []
+        self.objs = {}
+        self.skipped = set()
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.pairs) + len(self.pending)
+
+    def settle(self):
+        """Move the pending pairs into the sorted pairs."""
+        if len(self.pending) > 16 and len(self.pending) > \
+                len(self.pairs) // 64:
+            self.pairs.extend(self.pending)
+            self.pairs.sort()
+        else:
+            for pair in self.pending:
+                insort(self.pairs, pair)
+        self.pending = []
+
+    @staticmethod
+    def indexable(value):
+        """Return True if value is a number the index can sort."""
+        return type(value) in (int, float, bool) and value == value
+
+    def add(self, key, obj):
+        """Index obj under the current value of its attribute."""
+        value = getattr(obj, self.attr, None)
+        if not self.indexable(value):
+            self.skipped.add(key)
+            return
+        self.pending.append((value, key))
+        self.objs[key] = obj
+
+    def discard(self, key, value):
+        """Remove key from the entry of value, if it is there."""
+        if not self.indexable(value):
+            self.skipped.discard(key)
+            return
+        if self.pending:
+            self.settle()
+        i = bisect_left(self.pairs, (value, key))
+        if i < len(self.pairs) and self.pairs[i] == (value, key):
+            del self.pairs[i]
+            self.objs.pop(key, None)
+
+    def span(self, lo=None, hi=None, lo_inclusive=True, hi_inclusive=True):
+        """Return the (start, stop) positions of the values in a range.
+
+        Args:
+            lo (int or float): The lower bound, or None for no bound.
+            hi (int or float): The upper bound, or None for no bound.
+            lo_inclusive (bool): Whether values equal to lo are included.
+            hi_inclusive (bool): Whether values equal to hi are included.
+        """
+        if self.pending:
+            self.settle()
+        start, stop = 0, len(self.pairs)
+        if lo is not None:
+            start = bisect_left(self.pairs, (lo,) if lo_inclusive
+                                else (lo, _LAST))
+        if hi is not None:
+            stop = bisect_left(self.pairs, (hi, _LAST) if hi_inclusive
+                               else (hi,))
+        return start, max(start, stop)
+
+    def range(self, lo=None, hi=None, lo_inclusive=True, hi_inclusive=True,
+              reverse=False):
+        """Yield the objects whose value is in a range, sorted by value.
+
+        The arguments are those of span(); reverse yields the largest
+        values first.
+        """
+        start, stop = self.span(lo, hi, lo_inclusive, hi_inclusive)
+        positions = range(stop - 1, start - 1, -1) if reverse else \
+            range(start, stop)
+        for i in positions:
+            yield self.objs[self.pairs[i][1]]
+
+    def get(self, value):
+        """Return the dictionary of objects whose attribute equals value.
+
+        Returns None if value cannot be indexed.
+        """
+        if not self.indexable(value):
+            return None
+        start, stop = self.span(value, value)
+        return {key: self.objs[key] for v, key in self.pairs[start:stop]}
+
+
+class GridIndex:
+    """Represent a grid index of stored objects by latitude and longitude.
+
+    The globe is cut in square cells of cell degrees, each mapped to the
+    objects inside, so a bounding box or radius query only reads the
+    cells it overlaps. Objects without valid coordinates are left out.
+
+    Attributes:
+        attr (str): The name of the latitude attribute.
+        lon_attr (str): The name of the longitude attribute.
+        cell (float): The side of a cell in degrees.
+        cells (dict): (row, column) pairs mapped to the dictionary of the
+            objects of the cell, keyed like FileStorage.__objects.
+        positions (dict): Keys mapped to the cell of their object.
+    """
+
+    def __init__(self, lat_attr, lon_attr, cell=1.0):
+        """Initialize a new GridIndex.
+
+        Args:
+            lat_attr (str): The name of the latitude attribute.
+            lon_attr (str): The name of the longitude attribute.
+            cell (float): The side of a cell in degrees.
+        """
+        self.attr = lat_attr
+        self.lon_attr = lon_attr
+        self.cell = cell
+        self.cells = {}
+        self.positions = {}
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.positions)
+
+    def coordinates(self, obj):
+        """Return the (latitude, longitude) of obj, or None if invalid."""
+        lat = getattr(obj, self.attr, None)
+        lon = getattr(obj, self.lon_attr, None)
+        if (type(lat) not in (int, float) or type(lon) not in (int, float)
+                or not -90 <= lat <= 90 or not -180 <= lon <= 180):
+            return None
+        return lat, lon
+
+    def add(self, key, obj):
+        """Index obj in the cell of its current coordinates."""
+        self.discard(key)
+        coords = self.coordinates(obj)
+        if coords is None:
+            return
+        cell = (floor(coords[0] / self.cell), floor(coords[1] / self.cell))
+        self.cells.setdefault(cell, {})[key] = obj
+        self.positions[key] = cell
+
+    def discard(self, key, value=None):
+        """Remove key from its cell, whatever the value of either attribute.
+
+        Args:
+            key (str): The key of the object.
+            value (any): Unused, for the interface of the other indexes.
+        """
+        cell = self.positions.pop(key, None)
+        if cell is not None:
+            objs = self.cells[cell]
+            del objs[key]
+            if len(objs) == 0:
+                del self.cells[cell]
+
+    def get(self, value):
+        """Return None: the index cannot look up a single attribute."""
+        return None
+
+    def bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """Yield the objects inside a bounding box.
+
+        A box with min_lon greater than max_lon crosses the antimeridian.
+        """
+        rows = range(floor(max(min_lat, -90) / self.cell),
+                     floor(min(max_lat, 90) / self.cell) + 1)
+        if min_lon <= max_lon:
+            spans = [(min_lon, max_lon)]
+        else:
+            spans = [(min_lon, 180), (-180, max_lon)]
+        columns = [range(floor(lo / self.cell), floor(hi / self.cell) + 1)
+                   for lo, hi in spans]
+        if len(rows) * sum(len(cols) for cols in columns) > len(self.cells):
+            cells = [objs for (row, col), objs in self.cells.items()
+                     if row in rows and any(col in cols for cols in columns)]
+        else:
+            cells = [self.cells[row, col] for row in rows
+                     for cols in columns for col in cols
+                     if (row, col) in self.cells]
+        for objs in cells:
+            for obj in objs.values():
+                lat, lon = self.coordinates(obj)
+                if min_lat <= lat <= max_lat and any(
+                        lo <= lon <= hi for lo, hi in spans):
+                    yield obj
+
+    def radius(self, lat, lon, km):
+        """Return the (distance, object) pairs within km of a point.
+
+        Distances are great-circle kilometers; the pairs are sorted
+        nearest first.
+        """
+        dlat = degrees(km / EARTH_RADIUS_KM)
+        min_lat, max_lat = lat - dlat, lat + dlat
+        edge = max(abs(min_lat), abs(max_lat))
+        if edge >= 90 or dlat / cos(radians(edge)) >= 180:
+            min_lon, max_lon = -180, 180
+        else:
+            dlon = dlat / cos(radians(edge))
+            min_lon, max_lon = lon - dlon, lon + dlon
+            if min_lon < -180:
+                min_lon += 360
+            if max_lon > 180:
+                max_lon -= 360
+        found = []
+        for obj in self.bbox(min_lat, min_lon, max_lat, max_lon):
+            distance = haversine(lat, lon, *self.coordinates(obj))
+            if distance <= km:
+                found.append((distance, obj))
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Return the great-circle distance in kilometers between two points."""
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = (sin(dlat / 2) ** 2 +
+         cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a)))
+
+
+class TextIndex:
+    """Represent an inverted index of the words of a text attribute.
+
+    Words are the lowercased runs of letters and digits. Added objects
+    wait in pending until the next search, so a reload does not tokenize
+    every text up front. Searches rank the objects holding any word of
+    the query with BM25 and only read the postings of those words.
+
+    Attributes:
+        attr (str): The name of the indexed attribute.
+        postings (dict): Words mapped to the dictionary of the keys of the
+            objects holding them and the number of occurrences.
+        lengths (dict): Keys mapped to the number of words of their text.
+        total (int): The number of words of every indexed text.
+        objs (dict): The indexed objects, keyed like FileStorage.__objects.
+        pending (dict): Objects added since the last search, by key.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, attr):
+        """Initialize a new TextIndex.
+
+        Args:
+            attr (str): The name of the attribute to index.
+        """
+        self.attr = attr
+        self.postings = {}
+        self.lengths = {}
+        self.total = 0
+        self.objs = {}
+        self.pending = {}
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.objs) + len(self.pending)
+
+    @staticmethod
+    def tokenize(text):
+        """Return the list of the words of text."""
+        if type(text) is not str:
+            return []
+        return _WORD.findall(text.lower())
+
+    def add(self, key, obj):
+        """Index obj under the words of its attribute."""
+        self.pending[key] = obj
+
+    def discard(self, key, value):
+        """Remove key from the postings of the words of value."""
+        if self.pending.pop(key, None) is not None:
+            return
+        if self.objs.pop(key, None) is None:
+            return
+        for word in set(self.tokenize(value)):
+            keys = self.postings.get(word)
+            if keys is not None:
+                keys.pop(key, None)
+                if len(keys) == 0:
+                    del self.postings[word]
+        self.total -= self.lengths.pop(key)
+
+    def settle(self):
+        """Tokenize the pending objects into the postings."""
+        for key, obj in self.pending.items():
+            words = self.tokenize(getattr(obj, self.attr, None))
+            for word in words:
+                keys = self.postings.setdefault(word, {})
+                keys[key] = keys.get(key, 0) + 1
+            self.lengths[key] = len(words)
+            self.total += len(words)
+            self.objs[key] = obj
+        self.pending = {}
+
+    def get(self, value):
+        """Return None: the index does not look up whole values."""
+        return None
+
+    def search(self, text, limit=None):
+        """Return the (score, key, object) triples matching text.
+
+        An object matches if its text holds any word of text; the
+        triples are sorted best first.
+
+        Args:
+            text (str): The words to look for.
+            limit (int): The maximum number of triples, or None.
+        """
+        if self.pending:
+            self.settle()
+        words = set(self.tokenize(text))
+        if not words or not self.objs:
+            return []
+        count = len(self.objs)
+        lengths = self.lengths
+        k1 = self.k1
+        base = k1 * (1 - self.b)
+        scale = k1 * self.b / (self.total / count or 1)
+        scores = {}
+        get = scores.get
+        for word in words:
+            keys = self.postings.get(word)
+            if keys is None:
+                continue
+            idf = log(1 + (count - len(keys) + 0.5) / (len(keys) + 0.5))
+            weight = idf * (k1 + 1)
+            for key, freq in keys.items():
+                scores[key] = get(key, 0) + weight * freq / (
+                    freq + base + scale * lengths[key])
+        if limit is None:
+            ranked = sorted(scores.items(), key=_best_first)
+        else:
+            ranked = nsmallest(limit, scores.items(), key=_best_first)
+        return [(score, key, self.objs[key]) for key, score in ranked]
+
+
+def _best_first(item):
+    """Return the sort key of a (key, score) pair, best score first."""
+    return -item[1], item[0]
+
+
+class MembershipIndex:
+    """Represent a bitmap index of stored objects by the items of a list.
+
+    Each indexed object gets a slot number, and each item of the list
+    attribute maps to an int whose set bits are the slots of the objects
+    holding it, so objects holding all or any of several items are found
+    with one & or | per item. Freed slots are reused. The items of each
+    object are remembered, so a list changed in place is still removed
+    from the right bitmaps. Added objects wait in pending until the next
+    read, which sets the bits of many objects at once.
+
+    Attributes:
+        attr (str): The name of the indexed attribute.
+        bitmaps (dict): Items mapped to the bitmap of their objects.
+        members (dict): Keys mapped to the tuple of the items of their
+            object.
+        slots (dict): Keys mapped to their slot.
+        keys (list): The key of each slot, or None for a free slot.
+        objs (dict): The indexed objects, keyed like FileStorage.__objects.
+        free (list): The free slots.
+        pending (dict): Objects added since the last read, by key.
+    """
+
+    def __init__(self, attr):
+        """Initialize a new MembershipIndex.
+
+        Args:
+            attr (str): The name of the list attribute to index.
+        """
+        self.attr = attr
+        self.bitmaps = {}
+        self.members = {}
+        self.slots = {}
+        self.keys = []
+        self.objs = {}
+        self.free = []
+        self.pending = {}
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.objs) + len(self.pending)
+
+    @staticmethod
+    def items(value):
+        """Return the tuple of the distinct hashable items of a list."""
+        if not isinstance(value, (list, tuple, set, frozenset)):
+            return ()
+        try:
+            return tuple(dict.fromkeys(value))
+        except TypeError:
+            items = {}
+            for item in value:
+                try:
+                    items[item] = None
+                except TypeError:
+                    pass
+            return tuple(items)
+
+    def add(self, key, obj):
+        """Index obj under the items of its attribute."""
+        self.discard(key)
+        self.pending[key] = obj
+
+    def discard(self, key, value=None):
+        """Remove key from the bitmaps of the items of its object.
+
+        Args:
+            key (str): The key of the object.
+            value (any): Unused: the items indexed for key are removed.
+        """
+        if self.pending.pop(key, None) is not None:
+            return
+        slot = self.slots.pop(key, None)
+        if slot is None:
+            return
+        mask = ~(1 << slot)
+        for item in self.members.pop(key):
+            bits = self.bitmaps[item] & mask
+            if bits:
+                self.bitmaps[item] = bits
+            else:
+                del self.bitmaps[item]
+        del self.objs[key]
+        self.keys[slot] = None
+        self.free.append(slot)
+
+    def settle(self):
+        """Set the bits of the pending objects."""
+        by_item = {}
+        attr = self.attr
+        items = self.items
+        keys = self.keys
+        free = self.free
+        slots = self.slots
+        members = self.members
+        self.objs.update(self.pending)
+        for key, obj in self.pending.items():
+            if free:
+                slot = free.pop()
+                keys[slot] = key
+            else:
+                slot = len(keys)
+                keys.append(key)
+            slots[key] = slot
+            members[key] = held = items(getattr(obj, attr, None))
+            for item in held:
+                found = by_item.get(item)
+                if found is None:
+                    by_item[item] = [slot]
+                else:
+                    found.append(slot)
+        self.pending = {}
+        size = (len(keys) + 7) // 8
+        for item, found in by_item.items():
+            if len(found) < 8:
+                bits = 0
+                for slot in found:
+                    bits |= 1 << slot
+            else:
+                buf = bytearray(size)
+                for slot in found:
+                    buf[slot >> 3] |= 1 << (slot & 7)
+                bits = int.from_bytes(buf, "little")
+            self.bitmaps[item] = self.bitmaps.get(item, 0) | bits
+
+    def get(self, value):
+        """Return None: the index does not look up whole lists."""
+        return None
+
+    def bits(self, items, match_any=False):
+        """Return the bitmap of the objects holding all or any of items."""
+        if self.pending:
+            self.settle()
+        found = None
+        for item in items:
+            try:
+                bits = self.bitmaps.get(item, 0)
+            except TypeError:
+                bits = 0
+            if found is None:
+                found = bits
+            elif match_any:
+                found |= bits
+            else:
+                found &= bits
+            if not found and not match_any:
+                break
+        return found or 0
+
+    def select(self, items, match_any=False):
+        """Return the objects holding all of items, or any if match_any.
+
+        The objects are in slot order, which is the order they were
+        indexed in until slots are reused.
+        """
+        bits = self.bits(items, match_any)
+        found = []
+        if bits == 0:
+            return found
+        digits = format(bits, "b")[::-1]
+        keys = self.keys
+        objs = self.objs
+        slot = digits.find("1")
+        while slot != -1:
+            found.append(objs[keys[slot]])
+            slot = digits.find("1", slot + 1)
+        return found
@@ -0,0 +1,526 @@
+#!/usr/bin/python3
+"""Defines the where queries, their planner, the spatial, text and
+membership searches, and the aggregates."""
+import heapq
+import re
+from ast import literal_eval
+from itertools import islice
+from models.base_model import classes
+from models.engine.indexes import AttributeIndex, GridIndex, MembershipIndex
+from models.engine.indexes import RangeIndex
+from models.engine.indexes import TextIndex
+
+AGGREGATES = ("count", "sum", "avg", "min", "max")
+
+# One condition of a where clause: <attribute> <operator> <value>.
+_CONDITION = re.compile(
+    r"""(\w+)\s*(<=|>=|!=|==|=|<|>|\s+in\s+)\s*("(?:[^"\\]|\\.)*"|"""
+    r"""'(?:[^'\\]|\\.)*'|\[[^\]]*\]|[^,\s]+)\s*,?\s*""")
+
+
+class Condition:
+    """Represent a condition on an attribute of the queried objects.
+
+    Attributes:
+        attr (str): The name of the attribute.
+        op (str): One of =, !=, <, <=, >, >= and in.
+        value (any): The value compared to, a list for in.
+    """
+
+    def __init__(self, attr, op, value):
+        """Initialize a new Condition.
+
+        Raises:
+            ValueError: If op is unknown, or value is not a list for in.
+        """
+        if op not in ("=", "!=", "<", "<=", ">", ">=", "in"):
+            raise ValueError("unknown operator {}".format(op))
+        if op == "in" and not isinstance(value, (list, tuple, set)):
+            raise ValueError("{} in: expected a list".format(attr))
+        self.attr = attr
+        self.op = op
+        self.value = value
+
+    def matches(self, obj):
+        """Return True if the attribute of obj satisfies the condition.
+
+        Values that cannot be compared never match.
+        """
+        value = getattr(obj, self.attr, None)
+        try:
+            if self.op == "=":
+                return value == self.value
+            if self.op == "!=":
+                return value != self.value
+            if self.op == "in":
+                return value in self.value
+            if value is None:
+                return False
+            if self.op == "<":
+                return value < self.value
+            if self.op == "<=":
+                return value <= self.value
+            if self.op == ">":
+                return value > self.value
+            return value >= self.value
+        except TypeError:
+            return False
+
+    def __str__(self):
+        """Return the condition as written in a where clause."""
+        return "{} {} {!r}".format(self.attr, self.op, self.value)
+
+
+class Plan:
+    """Represent the way a Query reads its candidate objects.
+
+    Attributes:
+        access (str): How the candidates are found, for explain().
+        candidates (iterable): The objects the conditions are checked on.
+        estimate (int): The number of candidates.
+        ordered (bool): Whether the candidates come in the order of the
+            query.
+    """
+
+    def __init__(self, access, candidates, estimate, ordered=False):
+        """Initialize a new Plan."""
+        self.access = access
+        self.candidates = candidates
+        self.estimate = estimate
+        self.ordered = ordered
+
+    def cheaper(self, other):
+        """Return True if the plan reads fewer candidates than other."""
+        return other is None or (self.estimate, not self.ordered) < (
+            other.estimate, not other.ordered)
+
+
+class Query:
+    """Represent a query on the stored objects of a class.
+
+    Attributes:
+        cls_name (str): The class of the objects.
+        conditions (list): The Condition every result satisfies.
+        order_by (str): The attribute results are sorted by, or None.
+        descending (bool): Whether the order is descending.
+        limit (int): The maximum number of results, or None.
+    """
+
+    def __init__(self, cls_name, conditions=(), order_by=None,
+                 descending=False, limit=None):
+        """Initialize a new Query."""
+        self.cls_name = cls_name
+        self.conditions = list(conditions)
+        self.order_by = order_by
+        self.descending = descending
+        self.limit = limit
+
+    def plan(self, storage):
+        """Return the cheapest Plan of the query on storage.
+
+        An = or in condition on an attribute storage has an index for
+        reads only the matching index entries, and the <, <=, > and >=
+        conditions on an attribute with a RangeIndex read only the span
+        of values between their bounds; the plan with the fewest
+        candidates is used. Without any, an ordered and limited query
+        reads the RangeIndex of its order attribute until it has enough
+        results, and other queries scan every object of the class. On an
+        engine with rows(), like ColumnStorage, every condition is checked
+        over its column and only the matching objects are built.
+        """
+        if hasattr(storage, "rows"):
+            rows = storage.rows(self.cls_name, self.conditions)
+            return Plan("columns", storage.objects(self.cls_name, rows),
+                        len(rows))
+        best = None
+        bounds = {}
+        for cond in self.conditions:
+            if cond.op in ("<", "<=", ">", ">="):
+                if RangeIndex.indexable(cond.value):
+                    bounds.setdefault(cond.attr, []).append(cond)
+                continue
+            if cond.op not in ("=", "in"):
+                continue
+            index = storage.index(self.cls_name, cond.attr)
+            if index is None:
+                continue
+            values = [cond.value] if cond.op == "=" else cond.value
+            candidates = {}
+            for value in values:
+                entry = index.get(value)
+                if entry is None:
+                    break
+                candidates.update(entry)
+            else:
+                plan = Plan("index {}".format(cond), candidates.values(),
+                            len(candidates))
+                if plan.cheaper(best):
+                    best = plan
+        for attr, conds in bounds.items():
+            index = storage.index(self.cls_name, attr)
+            if isinstance(index, RangeIndex):
+                plan = self.__range_plan(index, conds)
+                if plan.cheaper(best):
+                    best = plan
+        if best is None and self.order_by is not None and \
+                self.limit is not None:
+            index = storage.index(self.cls_name, self.order_by)
+            if isinstance(index, RangeIndex) and not index.skipped:
+                best = self.__range_plan(index, [])
+        if best is None:
+            best = Plan("scan", storage.all(self.cls_name).values(),
+                        storage.count(self.cls_name))
+        return best
+
+    def __range_plan(self, index, conds):
+        """Return the Plan reading the span of a RangeIndex within conds."""
+        lo = hi = None
+        lo_inclusive = hi_inclusive = True
+        for cond in conds:
+            inclusive = cond.op in ("<=", ">=")
+            if cond.op in (">", ">="):
+                if lo is None or cond.value > lo or (
+                        cond.value == lo and not inclusive):
+                    lo, lo_inclusive = cond.value, inclusive
+            elif hi is None or cond.value < hi or (
+                    cond.value == hi and not inclusive):
+                hi, hi_inclusive = cond.value, inclusive
+        start, stop = index.span(lo, hi, lo_inclusive, hi_inclusive)
+        ordered = self.order_by == index.attr
+        return Plan("range {}".format(
+            " and ".join(str(cond) for cond in conds) or index.attr),
+            index.range(lo, hi, lo_inclusive, hi_inclusive,
+                        ordered and self.descending),
+            stop - start, ordered)
+
+    def run(self, storage):
+        """Return the list of objects of storage matching the query.
+
+        Raises:
+            ValueError: If the results cannot be ordered.
+        """
+        plan = self.plan(storage)
+        objs = (obj for obj in plan.candidates
+                if all(cond.matches(obj) for cond in self.conditions))
+        if self.order_by is None or plan.ordered:
+            return list(islice(objs, self.limit))
+
+        def key(obj):
+            return getattr(obj, self.order_by, None)
+
+        try:
+            if self.limit is not None:
+                pick = heapq.nlargest if self.descending else heapq.nsmallest
+                return pick(self.limit, objs, key=key)
+            return sorted(objs, key=key, reverse=self.descending)
+        except TypeError:
+            raise ValueError("cannot order by {}".format(
+                self.order_by)) from None
+
+    def explain(self, storage):
+        """Return the description of the plan of the query on storage."""
+        plan = self.plan(storage)
+        lines = ["{} {} ({} candidates)".format(self.cls_name, plan.access,
+                                                plan.estimate)]
+        for cond in self.conditions:
+            lines.append("filter {}".format(cond))
+        if self.order_by is not None:
+            lines.append("order by {}{}{}".format(
+                self.order_by, " desc" if self.descending else "",
+                " (index order)" if plan.ordered else ""))
+        if self.limit is not None:
+            lines.append("limit {}".format(self.limit))
+        return "\n".join(lines)
+
+
+def parse_where(cls_name, text):
+    """Return the Query of a where clause.
+
+    The clause is a comma or space separated list of conditions such as
+    city_id="0001", price_by_night<100 or name in ["a", "b"]. Values are
+    Python literals, bare words being strings. order_by=<attribute>, or
+    order_by=-<attribute> for a descending order, and limit=<n> are
+    options rather than conditions.
+
+    Args:
+        cls_name (str): The class of the objects.
+        text (str): The where clause.
+    Raises:
+        ValueError: If the clause cannot be parsed.
+    """
+    query = Query(cls_name)
+    text = text.strip()
+    pos = 0
+    while pos < len(text):
+        match = _CONDITION.match(text, pos)
+        if match is None:
+            raise ValueError("invalid condition {}".format(text[pos:]))
+        attr, op, raw = match.groups()
+        op = op.strip()
+        pos = match.end()
+        try:
+            value = literal_eval(raw)
+        except (ValueError, SyntaxError):
+            value = raw
+        if op == "=" and attr == "order_by":
+            if type(value) is not str:
+                raise ValueError("order_by: expected an attribute name")
+            query.descending = value.startswith("-")
+            query.order_by = value.lstrip("-")
+        elif op == "=" and attr == "limit":
+            if type(value) is not int or value < 0:
+                raise ValueError("limit: expected a number")
+            query.limit = value
+        else:
+            query.conditions.append(
+                Condition(attr, "=" if op == "==" else op, value))
+    return query
+
+
+def _grid(storage, cls_name):
+    """Return the GridIndex of a class, built by a scan if storage has none.
+
+    Raises:
+        ValueError: If the class has no coordinates.
+    """
+    geo = classes[cls_name]._geo_index
+    if not geo:
+        raise ValueError("{} has no coordinates".format(cls_name))
+    index = storage.index(cls_name, geo[0])
+    if not isinstance(index, GridIndex):
+        index = GridIndex(*geo)
+        for key, obj in storage.all(cls_name).items():
+            index.add(key, obj)
+    return index
+
+
+def within(storage, cls_name, min_lat, min_lon, max_lat, max_lon):
+    """Return the objects of a class inside a bounding box.
+
+    Args:
+        storage (FileStorage or DBStorage): The storage engine.
+        cls_name (str): A class with a _geo_index.
+        min_lat (float): The southern edge of the box.
+        min_lon (float): The western edge; greater than max_lon for a box
+            crossing the antimeridian.
+        max_lat (float): The northern edge of the box.
+        max_lon (float): The eastern edge of the box.
+    Raises:
+        ValueError: If the class has no coordinates.
+    """
+    return list(_grid(storage, cls_name).bbox(min_lat, min_lon,
+                                              max_lat, max_lon))
+
+
+def near(storage, cls_name, lat, lon, km):
+    """Return the objects of a class within km of a point, nearest first.
+
+    Args:
+        storage (FileStorage or DBStorage): The storage engine.
+        cls_name (str): A class with a _geo_index.
+        lat (float): The latitude of the point.
+        lon (float): The longitude of the point.
+        km (float): The radius in kilometers.
+    Raises:
+        ValueError: If the class has no coordinates.
+    """
+    return [obj for distance, obj in _grid(storage, cls_name).radius(
+        lat, lon, km)]
+
+
+def search(storage, text, cls_name=None, limit=None):
+    """Return the objects whose indexed texts hold words of text, best first.
+
+    Each text attribute named in the _text_indexes tuple of a class is
+    searched through its TextIndex, built by a scan if storage has none;
+    an object matching in several attributes adds up their scores.
+
+    Args:
+        storage (FileStorage or DBStorage): The storage engine.
+        text (str): The words to look for.
+        cls_name (str): The class to search, or None for every class with
+            indexed texts.
+        limit (int): The maximum number of results, or None.
+    Raises:
+        ValueError: If the class has no indexed text.
+    """
+    if cls_name is not None and not classes[cls_name]._text_indexes:
+        raise ValueError("{} has no indexed text".format(cls_name))
+    indexes = []
+    for name in [cls_name] if cls_name else list(classes):
+        for attr in classes[name]._text_indexes:
+            index = storage.index(name, attr)
+            if not isinstance(index, TextIndex):
+                index = TextIndex(attr)
+                for key, obj in storage.all(name).items():
+                    index.add(key, obj)
+            indexes.append(index)
+    if len(indexes) == 1:
+        return [obj for score, key, obj in indexes[0].search(text, limit)]
+    scores = {}
+    for index in indexes:
+        for score, key, obj in index.search(text):
+            total = scores.get(key, (0, obj))[0] + score
+            scores[key] = (total, obj)
+    ranked = sorted(scores.items(), key=lambda item: (-item[1][0], item[0]))
+    return [obj for key, (score, obj) in ranked[:limit]]
+
+
+def having(storage, cls_name, attr, items, match_any=False):
+    """Return the objects of a class whose list attr holds all of items.
+
+    The list must be named in the _member_indexes tuple of the class; its
+    MembershipIndex is built by a scan if storage has none.
+
+    Args:
+        storage (FileStorage or DBStorage): The storage engine.
+        cls_name (str): The class of the objects.
+        attr (str): The list attribute, such as Place.amenity_ids.
+        items (list): The items to look for.
+        match_any (bool): Whether holding any of items is enough.
+    Raises:
+        ValueError: If attr is not an indexed list or items is empty.
+    """
+    if attr not in classes[cls_name]._member_indexes:
+        raise ValueError("{}.{} is not an indexed list".format(cls_name,
+                                                               attr))
+    if len(items) == 0:
+        raise ValueError("items missing")
+    index = storage.index(cls_name, attr)
+    if not isinstance(index, MembershipIndex):
+        index = MembershipIndex(attr)
+        for key, obj in storage.all(cls_name).items():
+            index.add(key, obj)
+    return index.select(items, match_any)
+
+
+def aggregate(storage, cls_name, func, attr=None, by=None, conditions=()):
+    """Return an aggregate of an attribute over the objects of a class.
+
+    An engine with its own aggregate(), like ColumnStorage, computes it
+    over its columns. On the other engines
+    the objects matching conditions are read once, through the indexes
+    the where planner would use, and each is added to the total of its
+    group; a count grouped by an indexed attribute without conditions
+    only reads the sizes of the index entries.
+
+    Args:
+        storage (FileStorage, DBStorage or ColumnStorage): The storage
+            engine.
+        cls_name (str): The class of the objects.
+        func (str): "count", "sum", "avg", "min" or "max".
+        attr (str): The aggregated attribute, unused for count. Values
+            that are not numbers are left out.
+        by (str): An attribute to group the objects by, or None.
+        conditions (list): The Condition every object satisfies.
+    Returns:
+        The aggregate, None for the avg, min or max of no value; with
+        by, a dictionary of the values of by mapped to the aggregate of
+        their objects.
+    Raises:
+        ValueError: If func is unknown, attr is missing or is not a
+            number column of a ColumnStorage, or by holds unhashable
+            values.
+    """
+    if by is not None:
+        return dict(aggregate_groups(storage, cls_name, func, attr, by,
+                                     conditions))
+    _check_aggregate(func, attr)
+    if hasattr(storage, "aggregate"):
+        return storage.aggregate(cls_name, func, attr, None, conditions)
+    results = _fold(func, attr, None, _matching(storage, cls_name,
+                                                conditions))
+    if func in ("count", "sum"):
+        return results.get(None, 0)
+    return results.get(None)
+
+
+def aggregate_groups(storage, cls_name, func, attr, by, conditions=()):
+    """Yield the aggregate of an attribute for each group of objects.
+
+    Without conditions, when by has an AttributeIndex, the groups are
+    the entries of the index and each is yielded as soon as it is
+    computed, so that the first results of many groups come before the
+    last ones are read. Otherwise the objects are read once as in
+    aggregate() and the groups are yielded once all are totalled.
+
+    Args:
+        storage (FileStorage, DBStorage or ColumnStorage): The storage
+            engine.
+        cls_name (str): The class of the objects.
+        func (str): "count", "sum", "avg", "min" or "max".
+        attr (str): The aggregated attribute, unused for count.
+        by (str): The attribute to group the objects by.
+        conditions (list): The Condition every object satisfies.
+    Yields:
+        tuple: A value of by and the aggregate of its objects. Groups
+        with no number to aggregate are left out.
+    Raises:
+        ValueError: As aggregate().
+    """
+    _check_aggregate(func, attr)
+    index = None
+    if len(conditions) == 0 and not hasattr(storage, "aggregate"):
+        index = storage.index(cls_name, by)
+    if isinstance(index, AttributeIndex):
+        for value, objs in list(index.entries.items()):
+            if func == "count":
+                yield value, len(objs)
+                continue
+            results = _fold(func, attr, None, objs.values())
+            if None in results:
+                yield value, results[None]
+        return
+    try:
+        if hasattr(storage, "aggregate"):
+            results = storage.aggregate(cls_name, func, attr, by,
+                                        conditions)
+        else:
+            results = _fold(func, attr, by, _matching(storage, cls_name,
+                                                      conditions))
+    except TypeError:
+        raise ValueError("cannot group by {}".format(by)) from None
+    yield from results.items()
+
+
+def _check_aggregate(func, attr):
+    """Raise ValueError if func is unknown or needs a missing attr."""
+    if func not in AGGREGATES:
+        raise ValueError("unknown aggregate {}".format(func))
+    if func != "count" and attr is None:
+        raise ValueError("attribute name missing")
+
+
+def _matching(storage, cls_name, conditions):
+    """Return the objects of a class matching every condition."""
+    if len(conditions) > 0:
+        return Query(cls_name, conditions).run(storage)
+    return storage.all(cls_name).values()
+
+
+def _fold(func, attr, by, objs):
+    """Return the values of by mapped to the aggregate of their objects.
+
+    Raises:
+        TypeError: If by holds an unhashable value.
+    """
+    totals = {}
+    for obj in objs:
+        value = 1 if func == "count" else getattr(obj, attr, None)
+        if type(value) not in (int, float, bool):
+            continue
+        key = None if by is None else getattr(obj, by, None)
+        total = totals.get(key)
+        if total is None:
+            totals[key] = [1, value]
+        elif func in ("count", "sum", "avg"):
+            total[0] += 1
+            total[1] += value
+        elif func == "min" and value < total[1] or \
+                func == "max" and value > total[1]:
+            total[1] = value
+    if func == "count":
+        return {key: total[0] for key, total in totals.items()}
+    if func == "avg":
+        return {key: total[1] / total[0] for key, total in totals.items()}
+    return {key: total[1] for key, total in totals.items()}
@@ -0,0 +1,308 @@
+#!/usr/bin/python3
+"""Defines the SnapshotStorage class and the snapshot file writer.
+
+A snapshot is a read-only binary image of the store, laid out so it can
+be memory-mapped and read without parsing the whole file:
+
+    magic       8 bytes, b"HBNBSNP1"
+    footer      8 bytes, little-endian offset of the footer
+    records     the JSON of to_dict() of each object, one per line,
+                the objects of a class being contiguous
+    indexes     for each class, one 28-byte entry per object sorted by
+                the 16-byte BLAKE2 digest of its id, followed by the
+                offset and length of its record
+    footer      JSON mapping each class name to the [start, end] span of
+                its records and the [offset, count] of its index
+"""
+import json
+import mmap
+import os
+import struct
+import weakref
+from hashlib import blake2b
+from models.base_model import BaseModel, classes
+from models.engine.common import Table
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+from models.amenity import Amenity
+from models.review import Review
+
+_MAGIC = b"HBNBSNP1"
+_HEADER = struct.Struct("<8sQ")
+_ENTRY = struct.Struct("<16sQI")
+
+
+def _digest(oid):
+    """Return the 16-byte digest of an id the indexes are sorted by."""
+    return blake2b(oid.encode("utf-8"), digest_size=16).digest()
+
+
+def write_snapshot(storage, path):
+    """Write a snapshot of every object of storage to path.
+
+    The file is written next to path and moved over it once complete, so
+    the processes reading the previous snapshot keep their mapping.
+
+    Args:
+        storage (FileStorage, DBStorage or ColumnStorage): The storage
+            engine to copy.
+        path (str): The snapshot file.
+    Returns:
+        int: The number of objects written.
+    """
+    tmp_path = path + ".tmp"
+    footer = {}
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, 0))
+        entries = {}
+        for cls_name in classes:
+            start = f.tell()
+            cls_entries = []
+            for obj in storage.all(cls_name).values():
+                line = json.dumps(obj.to_dict()).encode("utf-8")
+                cls_entries.append((_digest(obj.id), f.tell(), len(line)))
+                f.write(line + b"\n")
+            if cls_entries:
+                entries[cls_name] = cls_entries
+                footer[cls_name] = [[start, f.tell()], None]
+        for cls_name, cls_entries in entries.items():
+            cls_entries.sort()
+            footer[cls_name][1] = [f.tell(), len(cls_entries)]
+            for entry in cls_entries:
+                f.write(_ENTRY.pack(*entry))
+        offset = f.tell()
+        f.write(json.dumps(footer).encode("utf-8"))
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, offset))
+    os.replace(tmp_path, path)
+    return sum(len(cls_entries) for cls_entries in entries.values())
+
+
+class SnapshotStorage:
+    """Represent a read-only storage engine over a memory-mapped snapshot.
+
+    Only the footer is parsed on reload. show reads one record found by a
+    binary search of the index of its class, scans read the records of
+    their class in order, and the pages of the file are shared by every
+    process mapping it.
+
+    Attributes:
+        __file_path (str): The snapshot file (HBNB_SNAPSHOT_PATH, default
+            file.snapshot), written with write_snapshot().
+        __map (mmap.mmap): The mapping of the file, or None if missing.
+        __classes (dict): Class names mapped to the [start, end] span of
+            their records and the [offset, count] of their index.
+        __objects (WeakValueDictionary): The objects built from records,
+            keyed <class name>.id, while referenced elsewhere.
+    """
+
+    def __init__(self):
+        """Initialize a new SnapshotStorage."""
+        self.__file_path = os.getenv("HBNB_SNAPSHOT_PATH", "file.snapshot")
+        self.__map = None
+        self.__classes = {}
+        self.__objects = weakref.WeakValueDictionary()
+
+    def all(self, cls=None):
+        """Return a dictionary of the objects, or of the objects of a class.
+
+        Args:
+            cls (type or str): The class, or class name, to return.
+        """
+        if cls is not None and not isinstance(cls, str):
+            cls = cls.__name__
+        return Table(self, cls)
+
+    def get(self, cls, id):
+        """Return the object of a class with the given id, or None.
+
+        Args:
+            cls (type or str): The class, or class name, of the object.
+            id (str): The id of the object.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if cls not in self.__classes:
+            return None
+        obj = self.__objects.get("{}.{}".format(cls, id))
+        if obj is not None:
+            return obj
+        offset, count = self.__classes[cls][1]
+        digest = _digest(id)
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = offset + mid * _ENTRY.size
+            if self.__map[pos:pos + 16] < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < count:
+            key, start, length = _ENTRY.unpack_from(
+                self.__map, offset + lo * _ENTRY.size)
+            if key != digest:
+                break
+            obj = self.__build(self.__map[start:start + length])
+            if obj.id == id:
+                return obj
+            lo += 1
+        return None
+
+    def count(self, cls=None):
+        """Return the number of objects, or of objects of a class.
+
+        Args:
+            cls (type or str): The class, or class name, to count.
+        """
+        if cls is not None and not isinstance(cls, str):
+            cls = cls.__name__
+        if cls is not None:
+            return self.__classes[cls][1][1] if cls in self.__classes else 0
+        return sum(span[1][1] for span in self.__classes.values())
+
+    def scan(self, cls=None):
+        """Yield the objects of a class, or of every class, one at a time.
+
+        Args:
+            cls (type or str): The class, or class name, to read.
+        """
+        if cls is not None and not isinstance(cls, str):
+            cls = cls.__name__
+        if cls is not None and cls not in self.__classes:
+            return
+        for name in [cls] if cls else list(self.__classes):
+            pos, end = self.__classes[name][0]
+            while pos < end:
+                stop = self.__map.find(b"\n", pos, end)
+                yield self.__build(self.__map[pos:stop])
+                pos = stop + 1
+
+    def find(self, cls, **attrs):
+        """Return the objects of a class whose attributes match attrs.
+
+        Args:
+            cls (type or str): The class, or class name, to search.
+            **attrs: Attribute names mapped to the value to match.
+        """
+        return [obj for obj in self.scan(cls)
+                if all(getattr(obj, attr, None) == value
+                       for attr, value in attrs.items())]
+
+    def index(self, cls, attr):
+        """Return None: a snapshot has no attribute indexes."""
+        return None
+
+    def new(self, obj):
+        """Refuse to add obj to the snapshot.
+
+        Raises:
+            PermissionError: Always, as the snapshot is read-only.
+        """
+        self.__refuse()
+
+    def delete(self, obj=None):
+        """Refuse to delete obj from the snapshot.
+
+        Raises:
+            PermissionError: If obj is not None, as the snapshot is
+                read-only.
+        """
+        if obj is not None:
+            self.__refuse()
+
+    def reindex(self, obj, attr, old):
+        """Do nothing: changes to objects are never written back."""
+        pass
+
+    def save(self):
+        """Refuse to save changes to the snapshot.
+
+        Raises:
+            PermissionError: Always, as the snapshot is read-only.
+        """
+        self.__refuse()
+
+    def begin(self):
+        """Refuse to open a batch of changes.
+
+        Raises:
+            PermissionError: Always, as the snapshot is read-only.
+        """
+        self.__refuse()
+
+    def commit(self):
+        """Refuse to save a batch of changes.
+
+        Raises:
+            PermissionError: Always, as the snapshot is read-only.
+        """
+        self.__refuse()
+
+    def transaction(self):
+        """Refuse to run a block of changes.
+
+        Raises:
+            PermissionError: Always, as the snapshot is read-only.
+        """
+        self.__refuse()
+
+    def reload(self):
+        """Map the snapshot file and read its footer.
+
+        The store is empty if the file does not exist.
+
+        Raises:
+            ValueError: If the file is not a snapshot.
+        """
+        self.close()
+        self.__objects = weakref.WeakValueDictionary()
+        try:
+            with open(self.__file_path, "rb") as f:
+                self.__map = mmap.mmap(f.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            raise ValueError("{} is not a snapshot".format(
+                self.__file_path)) from None
+        magic = None
+        if len(self.__map) >= _HEADER.size:
+            magic, offset = _HEADER.unpack_from(self.__map)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError("{} is not a snapshot".format(
+                self.__file_path))
+        self.__classes = {name: span for name, span in json.loads(
+            self.__map[offset:]).items() if name in classes}
+
+    def close(self):
+        """Unmap the snapshot file."""
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+        self.__classes = {}
+
+    def __refuse(self):
+        """Drop the changed objects and raise PermissionError.
+
+        Objects changed in memory are forgotten so that later reads
+        return them as stored in the snapshot.
+        """
+        for obj in BaseModel.pop_dirty():
+            key = "{}.{}".format(obj.__class__.__name__, obj.id)
+            if self.__objects.get(key) is obj:
+                del self.__objects[key]
+        raise PermissionError("snapshot storage is read-only")
+
+    def __build(self, line):
+        """Return the object of a record, from the identity map if built."""
+        record = json.loads(line)
+        cls_name = record.pop("__class__")
+        key = "{}.{}".format(cls_name, record["id"])
+        obj = self.__objects.get(key)
+        if obj is None:
+            obj = classes[cls_name](**record)
+            self.__objects[key] = obj
+        return obj
@@ -0,0 +1,241 @@
+#!/usr/bin/python3
+"""Defines the bulk transfer of records between files and storage."""
+import csv
+import gzip
+import io
+import json
+import models
+from uuid import uuid4
+from models.base_model import classes
+
+
+def attribute_types(cls):
+    """Return the declared attributes of a model class and their types.
+
+    The types are those of the class attribute defaults, looked up along
+    the MRO; only str, int, float and list attributes are declared.
+
+    Args:
+        cls (type): The model class.
+    """
+    types = {}
+    for klass in reversed(cls.__mro__):
+        for attr in vars(klass):
+            if (not attr.startswith("_") and
+                    type(getattr(klass, attr)) in (str, int, float, list)):
+                types[attr] = type(getattr(klass, attr))
+    return types
+
+
+def _convert(value, kind):
+    """Return value as an instance of kind, or raise ValueError.
+
+    Strings, as read from CSV, are parsed; other values must already have
+    the expected type, an int being accepted for a float.
+    """
+    if type(value) is kind:
+        return value
+    if kind is float and type(value) is int:
+        return float(value)
+    if type(value) is str:
+        if kind is list:
+            value = json.loads(value)
+            if type(value) is list:
+                return value
+        else:
+            return kind(value)
+    raise ValueError("expected {}".format(kind.__name__))
+
+
+def _open(path, mode):
+    """Open a text file, through gzip if its name ends with .gz."""
+    if path.lower().endswith(".gz"):
+        return gzip.open(path, mode + "t", newline="")
+    return open(path, mode, newline="")
+
+
+def _format(path):
+    """Return the format told from the extension of path."""
+    name = path.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    return "csv" if name.endswith(".csv") else "jsonl"
+
+
+def _records(f, fmt):
+    """Yield the (line number, record) pairs read from the file f."""
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, {k: v for k, v in row.items()
+                                    if k is not None and v != ""}
+        return
+    for number, line in enumerate(f, 1):
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise ValueError(
+                    "line {}: invalid JSON".format(number)) from None
+            if type(record) is not dict:
+                raise ValueError("line {}: not an object".format(number))
+            yield number, record
+
+
+def _build(record, cls_name, types):
+    """Return the instance of a record, or raise ValueError if invalid.
+
+    Args:
+        record (dict): The attributes read, converted in place.
+        cls_name (str): The class of records without a __class__ field.
+        types (dict): Class names mapped to their attribute_types(), filled
+            as classes are met.
+    """
+    cls_name = record.pop("__class__", cls_name)
+    if cls_name is None:
+        raise ValueError("class name missing")
+    if cls_name not in classes:
+        raise ValueError("unknown class {}".format(cls_name))
+    cls = classes[cls_name]
+    if cls_name not in types:
+        types[cls_name] = attribute_types(cls)
+    for attr, kind in types[cls_name].items():
+        if attr in record:
+            try:
+                record[attr] = _convert(record[attr], kind)
+            except ValueError:
+                raise ValueError("{}: expected {}".format(
+                    attr, kind.__name__)) from None
+    for attr in ("id", "created_at", "updated_at"):
+        if attr in record and type(record[attr]) is not str:
+            raise ValueError("{}: expected str".format(attr))
+    record.setdefault("id", str(uuid4()))
+    return cls(**record)
+
+
+def bulk_import(path, cls_name=None, fmt=None):
+    """Add the records of a JSON Lines or CSV file to storage.
+
+    Every record is validated against the class attributes before any is
+    added, then they are all added in a single storage transaction, so a
+    file with an invalid record imports nothing. Each record names its
+    class in a __class__ field or column unless cls_name is given;
+    attributes not declared by the class are kept as they are, and
+    missing ids and timestamps are generated.
+
+    Args:
+        path (str): The file to read.
+        cls_name (str): The class of records without a __class__ field.
+        fmt (str): "jsonl" or "csv"; by default told from the extension,
+            a .gz file being read through gzip.
+    Returns:
+        int: The number of records imported.
+    Raises:
+        ValueError: If the format is unknown or a record is invalid.
+    """
+    if fmt is None:
+        fmt = _format(path)
+    if fmt not in ("jsonl", "csv"):
+        raise ValueError("unknown import format: {}".format(fmt))
+    objs = []
+    types = {}
+    with _open(path, "r") as f:
+        for number, record in _records(f, fmt):
+            try:
+                objs.append(_build(record, cls_name, types))
+            except ValueError as err:
+                raise ValueError("line {}: {}".format(number, err)) from None
+    with models.storage.transaction():
+        for obj in objs:
+            models.storage.new(obj)
+    return len(objs)
+
+
+def _select(cls_name, attrs):
+    """Return an iterable of the stored objects matching a filter."""
+    if cls_name is not None and attrs:
+        return models.storage.find(cls_name, **attrs)
+    objs = models.storage.all(cls_name).values()
+    if not attrs:
+        return objs
+    return (obj for obj in objs
+            if all(getattr(obj, attr, None) == value
+                   for attr, value in attrs.items()))
+
+
+def export_lines(cls_name=None, fmt="jsonl", **attrs):
+    """Yield the lines of an export of the stored objects, one at a time.
+
+    JSON Lines records are the to_dict() of the objects. CSV starts with a
+    header of __class__, id, the timestamps and the declared attributes of
+    the exported classes; lists are written as JSON and undeclared
+    attributes are left out.
+
+    Args:
+        cls_name (str): The class to export, or None for every class.
+        fmt (str): "jsonl" or "csv".
+        **attrs: Attribute names mapped to the value objects must have.
+    Raises:
+        ValueError: If the format or the class is unknown.
+    """
+    if fmt not in ("jsonl", "csv"):
+        raise ValueError("unknown export format: {}".format(fmt))
+    if cls_name is not None and cls_name not in classes:
+        raise ValueError("unknown class {}".format(cls_name))
+    return _export_lines(cls_name, fmt, attrs)
+
+
+def _export_lines(cls_name, fmt, attrs):
+    """Yield the lines of export_lines() once its arguments are checked."""
+    if fmt == "jsonl":
+        for obj in _select(cls_name, attrs):
+            yield json.dumps(obj.to_dict()) + "\n"
+        return
+    columns = ["__class__", "id", "created_at", "updated_at"]
+    for name in [cls_name] if cls_name else classes:
+        for attr in attribute_types(classes[name]):
+            if attr not in columns:
+                columns.append(attr)
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, columns, extrasaction="ignore")
+    writer.writeheader()
+    yield buf.getvalue()
+    for obj in _select(cls_name, attrs):
+        row = obj.to_dict()
+        for attr, value in row.items():
+            if isinstance(value, (list, dict)):
+                row[attr] = json.dumps(value)
+        buf.seek(0)
+        buf.truncate()
+        writer.writerow(row)
+        yield buf.getvalue()
+
+
+def export(path, cls_name=None, fmt=None, **attrs):
+    """Write the stored objects matching a filter to a file.
+
+    The export is streamed from export_lines(), so only one record is
+    held at a time.
+
+    Args:
+        path (str): The file to write, compressed with gzip if its name
+            ends with .gz.
+        cls_name (str): The class to export, or None for every class.
+        fmt (str): "jsonl" or "csv"; by default told from the extension.
+        **attrs: Attribute names mapped to the value objects must have.
+    Returns:
+        int: The number of records exported.
+    Raises:
+        ValueError: If the format or the class is unknown.
+    """
+    if fmt is None:
+        fmt = _format(path)
+    lines = export_lines(cls_name, fmt, **attrs)
+    count = 0
+    with _open(path, "w") as f:
+        if fmt == "csv":
+            f.write(next(lines))
+        for line in lines:
+            f.write(line)
+            count += 1
+    return count
@@ -20,6 +20,13 @@ class Place(BaseModel):
         amenity_ids (list): A list of Amenity ids.
     """
 
+    _indexes = ("city_id", "user_id")
+    _range_indexes = ("price_by_night", "max_guest", "number_rooms",
+                      "number_bathrooms")
+    _geo_index = ("latitude", "longitude")
+    _text_indexes = ("description",)
+    _member_indexes = ("amenity_ids",)
+
     city_id = ""
     user_id = ""
     name = ""
@@ -12,6 +12,9 @@ class Review(BaseModel):
         text (str): The text of the review.
     """
 
+    _indexes = ("place_id", "user_id")
+    _text_indexes = ("text",)
+
     place_id = ""
     user_id = ""
     text = ""
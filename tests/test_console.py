@@ -2,6 +2,10 @@
 # Defines unittests for console.py.
 
 
+import json
+import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 from io import StringIO
@@ -14,6 +18,8 @@ from models.place import Place
 from models.amenity import Amenity
 from models.review import Review
 from models import storage
+from models.engine.db_storage import DBStorage
+from models.engine.snapshot_storage import SnapshotStorage, write_snapshot
 
 
 class TestHBNBCommand(unittest.TestCase):
@@ -47,6 +53,24 @@ class TestHBNBCommand(unittest.TestCase):
             output = mock_stdout.getvalue().strip()
             self.assertTrue(output)  # Ensure an ID is printed
 
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_create_registered_class(self, mock_stdout):
+        """Test the create command with a newly defined model class."""
+        class Boat(BaseModel):
+            pass
+        self.cmd.onecmd('create Boat')
+        self.assertTrue(mock_stdout.getvalue().strip())
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_update_does_not_evaluate_code(self, mock_stdout):
+        """Test that update does not evaluate its arguments as code."""
+        instance = BaseModel()
+        storage.all = MagicMock(
+            return_value={f"BaseModel.{instance.id}": instance})
+        self.cmd.onecmd(f'update BaseModel {instance.id} print("x")')
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(output, '** value missing **')
+
     @patch('sys.stdout', new_callable=StringIO)
     def test_show(self, mock_stdout):
         """Test the show command."""
@@ -77,6 +101,84 @@ class TestHBNBCommand(unittest.TestCase):
         output = mock_stdout.getvalue().strip()
         self.assertIn(f"[BaseModel] ({instance.id}", output)
 
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_all_prints_list(self, mock_stdout):
+        """Test that all prints the instances like a list of strings."""
+        instances = [BaseModel() for i in range(3)]
+        storage.all = MagicMock(return_value={
+            f"BaseModel.{obj.id}": obj for obj in instances})
+        self.cmd.onecmd('all BaseModel')
+        self.assertEqual(mock_stdout.getvalue(),
+                         str([str(obj) for obj in instances]) + "\n")
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_all_empty(self, mock_stdout):
+        """Test the all command without instances."""
+        storage.all = MagicMock(return_value={})
+        self.cmd.onecmd('all BaseModel')
+        self.assertEqual(mock_stdout.getvalue(), "[]\n")
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_all_limit_offset(self, mock_stdout):
+        """Test paging through all with limit and offset."""
+        instances = [BaseModel() for i in range(5)]
+        storage.all = MagicMock(return_value={
+            f"BaseModel.{obj.id}": obj for obj in instances})
+        self.cmd.onecmd('all BaseModel limit=2 offset=1')
+        lines = mock_stdout.getvalue().splitlines()
+        self.assertEqual(lines, [
+            str([str(obj) for obj in instances[1:3]]),
+            f"cursor=BaseModel.{instances[2].id}"])
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_all_cursor(self, mock_stdout):
+        """Test continuing all from a cursor."""
+        instances = [BaseModel() for i in range(5)]
+        storage.all = MagicMock(return_value={
+            f"BaseModel.{obj.id}": obj for obj in instances})
+        self.cmd.onecmd(f'all BaseModel limit=3 '
+                        f'cursor=BaseModel.{instances[1].id}')
+        lines = mock_stdout.getvalue().splitlines()
+        self.assertEqual(lines, [str([str(obj) for obj in instances[2:]])])
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_all_reads_only_the_page(self, mock_stdout):
+        """Test that all skips to its page without reading the objects."""
+        instances = [BaseModel() for i in range(5)]
+
+        class Objects(dict):
+            read = []
+
+            def __getitem__(self, key):
+                self.read.append(key)
+                return super().__getitem__(key)
+
+            def items(self):
+                raise AssertionError("items() read every object")
+
+        storage.all = MagicMock(return_value=Objects(
+            (f"BaseModel.{obj.id}", obj) for obj in instances))
+        self.cmd.onecmd(f'all BaseModel limit=1 offset=1 '
+                        f'cursor=BaseModel.{instances[1].id}')
+        self.assertEqual(mock_stdout.getvalue().splitlines(), [
+            str([str(instances[3])]), f"cursor=BaseModel.{instances[3].id}"])
+        self.assertEqual(Objects.read, [f"BaseModel.{instances[3].id}"])
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_all_cursor_not_found(self, mock_stdout):
+        """Test the all command with an unknown cursor."""
+        storage.all = MagicMock(return_value={})
+        self.cmd.onecmd('all BaseModel cursor=BaseModel.nope')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** cursor not found **')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_all_invalid_option(self, mock_stdout):
+        """Test the all command with an invalid option."""
+        self.cmd.onecmd('all BaseModel limit=ten')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** invalid option limit=ten **')
+
     @patch('sys.stdout', new_callable=StringIO)
     def test_count(self, mock_stdout):
         """Test the count command."""
@@ -448,5 +550,422 @@ class TestHBNBCommand(unittest.TestCase):
         self.assertEqual(output, '')  # Update command should not print anything
         self.assertEqual(instance.text, "Updated Review Text")
 
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_Place_update_list(self, mock_stdout):
+        """Test Place update command with a list attribute."""
+        instance = Place()
+        storage.all = MagicMock(return_value={
+            "Place.{}".format(instance.id): instance})
+        self.cmd.onecmd('update Place {} amenity_ids ["a1", "a2"]'.format(
+            instance.id))
+        self.assertEqual(instance.amenity_ids, ["a1", "a2"])
+        self.cmd.onecmd('update Place {} amenity_ids a1'.format(instance.id))
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** value must be a list **')
+    # Migrate Tests
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_migrate(self, mock_stdout):
+        """Test the migrate command."""
+        with patch('models.storage.migrate') as migrate:
+            self.cmd.onecmd('migrate jsonl')
+        migrate.assert_called_once_with('jsonl')
+        self.assertEqual(mock_stdout.getvalue().strip(), '')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_migrate_missing_format(self, mock_stdout):
+        """Test the migrate command without a format."""
+        self.cmd.onecmd('migrate')
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(output, '** format missing **')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_migrate_unknown_format(self, mock_stdout):
+        """Test the migrate command with an unknown format."""
+        with patch('models.storage.migrate', side_effect=ValueError):
+            self.cmd.onecmd('migrate xml')
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(output, "** format doesn't exist **")
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_migrate_other_engine(self, mock_stdout):
+        """Test the migrate command on an engine without migrate."""
+        with patch('console.storage', MagicMock(spec=DBStorage)):
+            self.cmd.onecmd('migrate jsonl')
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(output, "** migrate needs the file storage **")
+
+    # Batch Tests
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_begin_commit(self, mock_stdout):
+        """Test that saves are deferred between begin and commit."""
+        with patch('models.storage.begin') as begin, \
+                patch('models.storage.commit') as commit:
+            self.cmd.onecmd('begin')
+            begin.assert_called_once_with()
+            commit.assert_not_called()
+            self.cmd.onecmd('commit')
+            commit.assert_called_once_with()
+        self.assertEqual(mock_stdout.getvalue().strip(), '')
+
+    # Bulk Import Tests
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_bulk_import(self, mock_stdout):
+        """Test the bulk_import command."""
+        with patch('console.bulk_import', return_value=3) as bulk:
+            self.cmd.onecmd('bulk_import places.csv Place')
+        bulk.assert_called_once_with('places.csv', 'Place')
+        self.assertTrue(mock_stdout.getvalue().startswith(
+            '3 objects imported in '))
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_bulk_import_missing_file(self, mock_stdout):
+        """Test the bulk_import command without a file."""
+        self.cmd.onecmd('bulk_import')
+        self.assertEqual(mock_stdout.getvalue().strip(), '** file missing **')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_bulk_import_file_not_found(self, mock_stdout):
+        """Test the bulk_import command with a file that does not exist."""
+        self.cmd.onecmd('bulk_import no_such_file.jsonl')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         "** file doesn't exist **")
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_bulk_import_invalid_class(self, mock_stdout):
+        """Test the bulk_import command with an invalid class."""
+        self.cmd.onecmd('bulk_import data.jsonl MyModel')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         "** class doesn't exist **")
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_bulk_import_invalid_record(self, mock_stdout):
+        """Test the bulk_import command with an invalid record."""
+        with patch('console.bulk_import',
+                   side_effect=ValueError('line 2: invalid JSON')):
+            self.cmd.onecmd('bulk_import data.jsonl')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** line 2: invalid JSON **')
+
+    # Where Tests
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_where(self, mock_stdout):
+        """Test the where command."""
+        cheap = Place()
+        cheap.price_by_night = 50
+        dear = Place()
+        dear.price_by_night = 500
+        storage.all = MagicMock(return_value={
+            f"Place.{cheap.id}": cheap, f"Place.{dear.id}": dear})
+        with patch('models.storage.count', return_value=2), \
+                patch('models.storage.index', return_value=None):
+            self.cmd.onecmd('Place.where(price_by_night<100)')
+        self.assertEqual(mock_stdout.getvalue(), str([str(cheap)]) + "\n")
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_where_invalid_condition(self, mock_stdout):
+        """Test the where command with an invalid condition."""
+        self.cmd.onecmd('where Place price_by_night')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** invalid condition price_by_night **')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_where_missing_class(self, mock_stdout):
+        """Test the where command without a class."""
+        self.cmd.onecmd('where')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** class name missing **')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_where_invalid_class(self, mock_stdout):
+        """Test the where command with an invalid class."""
+        self.cmd.onecmd('where MyModel name=x')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         "** class doesn't exist **")
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_explain(self, mock_stdout):
+        """Test the explain command."""
+        storage.all = MagicMock(return_value={})
+        with patch('models.storage.count', return_value=0), \
+                patch('models.storage.index', return_value=None):
+            self.cmd.onecmd('explain Place price_by_night<100 limit=3')
+        self.assertEqual(mock_stdout.getvalue().strip().splitlines(), [
+            'Place scan (0 candidates)', 'filter price_by_night < 100',
+            'limit 3'])
+
+    # Spatial Tests
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_near(self, mock_stdout):
+        """Test the near command."""
+        with patch('console.near', return_value=[]) as query:
+            self.cmd.onecmd('Place.near(48.85, 2.35, 10)')
+        query.assert_called_once_with(storage, 'Place', 48.85, 2.35, 10.0)
+        self.assertEqual(mock_stdout.getvalue().strip(), '[]')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_within(self, mock_stdout):
+        """Test the within command."""
+        with patch('console.within', return_value=[]) as query:
+            self.cmd.onecmd('within Place 48 2 49 3')
+        query.assert_called_once_with(storage, 'Place', 48.0, 2.0, 49.0,
+                                      3.0)
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_near_missing_coordinates(self, mock_stdout):
+        """Test the near command without enough coordinates."""
+        self.cmd.onecmd('near Place 48.85 2.35')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** coordinates missing **')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_near_invalid_coordinates(self, mock_stdout):
+        """Test the near command with a coordinate that is not a number."""
+        self.cmd.onecmd('near Place north 2.35 10')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** invalid coordinates **')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_near_class_without_coordinates(self, mock_stdout):
+        """Test the near command on a class without coordinates."""
+        self.cmd.onecmd('near City 48.85 2.35 10')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** City has no coordinates **')
+
+    # Search Tests
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_search(self, mock_stdout):
+        """Test the search command."""
+        with patch('console.search', return_value=[]) as query:
+            self.cmd.onecmd('search Review quiet pool limit=5')
+        query.assert_called_once_with(storage, 'quiet pool', 'Review', 5)
+        self.assertEqual(mock_stdout.getvalue().strip(), '[]')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_search_every_class(self, mock_stdout):
+        """Test the search command without a class."""
+        with patch('console.search', return_value=[]) as query:
+            self.cmd.onecmd('Review.search(pool)')
+            self.cmd.onecmd('search pool')
+        query.assert_any_call(storage, 'pool', 'Review', None)
+        query.assert_called_with(storage, 'pool', None, None)
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_search_missing_words(self, mock_stdout):
+        """Test the search command without words."""
+        self.cmd.onecmd('search Review')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** words missing **')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_search_class_without_text(self, mock_stdout):
+        """Test the search command on a class without indexed text."""
+        self.cmd.onecmd('search City paris')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** City has no indexed text **')
+
+    # Having Tests
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_having(self, mock_stdout):
+        """Test the having command."""
+        with patch('console.having', return_value=[]) as query:
+            self.cmd.onecmd('having Place amenity_ids a1 a2')
+            self.cmd.onecmd('Place.having(amenity_ids, a1, a2, match=any)')
+        query.assert_any_call(storage, 'Place', 'amenity_ids', ['a1', 'a2'],
+                              False)
+        query.assert_called_with(storage, 'Place', 'amenity_ids',
+                                 ['a1', 'a2'], True)
+        self.assertEqual(mock_stdout.getvalue().strip(), '[]\n[]')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_having_invalid_option(self, mock_stdout):
+        """Test the having command with an invalid match option."""
+        self.cmd.onecmd('having Place amenity_ids a1 match=some')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** invalid option match=some **')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_having_missing_items(self, mock_stdout):
+        """Test the having command without items."""
+        self.cmd.onecmd('having Place amenity_ids')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** items missing **')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_having_not_a_list(self, mock_stdout):
+        """Test the having command on an attribute that is not indexed."""
+        self.cmd.onecmd('having City name Paris')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** City.name is not an indexed list **')
+
+    # Aggregate Tests
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_aggregate(self, mock_stdout):
+        """Test the aggregate command without groups."""
+        with patch('console.aggregate', return_value=25.0) as agg:
+            self.cmd.onecmd('aggregate Place avg=price_by_night')
+        agg.assert_called_once_with(storage, 'Place', 'avg',
+                                    'price_by_night', None, [])
+        self.assertEqual(mock_stdout.getvalue().strip(), '25.0')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_aggregate_by(self, mock_stdout):
+        """Test the aggregate command with groups and conditions."""
+        result = [("c0", 2), ("c1", 4)]
+        with patch('console.aggregate_groups',
+                   return_value=iter(result)) as agg:
+            self.cmd.onecmd('Place.aggregate(count, by=city_id, '
+                            'price_by_night<100)')
+        args = agg.call_args[0]
+        self.assertEqual((storage, 'Place', 'count', None, 'city_id'),
+                         args[:5])
+        self.assertEqual(['price_by_night < 100'], [str(c) for c in args[5]])
+        self.assertEqual(mock_stdout.getvalue().strip(), 'c0: 2\nc1: 4')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_aggregate_missing_function(self, mock_stdout):
+        """Test the aggregate command without a function."""
+        self.cmd.onecmd('aggregate Place by=city_id')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** aggregate missing **')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_aggregate_invalid_option(self, mock_stdout):
+        """Test the aggregate command with a where option."""
+        self.cmd.onecmd('aggregate Place count limit=2')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** invalid option limit **')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_aggregate_missing_attribute(self, mock_stdout):
+        """Test the aggregate command without the aggregated attribute."""
+        self.cmd.onecmd('aggregate Place sum by=city_id')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** attribute name missing **')
+
+    # Export Tests
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_export(self, mock_stdout):
+        """Test the export command with a class and a filter."""
+        with patch('console.export', return_value=2) as exp:
+            self.cmd.onecmd('export out.csv.gz Place city_id=c1 max_guest=4')
+        exp.assert_called_once_with('out.csv.gz', 'Place', city_id='c1',
+                                    max_guest=4)
+        self.assertTrue(mock_stdout.getvalue().startswith(
+            '2 objects exported in '))
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_export_filter_without_class(self, mock_stdout):
+        """Test the export command with a filter and no class."""
+        with patch('console.export', return_value=0) as exp:
+            self.cmd.onecmd('export out.jsonl name=Paris')
+        exp.assert_called_once_with('out.jsonl', None, name='Paris')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_export_missing_file(self, mock_stdout):
+        """Test the export command without a file."""
+        self.cmd.onecmd('export')
+        self.assertEqual(mock_stdout.getvalue().strip(), '** file missing **')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_export_invalid_class(self, mock_stdout):
+        """Test the export command with an invalid class."""
+        self.cmd.onecmd('export out.jsonl MyModel')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         "** class doesn't exist **")
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_export_invalid_filter(self, mock_stdout):
+        """Test the export command with a malformed filter."""
+        self.cmd.onecmd('export out.jsonl Place =c1')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** filter must be <attribute>=<value> **')
+
+    # Snapshot Tests
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_snapshot(self, mock_stdout):
+        """Test the snapshot command."""
+        with patch('console.write_snapshot', return_value=3) as write:
+            self.cmd.onecmd('snapshot out.snapshot')
+            self.cmd.onecmd('snapshot')
+        write.assert_any_call(storage, 'out.snapshot')
+        write.assert_called_with(storage, 'file.snapshot')
+        self.assertTrue(mock_stdout.getvalue().startswith(
+            '3 objects written in '))
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_snapshot_unwritable(self, mock_stdout):
+        """Test the snapshot command with a file that cannot be written."""
+        self.cmd.onecmd('snapshot /nonexistent/dir/out.snapshot')
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         '** No such file or directory **')
+
+
+class TestHBNBCommand_snapshot(unittest.TestCase):
+    """Test the write commands under the read-only snapshot engine."""
+
+    def setUp(self):
+        """Write a snapshot of one User and use it as the storage."""
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, "file.snapshot")
+        self.user = User(id="u1", first_name="Betty",
+                         created_at="2017-09-28T21:03:54.052298",
+                         updated_at="2017-09-28T21:03:54.052298")
+        source = MagicMock()
+        source.all = lambda cls: ({"User.u1": self.user} if cls == "User"
+                                  else {})
+        write_snapshot(source, path)
+        self.snapshot = SnapshotStorage()
+        self.snapshot._SnapshotStorage__file_path = path
+        self.snapshot.reload()
+        self.patches = [patch('console.storage', self.snapshot),
+                        patch('models.storage', self.snapshot)]
+        for p in self.patches:
+            p.start()
+        self.cmd = HBNBCommand()
+
+    def tearDown(self):
+        """Restore the storage and remove the snapshot."""
+        for p in self.patches:
+            p.stop()
+        self.snapshot.close()
+        shutil.rmtree(self.tmpdir)
+
+    def run_command(self, line):
+        """Return the output of a command."""
+        with patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            self.cmd.onecmd(line)
+        return mock_stdout.getvalue().strip()
+
+    def test_write_commands(self):
+        """Test that every write command reports the read-only storage."""
+        path = os.path.join(self.tmpdir, "users.jsonl")
+        with open(path, "w") as f:
+            f.write(json.dumps({"__class__": "User", "id": "u2"}) + "\n")
+        for line in ("create User", "update User u1 first_name Holly",
+                     'User.update("u1", "first_name", "Holly")',
+                     "destroy User u1", "begin", "commit",
+                     "bulk_import {}".format(path)):
+            self.assertEqual("** storage is read-only **",
+                             self.run_command(line), line)
+
+    def test_reads_after_refused_writes(self):
+        """Test that refused changes are not seen by later reads."""
+        self.run_command("update User u1 first_name Holly")
+        self.run_command("create User")
+        self.assertIn("'first_name': 'Betty'",
+                      self.run_command("show User u1"))
+        self.assertEqual("1", self.run_command("count User"))
+
+
 if __name__ == '__main__':
     unittest.main()
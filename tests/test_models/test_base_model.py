@@ -5,13 +5,21 @@ Unittest classes:
     TestBaseModel_instantiation
     TestBaseModel_save
     TestBaseModel_to_dict
+    TestBaseModel_dirty
+    TestBaseModel_classes
+    TestBaseModel_timestamps
+    TestBaseModel_compact
+    TestBaseModel_intern_ids
 """
 import os
 import models
 import unittest
+import weakref
 from datetime import datetime
 from time import sleep
-from models.base_model import BaseModel
+from models.base_model import BaseModel, Field, ModelType, classes
+from models.base_model import intern_ids, parse_datetime
+from models.engine.file_storage import FileStorage
 
 
 class TestBaseModel_instantiation(unittest.TestCase):
@@ -137,6 +145,18 @@ class TestBaseModel_save(unittest.TestCase):
         with open("file.json", "r") as f:
             self.assertIn(bmid, f.read())
 
+    def test_save_after_delete(self):
+        bm = BaseModel()
+        bm.save()
+        models.storage.delete(bm)
+        models.storage.save()
+        bm.save()
+        bmid = "BaseModel." + bm.id
+        self.assertNotIn(bmid, models.storage.all())
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertNotIn(bmid, models.storage.all())
+
 
 class TestBaseModel_to_dict(unittest.TestCase):
     """Unittests for testing to_dict method of the BaseModel class."""
@@ -188,5 +208,203 @@ class TestBaseModel_to_dict(unittest.TestCase):
             bm.to_dict(None)
 
 
+class TestBaseModel_dirty(unittest.TestCase):
+    """Unittests for testing dirty tracking of the BaseModel class."""
+
+    def setUp(self):
+        BaseModel.pop_dirty()
+
+    def test_new_instance_is_dirty(self):
+        bm = BaseModel()
+        self.assertEqual({bm: False}, BaseModel.pop_dirty())
+
+    def test_kwargs_instance_is_clean(self):
+        dt_iso = datetime.today().isoformat()
+        BaseModel(id="345", created_at=dt_iso, updated_at=dt_iso)
+        self.assertEqual({}, BaseModel.pop_dirty())
+
+    def test_setattr_marks_dirty(self):
+        bm = BaseModel()
+        BaseModel.pop_dirty()
+        bm.name = "Holberton"
+        self.assertIn(bm, BaseModel.pop_dirty())
+
+    def test_pop_dirty_resets(self):
+        BaseModel()
+        BaseModel.pop_dirty()
+        self.assertEqual({}, BaseModel.pop_dirty())
+
+    def test_mark_dirty_deleted(self):
+        bm = BaseModel()
+        bm.mark_dirty(deleted=True)
+        bm.name = "Holberton"
+        self.assertTrue(BaseModel.pop_dirty()[bm])
+
+
+class TestBaseModel_classes(unittest.TestCase):
+    """Unittests for testing the model class registry."""
+
+    def test_registry_has_models(self):
+        for name in ("BaseModel", "User", "State", "City", "Place",
+                     "Amenity", "Review"):
+            self.assertEqual(name, classes[name].__name__)
+
+    def test_subclass_is_registered(self):
+        class Spaceship(BaseModel):
+            pass
+        self.assertIs(Spaceship, classes["Spaceship"])
+
+
+class TestBaseModel_timestamps(unittest.TestCase):
+    """Unittests for testing timestamp parsing of the BaseModel class."""
+
+    def tearDown(self):
+        BaseModel._BaseModel__lazy_timestamps = False
+
+    def test_parse_datetime(self):
+        dt = datetime.today()
+        self.assertEqual(dt, parse_datetime(dt.isoformat()))
+
+    def test_parse_datetime_without_microseconds(self):
+        dt = datetime(2017, 9, 28, 21, 3, 54)
+        self.assertEqual(dt, parse_datetime(dt.isoformat()))
+
+    def test_parse_datetime_short_fraction(self):
+        dt = datetime(2017, 9, 28, 21, 3, 54, 500000)
+        self.assertEqual(dt, parse_datetime("2017-09-28T21:03:54.5"))
+
+    def test_parse_datetime_invalid(self):
+        with self.assertRaises(ValueError):
+            parse_datetime("yesterday")
+
+    def test_kwargs_without_timestamps(self):
+        bm = BaseModel(name="Holberton")
+        self.assertEqual(datetime, type(bm.created_at))
+        self.assertEqual(str, type(bm.id))
+
+    def test_lazy_timestamps_kept_as_strings(self):
+        BaseModel._BaseModel__lazy_timestamps = True
+        dt = datetime.today()
+        bm = BaseModel(id="345", created_at=dt.isoformat(),
+                       updated_at=dt.isoformat())
+        stamp = vars(BaseModel)["created_at"]
+
+        def stored():
+            if stamp.member is not None:
+                return stamp.member.__get__(bm)
+            return bm.__dict__["created_at"]
+        self.assertEqual(str, type(stored()))
+        self.assertEqual(dt.isoformat(), bm.to_dict()["created_at"])
+        self.assertEqual(dt, bm.created_at)
+        self.assertEqual(datetime, type(stored()))
+
+    def test_lazy_timestamps_checked(self):
+        BaseModel._BaseModel__lazy_timestamps = True
+        with self.assertRaises(TypeError):
+            BaseModel(id="345", created_at=None, updated_at=None)
+        with self.assertRaises(ValueError):
+            BaseModel(id="345", created_at="garbage",
+                      updated_at="garbage")
+
+    def test_lazy_timestamps_str(self):
+        BaseModel._BaseModel__lazy_timestamps = True
+        dt = datetime.today()
+        bm = BaseModel(id="345", created_at=dt.isoformat(),
+                       updated_at=dt.isoformat())
+        self.assertIn("'updated_at': " + repr(dt), str(bm))
+
+
+class TestBaseModel_compact(unittest.TestCase):
+    """Unittests for testing model classes defined in compact mode."""
+
+    def setUp(self):
+        ModelType._ModelType__compact = True
+
+        class Boat(BaseModel):
+            name = ""
+            seats = 0
+            _indexes = ("name",)
+
+        self.Boat = Boat
+        ModelType._ModelType__compact = False
+
+    def tearDown(self):
+        del classes["Boat"]
+
+    def test_slots(self):
+        self.assertEqual(("name", "seats"), self.Boat.__slots__)
+        self.assertEqual(["name", "seats"],
+                         [name for name, member in self.Boat._slots][-2:])
+        self.assertIs(Field, type(self.Boat.__dict__["name"]))
+        self.assertEqual(("name",), self.Boat._indexes)
+
+    def test_class_defaults(self):
+        self.assertEqual("", self.Boat.name)
+        self.assertEqual(0, self.Boat(id="1").seats)
+
+    def test_values_not_in_dict(self):
+        boat = self.Boat(id="1", name="Nautilus")
+        self.assertEqual("Nautilus", boat.name)
+        self.assertNotIn("name", boat.__dict__)
+
+    def test_to_dict_and_str(self):
+        dt = datetime.today()
+        boat = self.Boat(id="1", created_at=dt.isoformat(),
+                         updated_at=dt.isoformat(), seats=4)
+        boat.color = "red"
+        tdict = boat.to_dict()
+        self.assertEqual(4, tdict["seats"])
+        self.assertEqual("red", tdict["color"])
+        self.assertNotIn("name", tdict)
+        self.assertEqual(dt.isoformat(), tdict["created_at"])
+        self.assertIn("'seats': 4", str(boat))
+        self.assertIn("'color': 'red'", str(boat))
+        self.assertEqual(boat.to_dict(), self.Boat(**tdict).to_dict())
+
+    def test_set_and_delete(self):
+        boat = self.Boat()
+        boat.seats = 2
+        self.assertEqual(2, boat.seats)
+        del boat.seats
+        self.assertEqual(0, boat.seats)
+        models.storage.delete(boat)
+
+    def test_weakref(self):
+        boat = self.Boat(id="1")
+        self.assertIs(boat, weakref.ref(boat)())
+
+
+class TestBaseModel_intern_ids(unittest.TestCase):
+    """Unittests for testing the interning of ids and foreign keys."""
+
+    def test_intern_ids(self):
+        value = "".join(["city", "-1"])
+        self.assertIs(intern_ids("city_id", value),
+                      intern_ids("id", "".join(["city", "-1"])))
+        self.assertIsNot(value, intern_ids("name", "".join(["city", "-1"])))
+        self.assertEqual(5, intern_ids("place_id", 5))
+
+    def test_list_interned_in_place(self):
+        ids = ["".join(["a", "1"]), 2]
+        self.assertIs(ids, intern_ids("amenity_ids", ids))
+        self.assertIs("a1", ids[0])
+        self.assertEqual(2, ids[1])
+
+    def test_kwargs_share_ids(self):
+        owner = BaseModel(id="".join(["user", "-1"]))
+        bm = BaseModel(user_id="".join(["user", "-1"]))
+        self.assertIs(owner.id, bm.user_id)
+        self.assertIs(bm.user_id, bm.to_dict()["user_id"])
+
+    def test_setattr_shares_ids(self):
+        owner = BaseModel()
+        bm = BaseModel()
+        bm.owner_id = "".join(list(owner.id))
+        self.assertIs(owner.id, bm.owner_id)
+        self.assertEqual(owner.id, bm.to_dict()["owner_id"])
+        models.storage.delete(owner)
+        models.storage.delete(bm)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,349 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/column_storage.py.
+
+Unittest classes:
+    TestColumn
+    TestColumnStorage_instantiation
+    TestColumnStorage_methods
+    TestColumnStorage_columns
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from models.base_model import BaseModel
+from models.engine.column_storage import Column, ColumnStorage
+from models.engine.query import aggregate, parse_where
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+from models.review import Review
+
+
+class TestColumn(unittest.TestCase):
+    """Unittests for testing the Column class."""
+
+    def setUp(self):
+        self.column = Column("price_by_night", int, 0)
+        for i in range(4):
+            self.column.append()
+        for row, value in enumerate([80, 20, "free"]):
+            self.column.set(row, value)
+
+    def test_array(self):
+        self.assertEqual("q", self.column.values.typecode)
+        self.assertEqual([80, 20, 0, 0], list(self.column.values))
+        self.assertEqual(bytearray(b"\x01\x01\x01\x00"), self.column.isset)
+
+    def test_odd_value(self):
+        self.assertEqual({2: "free"}, self.column.odd)
+        self.assertEqual("free", self.column.get(2))
+        self.column.set(2, 30)
+        self.assertEqual({}, self.column.odd)
+
+    def test_unset(self):
+        self.column.unset(0)
+        self.assertEqual(0, self.column.get(0))
+        self.assertEqual(0, self.column.isset[0])
+
+    def test_mask(self):
+        self.assertEqual([True, False, False, False],
+                         self.column.mask(">", 50))
+        self.assertEqual([False, False, True, False],
+                         self.column.mask("=", "free"))
+        self.assertEqual([False, True, False, True],
+                         self.column.mask("in", [0, 20]))
+
+    def test_move_and_pop(self):
+        self.column.move(2, 0)
+        self.column.pop()
+        self.assertEqual("free", self.column.get(0))
+        self.assertEqual(3, len(self.column))
+
+    def test_timestamp(self):
+        column = Column("created_at", datetime, None)
+        column.append()
+        dt = datetime(2017, 9, 28, 21, 3, 54, 52298)
+        column.set(0, dt.isoformat())
+        self.assertEqual(dt, column.get(0))
+        self.assertEqual([True], column.mask("<", datetime(2018, 1, 1)))
+
+    def test_interned_ids(self):
+        column = Column("city_id", str, "")
+        column.append()
+        column.append()
+        column.set(0, "".join(["c", "1"]))
+        column.set(1, "".join(["c", "1"]))
+        self.assertIs(column.values[0], column.values[1])
+
+
+class TestColumnStorage_instantiation(unittest.TestCase):
+    """Unittests for testing instantiation of the ColumnStorage class."""
+
+    def test_ColumnStorage_instantiation_no_args(self):
+        self.assertEqual(type(ColumnStorage()), ColumnStorage)
+
+    def test_ColumnStorage_instantiation_with_arg(self):
+        with self.assertRaises(TypeError):
+            ColumnStorage(None)
+
+
+class TestColumnStorage_methods(unittest.TestCase):
+    """Unittests for testing methods of the ColumnStorage class."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "file.json")
+        self.storage = self.open()
+        BaseModel.pop_dirty()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def open(self):
+        storage = ColumnStorage()
+        storage._ColumnStorage__file_path = self.path
+        storage.reload()
+        return storage
+
+    def reopen(self):
+        self.storage.save()
+        self.storage = self.open()
+
+    def test_new_and_save(self):
+        us = User()
+        us.email = "betty@holberton.com"
+        self.storage.new(us)
+        self.reopen()
+        loaded = self.storage.all()["User." + us.id]
+        self.assertEqual(us.to_dict(), loaded.to_dict())
+
+    def test_file_layout(self):
+        us = User()
+        self.storage.new(us)
+        self.storage.save()
+        with open(self.path) as f:
+            self.assertEqual(us.to_dict(), json.load(f)["User." + us.id])
+
+    def test_roundtrip_types(self):
+        pl = Place()
+        pl.price_by_night = 100
+        pl.latitude = 37.77
+        pl.max_guest = "many"
+        pl.amenity_ids = ["a1", "a2"]
+        pl.nickname = "home"
+        self.storage.new(pl)
+        self.reopen()
+        loaded = self.storage.get(Place, pl.id)
+        self.assertEqual(pl.to_dict(), loaded.to_dict())
+        self.assertNotIn("city_id", loaded.__dict__)
+
+    def test_all_with_class(self):
+        us = User()
+        st = State()
+        self.storage.new(us)
+        self.storage.new(st)
+        users = self.storage.all(User)
+        self.assertIn("User." + us.id, users)
+        self.assertNotIn("State." + st.id, users)
+        self.assertEqual([us], list(users.values()))
+        self.assertEqual(2, len(self.storage.all()))
+
+    def test_identity_map(self):
+        us = User()
+        self.storage.new(us)
+        self.assertIs(us, self.storage.get(User, us.id))
+        self.assertIsNone(self.storage.get(User, "nope"))
+
+    def test_objects_built_on_read(self):
+        us = User()
+        self.storage.new(us)
+        self.reopen()
+        self.assertEqual({}, dict(self.storage._ColumnStorage__objects))
+        self.assertEqual(1, self.storage.count(User))
+        self.assertEqual({}, dict(self.storage._ColumnStorage__objects))
+        loaded = self.storage.get(User, us.id)
+        self.assertIs(loaded, self.storage.get(User, us.id))
+
+    def test_update_is_written(self):
+        us = User()
+        self.storage.new(us)
+        self.reopen()
+        self.storage.get(User, us.id).first_name = "Betty"
+        self.reopen()
+        self.assertEqual("Betty", self.storage.get(User, us.id).first_name)
+
+    def test_delete(self):
+        users = [User() for i in range(3)]
+        for us in users:
+            self.storage.new(us)
+        self.storage.delete(users[0])
+        self.assertIsNone(self.storage.get(User, users[0].id))
+        self.assertEqual(2, self.storage.count(User))
+        self.reopen()
+        self.assertEqual({users[1].id, users[2].id},
+                         {us.id for us in self.storage.scan(User)})
+
+    def test_delete_None(self):
+        self.storage.delete(None)
+
+    def test_find(self):
+        rv1 = Review()
+        rv1.place_id = "p1"
+        rv2 = Review()
+        rv2.place_id = "p2"
+        self.storage.new(rv1)
+        self.storage.new(rv2)
+        self.assertEqual([rv1], self.storage.find(Review, place_id="p1"))
+        self.assertEqual([], self.storage.find(Review, place_id="p3"))
+
+    def test_find_class_default(self):
+        cy = City()
+        self.storage.new(cy)
+        self.reopen()
+        found = self.storage.find(City, state_id="")
+        self.assertEqual([cy.id], [obj.id for obj in found])
+
+    def test_find_extra_attribute(self):
+        us = User()
+        us.nickname = "bet"
+        self.storage.new(us)
+        self.assertEqual([us], self.storage.find(User, nickname="bet"))
+        self.assertEqual([], self.storage.find(User, nickname=None))
+
+    def test_index(self):
+        rv = Review()
+        rv.place_id = "p1"
+        self.storage.new(rv)
+        index = self.storage.index(Review, "place_id")
+        self.assertEqual({"Review." + rv.id: rv}, index.get("p1"))
+        self.assertIsNone(self.storage.index("Review", "text"))
+
+    def test_transaction(self):
+        us = User()
+        with self.storage.transaction():
+            self.storage.new(us)
+            self.storage.save()
+            self.assertFalse(os.path.exists(self.path))
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_migrate(self):
+        us = User()
+        self.storage.new(us)
+        self.storage.migrate("jsonl")
+        with open(self.path) as f:
+            self.assertEqual(us.to_dict(), json.loads(f.readline()))
+        with self.assertRaises(ValueError):
+            self.storage.migrate("xml")
+
+    def test_transaction_rolled_back_on_error(self):
+        us = User()
+        us.first_name = "Betty"
+        self.storage.new(us)
+        self.storage.save()
+        with self.assertRaises(RuntimeError):
+            with self.storage.transaction():
+                self.storage.get(User, us.id).first_name = "aborted"
+                aborted = User()
+                self.storage.new(aborted)
+                self.storage.count(User)
+                raise RuntimeError
+        self.storage.new(User())
+        self.storage.save()
+        with open(self.path) as f:
+            saved = json.load(f)
+        self.assertEqual("Betty", saved["User." + us.id]["first_name"])
+        self.assertNotIn("User." + aborted.id, saved)
+        self.assertEqual(2, len(saved))
+
+    def test_jsonl(self):
+        us = User()
+        self.storage.new(us)
+        self.storage._ColumnStorage__format = "jsonl"
+        self.storage.save()
+        with open(self.path) as f:
+            self.assertEqual(us.to_dict(), json.loads(f.readline()))
+        self.storage = self.open()
+        self.assertEqual(1, self.storage.count(User))
+
+
+class TestColumnStorage_columns(unittest.TestCase):
+    """Unittests for testing the column filters and aggregates."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.storage = ColumnStorage()
+        self.storage._ColumnStorage__file_path = os.path.join(
+            self.tmpdir, "file.json")
+        self.storage.reload()
+        BaseModel.pop_dirty()
+        self.places = []
+        for i in range(6):
+            pl = Place()
+            pl.city_id = "c{}".format(i % 2)
+            pl.price_by_night = i * 10
+            self.storage.new(pl)
+            self.places.append(pl)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_rows(self):
+        rows = self.storage.rows(Place, [("city_id", "=", "c1"),
+                                         ("price_by_night", ">", 10)])
+        self.assertEqual(self.places[3::2],
+                         self.storage.objects(Place, rows))
+        self.assertEqual(6, len(self.storage.rows("Place")))
+
+    def test_rows_unknown_operator(self):
+        with self.assertRaises(ValueError):
+            self.storage.rows(Place, [("city_id", "~", "c1")])
+
+    def test_rows_follow_changes(self):
+        self.places[0].price_by_night = 100
+        self.assertEqual([0], self.storage.rows(
+            Place, [("price_by_night", ">=", 100)]))
+
+    def test_aggregate(self):
+        self.assertEqual(6, self.storage.aggregate(Place, "count"))
+        self.assertEqual(150, self.storage.aggregate(Place, "sum",
+                                                     "price_by_night"))
+        self.assertEqual({"c0": 20, "c1": 30}, self.storage.aggregate(
+            Place, "avg", "price_by_night", by="city_id"))
+        self.assertEqual({"c0": 40, "c1": 50}, self.storage.aggregate(
+            Place, "max", "price_by_night", "city_id",
+            [("price_by_night", ">", 30)]))
+
+    def test_aggregate_skips_odd_values(self):
+        self.places[5].price_by_night = "free"
+        self.assertEqual(40, self.storage.aggregate(Place, "max",
+                                                    "price_by_night"))
+
+    def test_aggregate_empty(self):
+        self.assertIsNone(self.storage.aggregate(
+            Place, "avg", "price_by_night", conditions=[("name", "=", "x")]))
+
+    def test_aggregate_invalid(self):
+        with self.assertRaises(ValueError):
+            self.storage.aggregate(Place, "median", "price_by_night")
+        with self.assertRaises(ValueError):
+            self.storage.aggregate(Place, "sum", "name")
+
+    def test_aggregate_query(self):
+        self.assertEqual({"c0": 3, "c1": 3}, aggregate(
+            self.storage, "Place", "count", by="city_id"))
+        with self.assertRaises(ValueError):
+            aggregate(self.storage, "Place", "count", by="amenity_ids")
+
+    def test_where_plan(self):
+        query = parse_where("Place", "city_id=c0 price_by_night<30")
+        plan = query.plan(self.storage)
+        self.assertEqual("columns", plan.access)
+        self.assertEqual(self.places[0:3:2], query.run(self.storage))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,263 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/db_storage.py.
+
+Unittest classes:
+    TestDBStorage_instantiation
+    TestDBStorage_methods
+"""
+import models
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+from models.base_model import BaseModel
+from models.engine.db_storage import DBStorage
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+from models.review import Review
+
+
+class TestDBStorage_instantiation(unittest.TestCase):
+    """Unittests for testing instantiation of the DBStorage class."""
+
+    def test_DBStorage_instantiation_no_args(self):
+        self.assertEqual(type(DBStorage()), DBStorage)
+
+    def test_DBStorage_instantiation_with_arg(self):
+        with self.assertRaises(TypeError):
+            DBStorage(None)
+
+
+class TestDBStorage_methods(unittest.TestCase):
+    """Unittests for testing methods of the DBStorage class."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "hbnb.db")
+        self.storage = self.open()
+        BaseModel.pop_dirty()
+
+    def tearDown(self):
+        self.storage.close()
+        shutil.rmtree(self.tmpdir)
+
+    def open(self):
+        storage = DBStorage()
+        storage._DBStorage__db_path = self.path
+        storage.reload()
+        return storage
+
+    def reopen(self):
+        self.storage.close()
+        self.storage = self.open()
+
+    def test_reload_creates_tables(self):
+        conn = sqlite3.connect(self.path)
+        tables = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        conn.close()
+        for name in ("BaseModel", "User", "State", "City", "Place",
+                     "Amenity", "Review"):
+            self.assertIn(name, tables)
+
+    def test_foreign_keys_are_indexed(self):
+        conn = sqlite3.connect(self.path)
+        indexes = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        conn.close()
+        for name in ("City_state_id", "Place_city_id", "Place_user_id",
+                     "Review_place_id", "Review_user_id"):
+            self.assertIn(name, indexes)
+
+    def test_new_and_save(self):
+        us = User()
+        us.email = "betty@holberton.com"
+        self.storage.new(us)
+        self.storage.save()
+        self.reopen()
+        loaded = self.storage.all()["User." + us.id]
+        self.assertEqual(us.to_dict(), loaded.to_dict())
+
+    def test_roundtrip_types(self):
+        pl = Place()
+        pl.price_by_night = 100
+        pl.latitude = 37.77
+        pl.amenity_ids = ["a1", "a2"]
+        pl.nickname = "home"
+        self.storage.new(pl)
+        self.storage.save()
+        self.reopen()
+        loaded = self.storage.get(Place, pl.id)
+        self.assertEqual(pl.to_dict(), loaded.to_dict())
+        self.assertNotIn("city_id", loaded.__dict__)
+
+    def test_roundtrip_keeps_value_types(self):
+        pl = Place()
+        pl.latitude = 3
+        pl.max_guest = 2.5
+        pl.name = 12
+        pl.description = True
+        pl.city_id = None
+        pl.user_id = ["u1"]
+        self.storage.new(pl)
+        self.storage.save()
+        self.reopen()
+        loaded = self.storage.get(Place, pl.id)
+        for attr in ("latitude", "max_guest", "name", "description",
+                     "city_id", "user_id"):
+            self.assertEqual(type(getattr(pl, attr)),
+                             type(getattr(loaded, attr)), attr)
+            self.assertEqual(getattr(pl, attr), getattr(loaded, attr))
+        self.assertEqual([loaded], self.storage.find(Place, latitude=3))
+        self.assertEqual([loaded], self.storage.find(Place, description=True))
+
+    def test_all_with_class(self):
+        us = User()
+        st = State()
+        self.storage.new(us)
+        self.storage.new(st)
+        users = self.storage.all(User)
+        self.assertIn("User." + us.id, users)
+        self.assertNotIn("State." + st.id, users)
+        self.assertEqual([us], list(users.values()))
+        self.assertEqual(["User." + us.id], list(users))
+        self.assertEqual(2, len(self.storage.all()))
+
+    def test_all_missing_key(self):
+        self.assertNotIn("User.nope", self.storage.all())
+        with self.assertRaises(KeyError):
+            self.storage.all()["User.nope"]
+        self.assertNotIn("Nope.1", self.storage.all())
+
+    def test_identity_map(self):
+        us = User()
+        self.storage.new(us)
+        self.storage.save()
+        self.assertIs(us, self.storage.get(User, us.id))
+        self.assertIs(us, self.storage.all()["User." + us.id])
+
+    def test_count(self):
+        self.storage.new(User())
+        self.storage.new(User())
+        self.storage.new(State())
+        self.assertEqual(2, self.storage.count(User))
+        self.assertEqual(1, self.storage.count("State"))
+        self.assertEqual(3, self.storage.count())
+        self.assertEqual(0, self.storage.count("Nope"))
+
+    def test_update_is_written(self):
+        us = User()
+        self.storage.new(us)
+        self.storage.save()
+        us.first_name = "Betty"
+        self.storage.save()
+        self.reopen()
+        self.assertEqual("Betty", self.storage.get(User, us.id).first_name)
+
+    def test_unsaved_changes_are_not_committed(self):
+        us = User()
+        self.storage.new(us)
+        self.assertEqual(1, self.storage.count(User))
+        self.storage._DBStorage__conn.close()
+        self.storage._DBStorage__conn = None
+        self.storage = self.open()
+        self.assertIsNone(self.storage.get(User, us.id))
+
+    def test_delete(self):
+        us = User()
+        self.storage.new(us)
+        self.storage.save()
+        self.storage.delete(us)
+        self.storage.save()
+        self.reopen()
+        self.assertIsNone(self.storage.get(User, us.id))
+
+    def test_delete_None(self):
+        self.storage.delete(None)
+
+    def test_find(self):
+        rv1 = Review()
+        rv1.place_id = "p1"
+        rv2 = Review()
+        rv2.place_id = "p2"
+        self.storage.new(rv1)
+        self.storage.new(rv2)
+        self.assertEqual([rv1], self.storage.find(Review, place_id="p1"))
+        self.assertEqual([], self.storage.find(Review, place_id="p3"))
+
+    def test_find_class_default(self):
+        cy = City()
+        self.storage.new(cy)
+        self.storage.save()
+        self.reopen()
+        found = self.storage.find(City, state_id="")
+        self.assertEqual([cy.id], [obj.id for obj in found])
+
+    def test_index(self):
+        rv = Review()
+        rv.place_id = "p1"
+        self.storage.new(rv)
+        index = self.storage.index(Review, "place_id")
+        self.assertEqual({"Review." + rv.id: rv}, index.get("p1"))
+        self.assertEqual({}, index.get("p2"))
+        self.assertIsNone(self.storage.index("Review", "text"))
+
+    def test_find_extra_attribute(self):
+        us = User()
+        us.nickname = "bet"
+        self.storage.new(us)
+        self.assertEqual([us], self.storage.find(User, nickname="bet"))
+
+    def test_model_save_after_delete(self):
+        us = User()
+        self.storage.new(us)
+        self.storage.save()
+        self.storage.delete(us)
+        self.storage.save()
+        with patch.object(models, "storage", self.storage):
+            us.save()
+        self.assertIsNone(self.storage.get(User, us.id))
+        self.assertEqual([], self.committed("User"))
+
+    def committed(self, cls_name):
+        conn = sqlite3.connect(self.path)
+        ids = [row[0] for row in conn.execute(
+            'SELECT id FROM "{}"'.format(cls_name))]
+        conn.close()
+        return ids
+
+    def test_save_deferred_until_commit(self):
+        us = User()
+        self.storage.begin()
+        self.storage.new(us)
+        self.storage.save()
+        self.assertEqual([], self.committed("User"))
+        self.storage.commit()
+        self.assertEqual([us.id], self.committed("User"))
+
+    def test_transaction(self):
+        us = User()
+        with self.storage.transaction():
+            self.storage.new(us)
+            self.storage.save()
+            self.assertEqual([], self.committed("User"))
+        self.assertEqual([us.id], self.committed("User"))
+
+    def test_transaction_rolled_back_on_error(self):
+        us = User()
+        with self.assertRaises(RuntimeError):
+            with self.storage.transaction():
+                self.storage.new(us)
+                self.storage.save()
+                raise RuntimeError
+        self.assertIsNone(self.storage.get(User, us.id))
+        self.storage.save()
+        self.assertEqual([], self.committed("User"))
+
+
+if __name__ == "__main__":
+    unittest.main()
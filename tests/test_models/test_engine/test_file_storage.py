@@ -4,11 +4,16 @@
 Unittest classes:
     TestFileStorage_instantiation
     TestFileStorage_methods
+    TestFileStorage_journal
+    TestFileStorage_jsonl
+    TestFileStorage_lazy
+    TestFileStorage_transaction
 """
 import os
 import json
 import models
 import unittest
+from unittest.mock import patch
 from datetime import datetime
 from models.base_model import BaseModel
 from models.engine.file_storage import FileStorage
@@ -65,9 +70,40 @@ class TestFileStorage_methods(unittest.TestCase):
     def test_all(self):
         self.assertEqual(dict, type(models.storage.all()))
 
-    def test_all_with_arg(self):
-        with self.assertRaises(TypeError):
-            models.storage.all(None)
+    def test_all_with_None(self):
+        self.assertIs(models.storage.all(), models.storage.all(None))
+
+    def test_all_with_class(self):
+        us = User()
+        st = State()
+        users = models.storage.all(User)
+        self.assertEqual({"User." + us.id: us}, users)
+        self.assertIs(users, models.storage.all("User"))
+        self.assertEqual({"State." + st.id: st}, models.storage.all(State))
+
+    def test_all_with_unknown_class(self):
+        self.assertEqual({}, models.storage.all("MyModel"))
+
+    def test_count(self):
+        User()
+        User()
+        State()
+        self.assertEqual(2, models.storage.count(User))
+        self.assertEqual(1, models.storage.count("State"))
+        self.assertEqual(0, models.storage.count(City))
+        self.assertEqual(3, models.storage.count())
+
+    def test_delete_updates_class_index(self):
+        us = User()
+        models.storage.delete(us)
+        self.assertEqual({}, models.storage.all(User))
+
+    def test_reload_updates_class_index(self):
+        us = User()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertIn("User." + us.id, models.storage.all(User))
 
     def test_new(self):
         bm = BaseModel()
@@ -164,10 +200,538 @@ class TestFileStorage_methods(unittest.TestCase):
         self.assertIn("Amenity." + am.id, objs)
         self.assertIn("Review." + rv.id, objs)
 
+    def test_reload_does_not_load_whole_document(self):
+        us = User()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        with patch("json.load", side_effect=AssertionError):
+            models.storage.reload()
+        self.assertIn("User." + us.id, models.storage.all())
+
+    def test_reload_small_chunks(self):
+        us = User()
+        us.first_name = "Bet\"ty {}"
+        pl = Place()
+        pl.amenity_ids = ["a1", "a2"]
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__chunk_size = 7
+        try:
+            models.storage.reload()
+        finally:
+            FileStorage._FileStorage__chunk_size = 65536
+        objs = models.storage.all()
+        self.assertEqual("Bet\"ty {}", objs["User." + us.id].first_name)
+        self.assertEqual(["a1", "a2"], objs["Place." + pl.id].amenity_ids)
+
+    def test_reload_empty_object(self):
+        with open("file.json", "w") as f:
+            f.write(" {\n} ")
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual({}, models.storage.all())
+
+    def test_reload_malformed(self):
+        with open("file.json", "w") as f:
+            f.write('{"User.1": {"id": "1", "__class__": "User"} "x"}')
+        with self.assertRaises(ValueError):
+            models.storage.reload()
+
     def test_reload_with_arg(self):
         with self.assertRaises(TypeError):
             models.storage.reload(None)
 
+    def test_save_serializes_only_dirty_objects(self):
+        us = User()
+        st = State()
+        models.storage.save()
+        us.first_name = "Betty"
+        with patch.object(BaseModel, "to_dict", autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            models.storage.save()
+        self.assertEqual([us], [c.args[0] for c in to_dict.call_args_list])
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual("Betty", saved["User." + us.id]["first_name"])
+        self.assertIn("State." + st.id, saved)
+
+    def test_save_after_reload_copies_records(self):
+        us = User()
+        us.first_name = "Bétty"
+        st = State()
+        st.name = "California"
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        records = FileStorage._FileStorage__records
+        self.assertTrue(all(type(span) is int for span in records.values()))
+        loaded = models.storage.all()["State." + st.id]
+        loaded.name = "Nevada"
+        with patch.object(BaseModel, "to_dict", autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            models.storage.save()
+        self.assertEqual([loaded],
+                         [c.args[0] for c in to_dict.call_args_list])
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual("Bétty", saved["User." + us.id]["first_name"])
+        self.assertEqual("Nevada", saved["State." + st.id]["name"])
+
+    def test_save_after_reload_of_utf8_text(self):
+        us = User(id="u1", first_name="Bétty",
+                  created_at="2017-09-28T21:03:54.052298",
+                  updated_at="2017-09-28T21:03:54.052298")
+        st = State(id="s1", name="Nevada",
+                   created_at="2017-09-28T21:03:54.052298",
+                   updated_at="2017-09-28T21:03:54.052298")
+        with open("file.json", "w", encoding="utf-8") as f:
+            json.dump({"User.u1": us.to_dict(), "State.s1": st.to_dict()},
+                      f, ensure_ascii=False)
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        models.storage.save()
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual(us.to_dict(), saved["User.u1"])
+        self.assertEqual(st.to_dict(), saved["State.s1"])
+
+    def test_save_after_file_replaced(self):
+        us = User()
+        models.storage.save()
+        os.remove("file.json")
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertIn("User." + us.id, json.load(f))
+
+    def test_find_indexed_attribute(self):
+        rv1 = Review()
+        rv1.place_id = "p1"
+        rv2 = Review()
+        rv2.place_id = "p2"
+        self.assertEqual([rv1], models.storage.find(Review, place_id="p1"))
+        self.assertEqual([rv2], models.storage.find("Review", place_id="p2"))
+        self.assertEqual([], models.storage.find(Review, place_id="p3"))
+
+    def test_find_uses_index(self):
+        rv = Review()
+        rv.place_id = "p1"
+        index = FileStorage._FileStorage__by_attr["Review"]["place_id"]
+        self.assertEqual({"Review." + rv.id: rv}, index.get("p1"))
+
+    def test_index(self):
+        rv = Review()
+        rv.place_id = "p1"
+        index = models.storage.index(Review, "place_id")
+        self.assertEqual({"Review." + rv.id: rv}, index.get("p1"))
+        self.assertIsNone(models.storage.index("User", "email"))
+
+    def test_find_several_attributes(self):
+        rv1 = Review()
+        rv1.place_id = "p1"
+        rv1.user_id = "u1"
+        rv2 = Review()
+        rv2.place_id = "p1"
+        rv2.user_id = "u2"
+        found = models.storage.find(Review, place_id="p1", user_id="u2")
+        self.assertEqual([rv2], found)
+
+    def test_find_unindexed_attribute(self):
+        us = User()
+        us.email = "betty@holberton.com"
+        self.assertEqual([us],
+                         models.storage.find(User, email=us.email))
+
+    def test_find_follows_updates(self):
+        cy = City()
+        cy.state_id = "s1"
+        cy.state_id = "s2"
+        self.assertEqual([], models.storage.find(City, state_id="s1"))
+        self.assertEqual([cy], models.storage.find(City, state_id="s2"))
+
+    def test_find_after_delete(self):
+        cy = City()
+        cy.state_id = "s1"
+        models.storage.delete(cy)
+        self.assertEqual([], models.storage.find(City, state_id="s1"))
+
+    def test_find_after_reload(self):
+        pl = Place()
+        pl.city_id = "c1"
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        found = models.storage.find(Place, city_id="c1")
+        self.assertEqual([pl.id], [obj.id for obj in found])
+
+    def test_delete(self):
+        us = User()
+        models.storage.delete(us)
+        self.assertNotIn("User." + us.id, models.storage.all())
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertNotIn("User." + us.id, f.read())
+
+    def test_delete_None(self):
+        models.storage.delete(None)
+
+
+class TestFileStorage_journal(unittest.TestCase):
+    """Unittests for testing the journaled mode of the FileStorage class."""
+
+    def setUp(self):
+        for path in ("file.json", "file.json.journal"):
+            try:
+                os.rename(path, path + ".tmp_test")
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        BaseModel.pop_dirty()
+        FileStorage._FileStorage__journaled = True
+
+    def tearDown(self):
+        for path in ("file.json", "file.json.journal"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+            try:
+                os.rename(path + ".tmp_test", path)
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__journaled = False
+        FileStorage._FileStorage__compact_after = 1000
+
+    def test_save_appends_only_changes(self):
+        us = User()
+        models.storage.save()
+        st = State()
+        models.storage.save()
+        with open("file.json.journal", "r") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(2, len(lines))
+        self.assertEqual("User." + us.id, lines[0]["key"])
+        self.assertEqual("State." + st.id, lines[1]["key"])
+        self.assertFalse(os.path.exists("file.json"))
+
+    def test_save_appends_only_dirty_objects(self):
+        us = User()
+        State()
+        models.storage.save()
+        us.first_name = "Betty"
+        with patch.object(BaseModel, "to_dict", autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            models.storage.save()
+        self.assertEqual([us], [c.args[0] for c in to_dict.call_args_list])
+
+    def test_save_without_changes_appends_nothing(self):
+        User()
+        models.storage.save()
+        models.storage.save()
+        with open("file.json.journal", "r") as f:
+            self.assertEqual(1, len(f.readlines()))
+
+    def test_delete_appends_tombstone(self):
+        us = User()
+        models.storage.save()
+        models.storage.delete(us)
+        models.storage.save()
+        with open("file.json.journal", "r") as f:
+            last = json.loads(f.readlines()[-1])
+        self.assertEqual({"key": "User." + us.id, "value": None}, last)
+
+    def test_reload_replays_journal(self):
+        us = User()
+        st = State()
+        models.storage.save()
+        us.first_name = "Betty"
+        us.save()
+        models.storage.delete(st)
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        objs = models.storage.all()
+        self.assertIn("User." + us.id, objs)
+        self.assertEqual("Betty", objs["User." + us.id].first_name)
+        self.assertNotIn("State." + st.id, objs)
+
+    def test_reload_ignores_truncated_entry(self):
+        us = User()
+        models.storage.save()
+        with open("file.json.journal", "a") as f:
+            f.write('{"key": "User.1", "val')
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(["User." + us.id], list(models.storage.all()))
+
+    def test_compaction_folds_journal_into_snapshot(self):
+        FileStorage._FileStorage__compact_after = 3
+        ids = [User().id for i in range(3)]
+        models.storage.save()
+        self.assertFalse(os.path.exists("file.json.journal"))
+        with open("file.json", "r") as f:
+            snapshot = json.load(f)
+        for i in ids:
+            self.assertIn("User." + i, snapshot)
+
+
+class TestFileStorage_jsonl(unittest.TestCase):
+    """Unittests for testing the JSON Lines format of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__format = "json"
+
+    def test_save_one_record_per_line(self):
+        FileStorage._FileStorage__format = "jsonl"
+        us = User()
+        st = State()
+        models.storage.save()
+        with open("file.json", "r") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([us.to_dict(), st.to_dict()], lines)
+
+    def test_reload_jsonl(self):
+        FileStorage._FileStorage__format = "jsonl"
+        us = User()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(us.to_dict(),
+                         models.storage.all()["User." + us.id].to_dict())
+
+    def test_reload_detects_legacy_format(self):
+        us = User()
+        models.storage.save()
+        FileStorage._FileStorage__format = "jsonl"
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertIn("User." + us.id, models.storage.all())
+
+    def test_migrate(self):
+        us = User()
+        models.storage.save()
+        models.storage.migrate("jsonl")
+        with open("file.json", "r") as f:
+            self.assertEqual(us.to_dict(), json.loads(f.readline()))
+        models.storage.migrate("json")
+        with open("file.json", "r") as f:
+            self.assertIn("User." + us.id, json.load(f))
+
+    def test_migrate_unknown_format(self):
+        with self.assertRaises(ValueError):
+            models.storage.migrate("xml")
+
+
+class TestFileStorage_lazy(unittest.TestCase):
+    """Unittests for testing the lazy mode of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.us = User()
+        self.us.first_name = "Betty"
+        self.cy = City()
+        self.cy.state_id = "s1"
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__lazy = True
+        models.storage.reload()
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__lazy = False
+
+    def stored(self, key):
+        return dict.__getitem__(FileStorage._FileStorage__objects, key)
+
+    def test_reload_does_not_build_instances(self):
+        self.assertEqual("_Record",
+                         type(self.stored("User." + self.us.id)).__name__)
+        self.assertEqual(1, models.storage.count(User))
+        self.assertIn("User." + self.us.id, models.storage.all())
+
+    def test_copies_hold_instances(self):
+        key = "User." + self.us.id
+        for objs in (dict(models.storage.all()), models.storage.all().copy(),
+                     {**models.storage.all()}, models.storage.all() | {},
+                     dict(models.storage.all(User))):
+            self.assertEqual(User, type(objs[key]))
+            self.assertEqual("Betty", objs[key].first_name)
+
+    def test_setdefault_and_popitem_build_instances(self):
+        objs = models.storage.all(City)
+        key = "City." + self.cy.id
+        self.assertEqual(City, type(objs.setdefault(key)))
+        self.assertEqual(User, type(models.storage.all(User).popitem()[1]))
+
+    def test_item_access_builds_instance(self):
+        us = models.storage.all()["User." + self.us.id]
+        self.assertEqual(User, type(us))
+        self.assertEqual("Betty", us.first_name)
+        self.assertIs(us, self.stored("User." + self.us.id))
+        self.assertEqual("_Record",
+                         type(self.stored("City." + self.cy.id)).__name__)
+
+    def test_same_instance_from_all_and_class(self):
+        key = "User." + self.us.id
+        us = models.storage.all(User)[key]
+        self.assertIs(us, models.storage.all()[key])
+        self.assertIs(us, models.storage.all().get(key))
+        self.assertEqual([us], list(models.storage.all(User).values()))
+
+    def test_find_builds_class(self):
+        found = models.storage.find(City, state_id="s1")
+        self.assertEqual([self.cy.id], [obj.id for obj in found])
+
+    def test_index_builds_class(self):
+        index = models.storage.index(City, "state_id")
+        self.assertEqual(["City." + self.cy.id], list(index.get("s1")))
+
+    def test_update_after_lazy_load(self):
+        cy = models.storage.all()["City." + self.cy.id]
+        cy.state_id = "s2"
+        self.assertEqual([cy], models.storage.find(City, state_id="s2"))
+        models.storage.save()
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual("s2", saved["City." + self.cy.id]["state_id"])
+
+    def test_save_without_building_instances(self):
+        with open("file.json", "r") as f:
+            before = f.read()
+        with patch.object(BaseModel, "to_dict", autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            models.storage.save()
+        to_dict.assert_not_called()
+        with open("file.json", "r") as f:
+            self.assertEqual(before, f.read())
+
+    def test_reload_jsonl(self):
+        models.storage.migrate("jsonl")
+        FileStorage._FileStorage__format = "json"
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual("_Record",
+                         type(self.stored("User." + self.us.id)).__name__)
+        us = models.storage.all()["User." + self.us.id]
+        self.assertEqual("Betty", us.first_name)
+
+    def test_delete(self):
+        key = "User." + self.us.id
+        models.storage.delete(models.storage.all()[key])
+        self.assertNotIn(key, models.storage.all())
+        self.assertEqual(0, models.storage.count(User))
+
+
+class TestFileStorage_transaction(unittest.TestCase):
+    """Unittests for testing the batches of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__batch = 0
+
+    def test_save_deferred_until_commit(self):
+        models.storage.begin()
+        us = User()
+        us.save()
+        self.assertFalse(os.path.exists("file.json"))
+        models.storage.commit()
+        with open("file.json") as f:
+            self.assertIn("User." + us.id, json.load(f))
+
+    def test_nested_batches(self):
+        models.storage.begin()
+        models.storage.begin()
+        User().save()
+        models.storage.commit()
+        self.assertFalse(os.path.exists("file.json"))
+        models.storage.commit()
+        self.assertTrue(os.path.exists("file.json"))
+
+    def test_commit_without_begin_saves(self):
+        us = User()
+        models.storage.commit()
+        with open("file.json") as f:
+            self.assertIn("User." + us.id, json.load(f))
+
+    def test_transaction(self):
+        with models.storage.transaction():
+            us = User()
+            us.save()
+            self.assertFalse(os.path.exists("file.json"))
+        with open("file.json") as f:
+            self.assertIn("User." + us.id, json.load(f))
+
+    def test_transaction_not_saved_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with models.storage.transaction():
+                User().save()
+                raise RuntimeError
+        self.assertFalse(os.path.exists("file.json"))
+        self.assertEqual(0, FileStorage._FileStorage__batch)
+
+    def test_transaction_rolled_back_on_error(self):
+        us = User()
+        us.first_name = "Betty"
+        us.save()
+        with self.assertRaises(RuntimeError):
+            with models.storage.transaction():
+                us.first_name = "aborted"
+                aborted = User()
+                raise RuntimeError
+        other = User()
+        other.save()
+        with open("file.json") as f:
+            saved = json.load(f)
+        self.assertEqual("Betty", saved["User." + us.id]["first_name"])
+        self.assertNotIn("User." + aborted.id, saved)
+        self.assertIn("User." + other.id, saved)
+        reloaded = models.storage.all()["User." + us.id]
+        self.assertIsNot(us, reloaded)
+        self.assertEqual("Betty", reloaded.first_name)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,325 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/indexes.py.
+
+Unittest classes:
+    TestAttributeIndex
+    TestRangeIndex
+    TestGridIndex
+    TestTextIndex
+    TestMembershipIndex
+"""
+import unittest
+from models.city import City
+from models.engine.indexes import AttributeIndex, GridIndex, RangeIndex
+from models.engine.indexes import MembershipIndex, TextIndex, haversine
+from models.place import Place
+from models.review import Review
+
+
+class TestAttributeIndex(unittest.TestCase):
+    """Unittests for testing the AttributeIndex class."""
+
+    def setUp(self):
+        self.index = AttributeIndex("state_id")
+        self.cy = City()
+        self.cy.state_id = "CA"
+
+    def test_add_and_get(self):
+        self.index.add("City.1", self.cy)
+        self.assertEqual({"City.1": self.cy}, self.index.get("CA"))
+
+    def test_get_missing_value(self):
+        self.assertEqual({}, self.index.get("NV"))
+
+    def test_get_unhashable_value(self):
+        self.assertIsNone(self.index.get([]))
+
+    def test_add_class_default(self):
+        self.index.add("City.2", City(id="2"))
+        self.assertIn("City.2", self.index.get(""))
+
+    def test_add_unhashable_value(self):
+        self.cy.state_id = ["CA"]
+        self.index.add("City.1", self.cy)
+        self.assertEqual({}, self.index.entries)
+
+    def test_discard(self):
+        self.index.add("City.1", self.cy)
+        self.index.discard("City.1", "CA")
+        self.assertEqual({}, self.index.get("CA"))
+        self.assertNotIn("CA", self.index.entries)
+
+    def test_discard_missing(self):
+        self.index.discard("City.1", "CA")
+        self.index.discard("City.1", [])
+
+
+class TestRangeIndex(unittest.TestCase):
+    """Unittests for testing the RangeIndex class."""
+
+    def setUp(self):
+        self.index = RangeIndex("price_by_night")
+        self.places = []
+        for i, price in enumerate([50, 20, 80, 20, 65.5]):
+            pl = Place(id=str(i), price_by_night=price)
+            self.index.add("Place.{}".format(i), pl)
+            self.places.append(pl)
+
+    def prices(self, objs):
+        return [pl.price_by_night for pl in objs]
+
+    def test_sorted(self):
+        self.index.settle()
+        self.assertEqual([], self.index.pending)
+        self.assertEqual([20, 20, 50, 65.5, 80],
+                         [value for value, key in self.index.pairs])
+        self.assertEqual(5, len(self.index))
+
+    def test_bulk_add(self):
+        for i in range(100, 0, -1):
+            self.index.add("Place.b{}".format(i), Place(price_by_night=i))
+        self.index.add("Place.b0", Place(price_by_night=0))
+        values = [pl.price_by_night for pl in self.index.range(hi=3)]
+        self.assertEqual([0, 1, 2, 3], values)
+        self.assertEqual(106, len(self.index))
+
+    def test_range_inclusive(self):
+        self.assertEqual([20, 20, 50],
+                         self.prices(self.index.range(20, 50)))
+
+    def test_range_exclusive(self):
+        self.assertEqual([50],
+                         self.prices(self.index.range(20, 65.5, False,
+                                                      False)))
+
+    def test_range_open_bounds(self):
+        self.assertEqual([65.5, 80], self.prices(self.index.range(lo=60)))
+        self.assertEqual([20, 20], self.prices(self.index.range(hi=49)))
+
+    def test_range_reverse(self):
+        self.assertEqual([80, 65.5, 50],
+                         self.prices(self.index.range(lo=21, reverse=True)))
+
+    def test_span_empty(self):
+        start, stop = self.index.span(90, 10)
+        self.assertEqual(start, stop)
+
+    def test_get(self):
+        self.assertEqual({"Place.1", "Place.3"}, set(self.index.get(20)))
+        self.assertEqual({}, self.index.get(21))
+        self.assertIsNone(self.index.get("20"))
+
+    def test_discard(self):
+        self.index.discard("Place.1", 20)
+        self.assertEqual({"Place.3"}, set(self.index.get(20)))
+        self.index.discard("Place.1", 20)
+        self.assertEqual(4, len(self.index))
+
+    def test_not_a_number(self):
+        pl = Place(id="5", price_by_night="free")
+        self.index.add("Place.5", pl)
+        self.assertEqual({"Place.5"}, self.index.skipped)
+        self.assertEqual(5, len(self.index))
+        self.index.discard("Place.5", "free")
+        self.assertEqual(set(), self.index.skipped)
+
+
+class TestGridIndex(unittest.TestCase):
+    """Unittests for testing the GridIndex class."""
+
+    def setUp(self):
+        self.index = GridIndex("latitude", "longitude")
+        self.paris = Place(id="paris", latitude=48.8566, longitude=2.3522)
+        self.versailles = Place(id="vers", latitude=48.8049,
+                                longitude=2.1204)
+        self.fiji = Place(id="fiji", latitude=-17.7, longitude=179.9)
+        self.samoa = Place(id="samoa", latitude=-13.8, longitude=-171.8)
+        for pl in (self.paris, self.versailles, self.fiji, self.samoa):
+            self.index.add("Place." + pl.id, pl)
+
+    def test_haversine(self):
+        self.assertAlmostEqual(18.0, haversine(48.8566, 2.3522,
+                                               48.8049, 2.1204), 0)
+        self.assertEqual(0, haversine(1, 2, 1, 2))
+
+    def test_radius(self):
+        found = self.index.radius(48.8566, 2.3522, 20)
+        self.assertEqual([self.paris, self.versailles],
+                         [pl for distance, pl in found])
+        self.assertEqual(0, found[0][0])
+        self.assertEqual([], self.index.radius(48.8566, 2.3522, 10)[1:])
+
+    def test_radius_across_antimeridian(self):
+        found = self.index.radius(-15.0, 180.0, 1100)
+        self.assertEqual([self.fiji, self.samoa],
+                         [pl for distance, pl in found])
+
+    def test_bbox(self):
+        self.assertEqual([self.paris],
+                         list(self.index.bbox(48.5, 2.2, 49.0, 2.5)))
+
+    def test_bbox_across_antimeridian(self):
+        self.assertEqual({self.fiji, self.samoa},
+                         set(self.index.bbox(-20, 170, -10, -170)))
+
+    def test_bbox_larger_than_grid(self):
+        self.assertEqual(4, len(list(self.index.bbox(-90, -180, 90, 180))))
+
+    def test_move(self):
+        self.paris.latitude = 0.0
+        self.index.add("Place.paris", self.paris)
+        self.assertEqual([], list(self.index.bbox(48.5, 2.2, 49, 3)))
+        self.assertEqual([self.paris], list(self.index.bbox(-1, 2, 1, 3)))
+        self.assertEqual(4, len(self.index))
+
+    def test_discard(self):
+        self.index.discard("Place.paris")
+        self.assertEqual(3, len(self.index))
+        self.index.discard("Place.vers")
+        self.assertNotIn((48, 2), self.index.cells)
+
+    def test_invalid_coordinates(self):
+        self.index.add("Place.x", Place(id="x", latitude="north"))
+        self.index.add("Place.y", Place(id="y", latitude=95.0))
+        self.assertEqual(4, len(self.index))
+
+    def test_get(self):
+        self.assertIsNone(self.index.get(48.8566))
+
+
+class TestTextIndex(unittest.TestCase):
+    """Unittests for testing the TextIndex class."""
+
+    def setUp(self):
+        self.index = TextIndex("text")
+        self.rv1 = Review(id="1", text="Great pool, great view!")
+        self.rv2 = Review(id="2", text="Quiet street and a small pool")
+        self.rv3 = Review(id="3", text="Noisy")
+        for rv in (self.rv1, self.rv2, self.rv3):
+            self.index.add("Review." + rv.id, rv)
+
+    def test_tokenize(self):
+        self.assertEqual(["great", "pool", "great", "view"],
+                         TextIndex.tokenize(self.rv1.text))
+        self.assertEqual([], TextIndex.tokenize(None))
+
+    def test_pending_until_search(self):
+        self.assertEqual(3, len(self.index.pending))
+        self.assertEqual({}, self.index.postings)
+        self.index.search("pool")
+        self.assertEqual({}, self.index.pending)
+        self.assertEqual({"Review.1": 1, "Review.2": 1},
+                         self.index.postings["pool"])
+        self.assertEqual(3, len(self.index))
+
+    def test_search_ranked(self):
+        found = self.index.search("great POOL")
+        self.assertEqual(["Review.1", "Review.2"],
+                         [key for score, key, obj in found])
+        self.assertIs(self.rv1, found[0][2])
+        self.assertGreater(found[0][0], found[1][0])
+
+    def test_search_limit(self):
+        self.assertEqual(["Review.1"], [key for score, key, obj in
+                                        self.index.search("pool", 1)])
+
+    def test_search_no_match(self):
+        self.assertEqual([], self.index.search("parking"))
+        self.assertEqual([], self.index.search("  "))
+
+    def test_discard(self):
+        self.index.search("pool")
+        self.index.discard("Review.1", self.rv1.text)
+        self.assertEqual([], self.index.search("great"))
+        self.assertNotIn("great", self.index.postings)
+        self.assertEqual(2, len(self.index))
+
+    def test_discard_pending(self):
+        self.index.discard("Review.1", self.rv1.text)
+        self.assertEqual([], self.index.search("great"))
+
+    def test_update(self):
+        self.index.search("pool")
+        old = self.rv3.text
+        self.rv3.text = "Lovely pool"
+        self.index.discard("Review.3", old)
+        self.index.add("Review.3", self.rv3)
+        self.assertEqual([], self.index.search("noisy"))
+        self.assertIn("Review.3", [key for score, key, obj in
+                                   self.index.search("lovely")])
+
+
+class TestMembershipIndex(unittest.TestCase):
+    """Unittests for testing the MembershipIndex class."""
+
+    def setUp(self):
+        self.index = MembershipIndex("amenity_ids")
+        self.places = [Place(id=str(i), amenity_ids=ids) for i, ids in
+                       enumerate([["wifi", "pool"], ["wifi"], ["pool"], []])]
+        for pl in self.places:
+            self.index.add("Place." + pl.id, pl)
+
+    def test_items(self):
+        self.assertEqual(("a", "b"), MembershipIndex.items(["a", "b", "a"]))
+        self.assertEqual(("a",), MembershipIndex.items(["a", ["b"]]))
+        self.assertEqual((), MembershipIndex.items("ab"))
+
+    def test_pending_until_read(self):
+        self.assertEqual(4, len(self.index.pending))
+        self.assertEqual({}, self.index.bitmaps)
+        self.index.select(["wifi"])
+        self.assertEqual({}, self.index.pending)
+        self.assertEqual(0b11, self.index.bitmaps["wifi"])
+        self.assertEqual(4, len(self.index))
+
+    def test_all(self):
+        self.assertEqual([self.places[0]],
+                         self.index.select(["wifi", "pool"]))
+        self.assertEqual([], self.index.select(["wifi", "parking"]))
+
+    def test_any(self):
+        self.assertEqual(self.places[:3],
+                         self.index.select(["wifi", "pool"], True))
+        self.assertEqual(self.places[:2],
+                         self.index.select(["parking", "wifi"], True))
+
+    def test_unhashable_item(self):
+        self.assertEqual([], self.index.select([["wifi"]]))
+
+    def test_bulk_settle(self):
+        for i in range(4, 40):
+            self.index.add("Place.{}".format(i),
+                           Place(amenity_ids=["wifi"]))
+        self.assertEqual(38, len(self.index.select(["wifi"])))
+
+    def test_discard(self):
+        self.index.select(["wifi"])
+        self.index.discard("Place.0")
+        self.assertEqual([self.places[1]], self.index.select(["wifi"]))
+        self.assertEqual([self.places[2]], self.index.select(["pool"]))
+        self.index.discard("Place.2")
+        self.assertNotIn("pool", self.index.bitmaps)
+        self.assertEqual([0, 2], sorted(self.index.free))
+
+    def test_changed_in_place(self):
+        self.index.select(["wifi"])
+        self.places[1].amenity_ids.append("pool")
+        self.index.add("Place.1", self.places[1])
+        self.assertEqual([self.places[0], self.places[1]],
+                         self.index.select(["wifi", "pool"]))
+
+    def test_slot_reused(self):
+        self.index.select(["wifi"])
+        self.index.discard("Place.3")
+        pl = Place(id="4", amenity_ids=["pool"])
+        self.index.add("Place.4", pl)
+        self.assertEqual([self.places[0], self.places[2], pl],
+                         self.index.select(["pool"]))
+        self.assertEqual(4, len(self.index.keys))
+
+    def test_get(self):
+        self.assertIsNone(self.index.get(["wifi"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
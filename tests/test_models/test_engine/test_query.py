@@ -0,0 +1,492 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/query.py.
+
+Unittest classes:
+    TestQuery_Condition
+    TestQuery_parse_where
+    TestQuery_run
+    TestQuery_spatial
+    TestQuery_search
+    TestQuery_having
+    TestQuery_aggregate
+"""
+import models
+import os
+import unittest
+from unittest.mock import patch
+from models.base_model import BaseModel
+from models.engine.file_storage import FileStorage
+from models.engine.query import Condition, Query, near, parse_where, within
+from models.engine.query import aggregate, aggregate_groups, having
+from models.engine.query import search
+from models.engine.db_storage import DBStorage
+from models.place import Place
+from models.review import Review
+
+
+class TestQuery_Condition(unittest.TestCase):
+    """Unittests for testing the Condition class."""
+
+    def setUp(self):
+        self.pl = Place(id="p1", price_by_night=80, city_id="c1")
+
+    def test_operators(self):
+        self.assertTrue(Condition("city_id", "=", "c1").matches(self.pl))
+        self.assertTrue(Condition("city_id", "!=", "c2").matches(self.pl))
+        self.assertTrue(Condition("price_by_night", "<", 100)
+                        .matches(self.pl))
+        self.assertTrue(Condition("price_by_night", "<=", 80)
+                        .matches(self.pl))
+        self.assertFalse(Condition("price_by_night", ">", 80)
+                         .matches(self.pl))
+        self.assertTrue(Condition("price_by_night", ">=", 80)
+                        .matches(self.pl))
+        self.assertTrue(Condition("city_id", "in", ["c1", "c2"])
+                        .matches(self.pl))
+
+    def test_incomparable_values_do_not_match(self):
+        self.assertFalse(Condition("city_id", "<", 3).matches(self.pl))
+        self.assertFalse(Condition("nope", ">", 3).matches(self.pl))
+
+    def test_unknown_operator(self):
+        with self.assertRaises(ValueError):
+            Condition("city_id", "~", "c1")
+
+    def test_in_needs_list(self):
+        with self.assertRaises(ValueError):
+            Condition("city_id", "in", "c1")
+
+
+class TestQuery_parse_where(unittest.TestCase):
+    """Unittests for testing the parse_where function."""
+
+    def test_conditions(self):
+        query = parse_where("Place", 'city_id="c 1", price_by_night<100 '
+                            'name in ["a", "b"] max_guest>=2')
+        self.assertEqual([("city_id", "=", "c 1"),
+                          ("price_by_night", "<", 100),
+                          ("name", "in", ["a", "b"]),
+                          ("max_guest", ">=", 2)],
+                         [(c.attr, c.op, c.value) for c in query.conditions])
+
+    def test_bare_words_are_strings(self):
+        query = parse_where("Place", "city_id=c1")
+        self.assertEqual("c1", query.conditions[0].value)
+
+    def test_options(self):
+        query = parse_where("Place", "order_by=-price_by_night, limit=5")
+        self.assertEqual([], query.conditions)
+        self.assertEqual("price_by_night", query.order_by)
+        self.assertTrue(query.descending)
+        self.assertEqual(5, query.limit)
+
+    def test_quoted_order_by(self):
+        query = parse_where("Place", 'order_by="-price_by_night"')
+        self.assertEqual("price_by_night", query.order_by)
+        self.assertTrue(query.descending)
+        query = parse_where("Place", "order_by='name'")
+        self.assertEqual("name", query.order_by)
+        self.assertFalse(query.descending)
+
+    def test_empty(self):
+        self.assertEqual([], parse_where("Place", "").conditions)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            parse_where("Place", "city_id")
+        with self.assertRaises(ValueError):
+            parse_where("Place", "limit=ten")
+        with self.assertRaises(ValueError):
+            parse_where("Place", "order_by=5")
+
+
+class TestQuery_run(unittest.TestCase):
+    """Unittests for testing the planning and running of queries."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.places = []
+        for i in range(9):
+            pl = Place()
+            pl.city_id = "c{}".format(i % 3)
+            pl.price_by_night = i * 10
+            self.places.append(pl)
+
+    def tearDown(self):
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_index_plan(self):
+        query = parse_where("Place", "price_by_night<50, city_id=c1")
+        plan = query.plan(models.storage)
+        self.assertEqual("index city_id = 'c1'", plan.access)
+        self.assertEqual(3, plan.estimate)
+        self.assertEqual([self.places[1], self.places[4]],
+                         query.run(models.storage))
+
+    def test_smallest_index_entry_used(self):
+        self.places[0].user_id = "u1"
+        query = parse_where("Place", "city_id=c0, user_id=u1")
+        self.assertEqual("index user_id = 'u1'",
+                         query.plan(models.storage).access)
+        self.assertEqual([self.places[0]], query.run(models.storage))
+
+    def test_in_plan(self):
+        query = parse_where("Place", 'city_id in ["c1", "c2"]')
+        self.assertEqual(6, query.plan(models.storage).estimate)
+        self.assertEqual(6, len(query.run(models.storage)))
+
+    def test_scan_plan(self):
+        self.places[3].latitude = 48.8
+        query = parse_where("Place", "latitude>40")
+        plan = query.plan(models.storage)
+        self.assertEqual("scan", plan.access)
+        self.assertEqual(9, plan.estimate)
+        self.assertEqual([self.places[3]], query.run(models.storage))
+
+    def test_range_plan(self):
+        query = parse_where("Place", "price_by_night>=20, "
+                            "price_by_night<60 price_by_night>10")
+        plan = query.plan(models.storage)
+        self.assertEqual("range price_by_night >= 20 and "
+                         "price_by_night < 60 and price_by_night > 10",
+                         plan.access)
+        self.assertEqual(4, plan.estimate)
+        self.assertEqual(self.places[2:6], query.run(models.storage))
+
+    def test_range_follows_updates(self):
+        self.places[8].price_by_night = 5
+        query = parse_where("Place", "price_by_night<10")
+        self.assertEqual({self.places[0], self.places[8]},
+                         set(query.run(models.storage)))
+
+    def test_index_plan_cheaper_than_range(self):
+        query = parse_where("Place", "price_by_night>=10, city_id=c0")
+        self.assertEqual("index city_id = 'c0'",
+                         query.plan(models.storage).access)
+        self.assertEqual([self.places[3], self.places[6]],
+                         query.run(models.storage))
+
+    def test_top_k_in_index_order(self):
+        query = parse_where("Place", "city_id!=c2 "
+                            "order_by=-price_by_night limit=3")
+        plan = query.plan(models.storage)
+        self.assertTrue(plan.ordered)
+        self.assertEqual([self.places[7], self.places[6], self.places[4]],
+                         query.run(models.storage))
+
+    def test_ordered_range(self):
+        query = parse_where("Place", "price_by_night>30 "
+                            "order_by=-price_by_night")
+        self.assertTrue(query.plan(models.storage).ordered)
+        self.assertEqual(self.places[:3:-1], query.run(models.storage))
+
+    def test_skipped_values_scanned(self):
+        self.places[0].price_by_night = "free"
+        query = parse_where("Place", "order_by=price_by_night limit=2")
+        self.assertEqual("scan", query.plan(models.storage).access)
+
+    def test_order_and_limit(self):
+        query = parse_where("Place", "order_by=-price_by_night limit=2")
+        self.assertEqual([self.places[8], self.places[7]],
+                         query.run(models.storage))
+        query = parse_where("Place", "city_id=c2 order_by=price_by_night")
+        self.assertEqual(self.places[2::3], query.run(models.storage))
+
+    def test_limit_without_order(self):
+        self.assertEqual(4, len(parse_where("Place", "limit=4")
+                                .run(models.storage)))
+
+    def test_unorderable(self):
+        self.places[0].price_by_night = "free"
+        with self.assertRaises(ValueError):
+            parse_where("Place", "order_by=price_by_night").run(
+                models.storage)
+
+    def test_explain(self):
+        query = parse_where("Place", "city_id=c1, price_by_night<50 "
+                            "order_by=-price_by_night limit=1")
+        self.assertEqual("Place index city_id = 'c1' (3 candidates)\n"
+                         "filter city_id = 'c1'\n"
+                         "filter price_by_night < 50\n"
+                         "order by price_by_night desc\n"
+                         "limit 1", query.explain(models.storage))
+        query = parse_where("Place", "order_by=price_by_night limit=1")
+        self.assertEqual("Place range price_by_night (9 candidates)\n"
+                         "order by price_by_night (index order)\n"
+                         "limit 1", query.explain(models.storage))
+
+    def test_query_object(self):
+        query = Query("Place", [Condition("price_by_night", "<", 20)])
+        self.assertEqual(self.places[:2], query.run(models.storage))
+
+
+class TestQuery_spatial(unittest.TestCase):
+    """Unittests for testing the near and within functions."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.paris = Place()
+        self.paris.latitude = 48.8566
+        self.paris.longitude = 2.3522
+        self.lyon = Place()
+        self.lyon.latitude = 45.764
+        self.lyon.longitude = 4.8357
+
+    def tearDown(self):
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_near(self):
+        self.assertEqual([self.paris],
+                         near(models.storage, "Place", 48.86, 2.34, 50))
+        self.assertEqual([self.lyon, self.paris],
+                         near(models.storage, "Place", 45.7, 4.8, 500))
+
+    def test_near_follows_updates(self):
+        self.lyon.latitude = 48.87
+        self.lyon.longitude = 2.35
+        self.assertEqual(2, len(near(models.storage, "Place", 48.86, 2.34,
+                                     50)))
+
+    def test_near_after_delete(self):
+        models.storage.delete(self.paris)
+        self.assertEqual([], near(models.storage, "Place", 48.86, 2.34, 50))
+
+    def test_within(self):
+        self.assertEqual([self.lyon],
+                         within(models.storage, "Place", 45, 4, 46, 5))
+
+    def test_class_without_coordinates(self):
+        with self.assertRaises(ValueError):
+            near(models.storage, "City", 0, 0, 10)
+
+    def test_scan_without_grid(self):
+        storage = DBStorage()
+        storage.index = lambda cls, attr: None
+        storage.all = lambda cls: models.storage.all(cls)
+        self.assertEqual([self.lyon], within(storage, "Place", 45, 4, 46, 5))
+
+
+class TestQuery_search(unittest.TestCase):
+    """Unittests for testing the search function."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.rv = Review()
+        self.rv.text = "Lovely pool"
+        self.pl = Place()
+        self.pl.description = "Pool and garden, with a pool view"
+
+    def tearDown(self):
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_search_class(self):
+        self.assertEqual([self.rv], search(models.storage, "pool",
+                                           "Review"))
+
+    def test_search_every_class(self):
+        self.assertEqual({self.rv, self.pl},
+                         set(search(models.storage, "pool")))
+        self.assertEqual(1, len(search(models.storage, "pool", limit=1)))
+
+    def test_search_follows_updates(self):
+        self.rv.text = "Noisy"
+        self.assertEqual([], search(models.storage, "pool", "Review"))
+        self.assertEqual([self.rv], search(models.storage, "noisy"))
+
+    def test_search_after_delete(self):
+        models.storage.delete(self.pl)
+        self.assertEqual([], search(models.storage, "garden"))
+
+    def test_search_after_reload(self):
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        found = search(models.storage, "lovely")
+        self.assertEqual([self.rv.id], [obj.id for obj in found])
+        os.remove("file.json")
+
+    def test_class_without_text(self):
+        with self.assertRaises(ValueError):
+            search(models.storage, "pool", "City")
+
+
+class TestQuery_having(unittest.TestCase):
+    """Unittests for testing the having function."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.pl1 = Place()
+        self.pl1.amenity_ids = ["wifi", "pool"]
+        self.pl2 = Place()
+        self.pl2.amenity_ids = ["wifi"]
+
+    def tearDown(self):
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_all_and_any(self):
+        self.assertEqual([self.pl1], having(models.storage, "Place",
+                                            "amenity_ids", ["pool", "wifi"]))
+        self.assertEqual({self.pl1, self.pl2},
+                         set(having(models.storage, "Place", "amenity_ids",
+                                    ["pool", "wifi"], True)))
+
+    def test_follows_updates(self):
+        self.pl2.amenity_ids = ["wifi", "pool"]
+        self.pl1.amenity_ids = []
+        self.assertEqual([self.pl2], having(models.storage, "Place",
+                                            "amenity_ids", ["pool"]))
+
+    def test_follows_changes_in_place(self):
+        having(models.storage, "Place", "amenity_ids", ["pool"])
+        BaseModel.pop_dirty()
+        self.pl2.amenity_ids.append("pool")
+        self.pl1.amenity_ids.remove("pool")
+        pl3 = Place()
+        pl3.amenity_ids.extend(["pool"])
+        self.assertEqual([], Place.amenity_ids)
+        self.assertEqual({self.pl1, self.pl2, pl3},
+                         set(BaseModel.pop_dirty()))
+        self.assertEqual({self.pl2, pl3},
+                         set(having(models.storage, "Place", "amenity_ids",
+                                    ["pool"])))
+
+    def test_after_delete(self):
+        models.storage.delete(self.pl1)
+        self.assertEqual([], having(models.storage, "Place", "amenity_ids",
+                                    ["pool"]))
+
+    def test_after_reload(self):
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        found = having(models.storage, "Place", "amenity_ids", ["pool"])
+        self.assertEqual([self.pl1.id], [obj.id for obj in found])
+        os.remove("file.json")
+
+    def test_scan_without_index(self):
+        storage = DBStorage()
+        storage.index = lambda cls, attr: None
+        storage.all = lambda cls: models.storage.all(cls)
+        self.assertEqual([self.pl1], having(storage, "Place", "amenity_ids",
+                                            ["pool"]))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            having(models.storage, "Place", "name", ["wifi"])
+        with self.assertRaises(ValueError):
+            having(models.storage, "Place", "amenity_ids", [])
+
+
+class TestQuery_aggregate(unittest.TestCase):
+    """Unittests for testing the aggregate function."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.places = []
+        for i in range(6):
+            pl = Place()
+            pl.city_id = "c{}".format(i % 2)
+            pl.price_by_night = i * 10
+            models.storage.new(pl)
+            self.places.append(pl)
+
+    def tearDown(self):
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_totals(self):
+        self.assertEqual(6, aggregate(models.storage, "Place", "count"))
+        self.assertEqual(150, aggregate(models.storage, "Place", "sum",
+                                        "price_by_night"))
+        self.assertEqual(25, aggregate(models.storage, "Place", "avg",
+                                       "price_by_night"))
+        self.assertEqual(0, aggregate(models.storage, "Place", "min",
+                                      "price_by_night"))
+
+    def test_group_by(self):
+        self.assertEqual({"c0": 20, "c1": 30},
+                         aggregate(models.storage, "Place", "avg",
+                                   "price_by_night", by="city_id"))
+        self.assertEqual({"c0": 40, "c1": 50},
+                         aggregate(models.storage, "Place", "max",
+                                   "price_by_night", "city_id",
+                                   [Condition("price_by_night", ">", 30)]))
+
+    def test_count_from_index(self):
+        self.places[0].city_id = "c1"
+        self.assertEqual({"c0": 2, "c1": 4},
+                         aggregate(models.storage, "Place", "count",
+                                   by="city_id"))
+
+    def test_groups_from_index(self):
+        self.places[4].price_by_night = "free"
+        with patch.object(FileStorage, "all", side_effect=AssertionError):
+            groups = aggregate_groups(models.storage, "Place", "avg",
+                                      "price_by_night", "city_id")
+            self.assertEqual(("c0", 10), next(groups))
+            self.assertEqual([("c1", 30)], list(groups))
+
+    def test_skips_odd_values(self):
+        self.places[5].price_by_night = "free"
+        self.assertEqual(40, aggregate(models.storage, "Place", "max",
+                                       "price_by_night"))
+
+    def test_empty(self):
+        conds = [Condition("name", "=", "x")]
+        self.assertIsNone(aggregate(models.storage, "Place", "avg",
+                                    "price_by_night", conditions=conds))
+        self.assertEqual(0, aggregate(models.storage, "Place", "count",
+                                      conditions=conds))
+        self.assertEqual({}, aggregate(models.storage, "Place", "count",
+                                       by="name", conditions=conds))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            aggregate(models.storage, "Place", "median", "price_by_night")
+        with self.assertRaises(ValueError):
+            aggregate(models.storage, "Place", "sum")
+        with self.assertRaises(ValueError):
+            aggregate(models.storage, "Place", "count", by="amenity_ids")
+
+
+if __name__ == "__main__":
+    unittest.main()
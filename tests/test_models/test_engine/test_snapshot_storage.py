@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/snapshot_storage.py.
+
+Unittest classes:
+    TestSnapshotStorage_instantiation
+    TestSnapshotStorage_methods
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from models.base_model import BaseModel
+from models.engine.column_storage import ColumnStorage
+from models.engine.query import aggregate, parse_where
+from models.engine.snapshot_storage import SnapshotStorage, write_snapshot
+from models.user import User
+from models.place import Place
+from models.review import Review
+
+
+class TestSnapshotStorage_instantiation(unittest.TestCase):
+    """Unittests for testing instantiation of the SnapshotStorage class."""
+
+    def test_SnapshotStorage_instantiation_no_args(self):
+        self.assertEqual(type(SnapshotStorage()), SnapshotStorage)
+
+    def test_SnapshotStorage_instantiation_with_arg(self):
+        with self.assertRaises(TypeError):
+            SnapshotStorage(None)
+
+
+class TestSnapshotStorage_methods(unittest.TestCase):
+    """Unittests for testing methods of the SnapshotStorage class."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "file.snapshot")
+        source = ColumnStorage()
+        source._ColumnStorage__file_path = os.path.join(self.tmpdir,
+                                                        "file.json")
+        source.reload()
+        BaseModel.pop_dirty()
+        self.user = User()
+        self.user.email = "betty@holberton.com"
+        source.new(self.user)
+        self.places = []
+        for i in range(5):
+            pl = Place()
+            pl.city_id = "c{}".format(i % 2)
+            pl.price_by_night = i * 10
+            source.new(pl)
+            self.places.append(pl)
+        self.written = write_snapshot(source, self.path)
+        self.storage = self.open()
+
+    def tearDown(self):
+        self.storage.close()
+        shutil.rmtree(self.tmpdir)
+
+    def open(self):
+        storage = SnapshotStorage()
+        storage._SnapshotStorage__file_path = self.path
+        storage.reload()
+        return storage
+
+    def test_write_snapshot(self):
+        self.assertEqual(6, self.written)
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+        with open(self.path, "rb") as f:
+            self.assertEqual(b"HBNBSNP1", f.read(8))
+
+    def test_get(self):
+        for pl in self.places:
+            loaded = self.storage.get(Place, pl.id)
+            self.assertEqual(pl.to_dict(), loaded.to_dict())
+        self.assertIsNone(self.storage.get(Place, self.user.id))
+        self.assertIsNone(self.storage.get("Review", "nope"))
+
+    def test_identity_map(self):
+        loaded = self.storage.get(User, self.user.id)
+        self.assertIs(loaded, self.storage.get(User, self.user.id))
+        self.assertIs(loaded, next(self.storage.scan(User)))
+
+    def test_all(self):
+        objs = self.storage.all()
+        self.assertEqual(6, len(objs))
+        self.assertIn("User." + self.user.id, objs)
+        self.assertNotIn("Place." + self.user.id, objs)
+        self.assertEqual([pl.id for pl in self.places],
+                         [key.split(".")[1] for key in
+                          self.storage.all(Place)])
+
+    def test_count(self):
+        self.assertEqual(5, self.storage.count(Place))
+        self.assertEqual(0, self.storage.count(Review))
+        self.assertEqual(6, self.storage.count())
+
+    def test_find(self):
+        found = self.storage.find(Place, city_id="c1")
+        self.assertEqual([pl.id for pl in self.places[1::2]],
+                         [pl.id for pl in found])
+
+    def test_queries(self):
+        query = parse_where("Place", "price_by_night>=20")
+        self.assertEqual("scan", query.plan(self.storage).access)
+        self.assertEqual(3, len(query.run(self.storage)))
+        self.assertEqual({"c0": 20, "c1": 20}, aggregate(
+            self.storage, "Place", "avg", "price_by_night", "city_id"))
+
+    def test_read_only(self):
+        loaded = self.storage.get(User, self.user.id)
+        with self.assertRaises(PermissionError):
+            self.storage.new(loaded)
+        with self.assertRaises(PermissionError):
+            self.storage.delete(loaded)
+        with self.assertRaises(PermissionError):
+            self.storage.save()
+
+    def test_missing_file(self):
+        os.remove(self.path)
+        self.storage = self.open()
+        self.assertEqual(0, self.storage.count())
+        self.assertEqual([], list(self.storage.scan()))
+
+    def test_not_a_snapshot(self):
+        with open(self.path, "w") as f:
+            f.write("{}")
+        with self.assertRaises(ValueError):
+            self.open()
+
+    def test_reload_follows_new_snapshot(self):
+        source = ColumnStorage()
+        source._ColumnStorage__file_path = os.path.join(self.tmpdir,
+                                                        "none.json")
+        source.reload()
+        source.new(self.user)
+        write_snapshot(source, self.path)
+        self.assertEqual(6, self.storage.count())
+        self.storage.reload()
+        self.assertEqual(1, self.storage.count())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,227 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/transfer.py.
+
+Unittest classes:
+    TestTransfer_attribute_types
+    TestTransfer_bulk_import
+    TestTransfer_export
+"""
+import csv
+import gzip
+import json
+import models
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from models.base_model import BaseModel
+from models.engine.file_storage import FileStorage
+from models.engine.transfer import attribute_types, bulk_import
+from models.engine.transfer import export, export_lines
+from models.city import City
+from models.place import Place
+from models.user import User
+
+
+class TestTransfer_attribute_types(unittest.TestCase):
+    """Unittests for testing the attribute_types function."""
+
+    def test_place(self):
+        types = attribute_types(Place)
+        self.assertEqual(str, types["city_id"])
+        self.assertEqual(int, types["price_by_night"])
+        self.assertEqual(float, types["latitude"])
+        self.assertEqual(list, types["amenity_ids"])
+
+    def test_base_model(self):
+        self.assertEqual({}, attribute_types(BaseModel))
+
+
+class TestTransfer_bulk_import(unittest.TestCase):
+    """Unittests for testing the bulk_import function."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_jsonl(self):
+        pl = Place(id="p1", created_at=datetime(2017, 1, 1).isoformat(),
+                   updated_at=datetime(2017, 1, 2).isoformat(),
+                   price_by_night=80)
+        path = self.write("data.jsonl", json.dumps(pl.to_dict()) + "\n\n" +
+                          json.dumps({"__class__": "User",
+                                      "email": "a@b.c"}) + "\n")
+        self.assertEqual(2, bulk_import(path))
+        loaded = models.storage.all()["Place.p1"]
+        self.assertEqual(80, loaded.price_by_night)
+        self.assertEqual(datetime(2017, 1, 2), loaded.updated_at)
+        self.assertEqual(1, models.storage.count(User))
+
+    def test_saved_once(self):
+        path = self.write("data.jsonl", "".join(
+            json.dumps({"__class__": "User", "id": str(i)}) + "\n"
+            for i in range(3)))
+        bulk_import(path)
+        with open("file.json") as f:
+            self.assertEqual({"User.0", "User.1", "User.2"},
+                             set(json.load(f)))
+
+    def test_csv(self):
+        path = self.write("places.csv",
+                          "id,price_by_night,latitude,amenity_ids,note\n"
+                          "p1,80,1.5,\"[\"\"a1\"\"]\",hi\n"
+                          "p2,,2,,\n")
+        self.assertEqual(2, bulk_import(path, "Place"))
+        p1 = models.storage.all()["Place.p1"]
+        self.assertEqual(80, p1.price_by_night)
+        self.assertEqual(1.5, p1.latitude)
+        self.assertEqual(["a1"], p1.amenity_ids)
+        self.assertEqual("hi", p1.note)
+        p2 = models.storage.all()["Place.p2"]
+        self.assertEqual(0, p2.price_by_night)
+        self.assertEqual(2.0, p2.latitude)
+        self.assertNotIn("note", p2.__dict__)
+
+    def test_int_accepted_for_float(self):
+        path = self.write("data.jsonl", json.dumps(
+            {"__class__": "Place", "id": "p1", "latitude": 3}) + "\n")
+        bulk_import(path)
+        self.assertEqual(float, type(models.storage.all()["Place.p1"]
+                                     .latitude))
+
+    def test_invalid_type_imports_nothing(self):
+        path = self.write("data.jsonl", json.dumps(
+            {"__class__": "Place", "id": "p1"}) + "\n" + json.dumps(
+            {"__class__": "Place", "price_by_night": "cheap"}) + "\n")
+        with self.assertRaisesRegex(ValueError,
+                                    "line 2: price_by_night: expected int"):
+            bulk_import(path)
+        self.assertEqual({}, models.storage.all())
+
+    def test_invalid_json(self):
+        path = self.write("data.jsonl", "{}\n{oops\n")
+        with self.assertRaisesRegex(ValueError, "line 2: invalid JSON"):
+            bulk_import(path, "User")
+
+    def test_unknown_class(self):
+        path = self.write("data.jsonl", '{"__class__": "Nope"}\n')
+        with self.assertRaisesRegex(ValueError, "line 1: unknown class"):
+            bulk_import(path)
+
+    def test_class_name_missing(self):
+        path = self.write("data.jsonl", '{"id": "u1"}\n')
+        with self.assertRaisesRegex(ValueError, "class name missing"):
+            bulk_import(path)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            bulk_import("data.xml", fmt="xml")
+
+
+class TestTransfer_export(unittest.TestCase):
+    """Unittests for testing the export and export_lines functions."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.tmpdir = tempfile.mkdtemp()
+        self.p1 = Place()
+        self.p1.city_id = "c1"
+        self.p1.amenity_ids = ["a1", "a2"]
+        self.p2 = Place()
+        self.p2.city_id = "c2"
+        self.cy = City()
+        self.cy.name = "Paris"
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        shutil.rmtree(self.tmpdir)
+
+    def test_export_lines_is_generator(self):
+        lines = export_lines("Place")
+        self.assertIs(lines, iter(lines))
+        self.assertEqual(2, len(list(lines)))
+
+    def test_jsonl(self):
+        path = os.path.join(self.tmpdir, "out.jsonl")
+        self.assertEqual(3, export(path))
+        with open(path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertIn(self.p1.to_dict(), records)
+        self.assertIn(self.cy.to_dict(), records)
+
+    def test_filter(self):
+        lines = list(export_lines("Place", city_id="c1"))
+        self.assertEqual([self.p1.id], [json.loads(line)["id"]
+                                        for line in lines])
+        lines = list(export_lines(name="Paris"))
+        self.assertEqual([self.cy.id], [json.loads(line)["id"]
+                                        for line in lines])
+
+    def test_csv(self):
+        path = os.path.join(self.tmpdir, "places.csv")
+        self.assertEqual(2, export(path, "Place"))
+        with open(path, newline="") as f:
+            rows = {row["id"]: row for row in csv.DictReader(f)}
+        self.assertEqual("Place", rows[self.p1.id]["__class__"])
+        self.assertEqual(["a1", "a2"],
+                         json.loads(rows[self.p1.id]["amenity_ids"]))
+        self.assertEqual("c2", rows[self.p2.id]["city_id"])
+        self.assertEqual("", rows[self.p2.id]["price_by_night"])
+
+    def test_gzip_round_trip(self):
+        path = os.path.join(self.tmpdir, "out.csv.gz")
+        export(path)
+        with gzip.open(path, "rt") as f:
+            self.assertTrue(f.readline().startswith("__class__,id,"))
+        FileStorage._FileStorage__objects = {}
+        self.assertEqual(3, bulk_import(path))
+        loaded = models.storage.all()["Place." + self.p1.id]
+        self.assertEqual(["a1", "a2"], loaded.amenity_ids)
+        self.assertEqual(self.p1.created_at, loaded.created_at)
+
+    def test_unknown_class(self):
+        with self.assertRaises(ValueError):
+            export_lines("Nope")
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            export_lines("Place", "xml")
+
+
+if __name__ == "__main__":
+    unittest.main()
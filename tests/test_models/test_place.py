@@ -98,6 +98,13 @@ class TestPlace_instantiation(unittest.TestCase):
         self.assertIn("amenity_ids", dir(pl))
         self.assertNotIn("amenity_ids", pl.__dict__)
 
+    def test_amenity_ids_changed_in_place(self):
+        pl = Place()
+        pl.amenity_ids.append("wifi")
+        self.assertEqual(["wifi"], pl.amenity_ids)
+        self.assertEqual([], Place.amenity_ids)
+        self.assertEqual([], Place().amenity_ids)
+
     def test_two_places_unique_ids(self):
         pl1 = Place()
         pl2 = Place()